@@ -0,0 +1,24 @@
+"""Add sync_outbox table for the transactional outbox relay."""
+from __future__ import annotations
+
+from alembic import op
+
+from apps.core.models import SyncOutbox
+
+# revision identifiers, used by Alembic.
+revision = "20261016_0002"
+down_revision = "20251116_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create the outbox table if the initial metadata run did not already."""
+
+    SyncOutbox.__table__.create(bind=op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+    """Drop the outbox table."""
+
+    SyncOutbox.__table__.drop(bind=op.get_bind(), checkfirst=True)
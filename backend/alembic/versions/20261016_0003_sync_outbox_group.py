@@ -0,0 +1,27 @@
+"""Add the commit group column to sync_outbox."""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261016_0003"
+down_revision = "20261016_0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add group_id unless the table was created with it already."""
+
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("sync_outbox")}
+    if "group_id" not in columns:
+        op.add_column("sync_outbox", sa.Column("group_id", sa.String(32), nullable=True))
+        op.create_index("ix_sync_outbox_group_id", "sync_outbox", ["group_id"])
+
+
+def downgrade() -> None:
+    """Drop the commit group column."""
+
+    op.drop_index("ix_sync_outbox_group_id", table_name="sync_outbox")
+    op.drop_column("sync_outbox", "group_id")
@@ -10,6 +10,7 @@ from apps.api_gateway.routers import (
 )
 from apps.services import websocket
 from apps.core.config import get_settings
+from apps.core.sync_engine import sync_engine
 from apps.services.db_initializer import initialize_databases
 
 logger = logging.getLogger(__name__)
@@ -51,6 +52,8 @@ def create_app() -> FastAPI:
     async def startup_event():
         """应用启动时初始化数据库对象（触发器、存储过程等）"""
         logger.info("应用启动中...开始初始化数据库对象")
+        # 同步优先级配置错误时直接阻断启动
+        sync_engine.validate_lanes()
         try:
             results = initialize_databases()
             for db_name, result in results.items():
@@ -16,6 +16,7 @@ from apps.core.database import db_manager
 from apps.core.models import ConflictRecord, DailyStat, SyncConfig, SyncLog, User
 from apps.core.sync_engine import sync_engine
 from apps.core.sync_payloads import decode_params
+from apps.core.sync_upsert import upsert_statement
 
 router = APIRouter(prefix="/sync", tags=["sync"])
 
@@ -50,6 +51,7 @@ def get_sync_status(
             "sync_success": today_stat.sync_success_count if today_stat else 0,
             "sync_conflicts": today_stat.sync_conflict_count if today_stat else 0,
         },
+        "replication": sync_engine.replication_metrics(),
     }
 
 
@@ -120,6 +122,8 @@ def resolve_conflict(
             if statement:
                 target_db = conflict.target if payload.strategy == "source" else conflict.source
                 with db_manager.session_scope(target_db) as peer_session:
+                    dialect_name = peer_session.get_bind().dialect.name
+                    statement = upsert_statement(statement, dialect_name, guarded=False)
                     peer_session.execute(text(statement), params)
 
         conflict.status = "resolved"
@@ -47,6 +47,29 @@ class ConsistencyCheckResponse(BaseModel):
     timestamp: datetime
 
 
+class TableConsistencyRequest(BaseModel):
+    """全表一致性检查请求"""
+    table: str
+    start: Optional[int] = Field(None, description="起始主键（含）")
+    end: Optional[int] = Field(None, description="结束主键（不含）")
+    content: bool = Field(True, description="比较行内容哈希；为 false 时只比较版本聚合")
+
+
+class TableConsistencyResponse(BaseModel):
+    """全表一致性检查响应"""
+    table: str
+    consistent: bool
+    databases: list[str]
+    row_counts: dict
+    divergent_ids: list
+    divergent: dict
+    errors: dict
+    ranges_checked: int
+    leaf_ranges: int
+    queries: int
+    timestamp: datetime
+
+
 class SyncRepairRequest(BaseModel):
     """同步修复请求"""
     table: str
@@ -61,6 +84,27 @@ class SyncRepairResponse(BaseModel):
     results: dict
 
 
+class BulkRepairRequest(BaseModel):
+    """批量同步修复请求"""
+    table: str
+    record_ids: Optional[list[int]] = Field(None, description="待修复的记录ID列表")
+    start: Optional[int] = Field(None, description="起始主键（含）")
+    end: Optional[int] = Field(None, description="结束主键（不含）")
+    targets: Optional[list[str]] = Field(None, description="目标库，默认全部从库")
+    chunk_size: int = Field(1000, ge=1, le=10000, description="每批读取的记录数")
+
+
+class BulkRepairResponse(BaseModel):
+    """批量同步修复响应"""
+    success: bool
+    repaired_dbs: list[str]
+    chunks: int
+    upserted: dict
+    deleted: dict
+    errors: dict
+    timestamp: datetime
+
+
 class SyncStatsResponse(BaseModel):
     """同步统计响应"""
     success_count: int
@@ -154,6 +198,31 @@ async def verify_consistency(
         raise HTTPException(status_code=500, detail=f"一致性验证失败: {str(e)}")
 
 
+@router.post("/verify-table", response_model=TableConsistencyResponse)
+async def verify_table(
+    request: TableConsistencyRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_session)
+) -> TableConsistencyResponse:
+    """
+    全表一致性验证
+    
+    通过主键区间摘要比较四个数据库，返回不一致的记录ID
+    """
+    try:
+        result = await sync_manager.verify_table_consistency(
+            table=request.table,
+            start=request.start,
+            end=request.end,
+            content=request.content
+        )
+        return TableConsistencyResponse(**result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"一致性验证失败: {str(e)}")
+
+
 @router.post("/repair", response_model=SyncRepairResponse)
 async def sync_repair(
     request: SyncRepairRequest,
@@ -181,6 +250,37 @@ async def sync_repair(
         raise HTTPException(status_code=500, detail=f"同步修复失败: {str(e)}")
 
 
+@router.post("/repair-bulk", response_model=BulkRepairResponse)
+async def sync_repair_bulk(
+    request: BulkRepairRequest,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db_session)
+) -> BulkRepairResponse:
+    """
+    批量同步修复
+    
+    按ID列表或主键区间从主库分块读取数据，批量 upsert 到各目标库
+    需要管理员权限
+    """
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="需要管理员权限")
+    
+    try:
+        result = await sync_manager.sync_repair_bulk(
+            table=request.table,
+            record_ids=request.record_ids,
+            start=request.start,
+            end=request.end,
+            targets=request.targets,
+            chunk_size=request.chunk_size
+        )
+        return BulkRepairResponse(**result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量同步修复失败: {str(e)}")
+
+
 @router.get("/stats", response_model=SyncStatsResponse)
 async def get_sync_stats(
     current_user: dict = Depends(get_current_user),
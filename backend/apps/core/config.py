@@ -34,6 +34,23 @@ class Settings(BaseSettings):
     alert_sender: str | None = Field(default=None, alias="ALERT_SENDER")
     alert_recipients: List[str] = Field(default_factory=list, alias="ALERT_RECIPIENTS")
 
+    sync_parallel_replication: bool = Field(default=True, alias="SYNC_PARALLEL_REPLICATION")
+    sync_replication_workers: int = Field(default=8, alias="SYNC_REPLICATION_WORKERS")
+    sync_stream_maxlen: int = Field(default=1_000_000, alias="SYNC_STREAM_MAXLEN")
+    sync_stream_retention_seconds: int | None = Field(
+        default=None, alias="SYNC_STREAM_RETENTION_SECONDS"
+    )
+    sync_wire_format: str = Field(default="json", alias="SYNC_WIRE_FORMAT")
+    sync_stream_shards: int = Field(default=1, alias="SYNC_STREAM_SHARDS")
+    sync_priority_lanes: bool = Field(default=False, alias="SYNC_PRIORITY_LANES")
+    sync_conflict_digest_seconds: int = Field(default=300, alias="SYNC_CONFLICT_DIGEST_SECONDS")
+    sync_write_timeout_seconds: float = Field(default=10.0, alias="SYNC_WRITE_TIMEOUT_SECONDS")
+    sync_default_consistency: str = Field(default="all", alias="SYNC_DEFAULT_CONSISTENCY")
+    sync_write_quorum: int = Field(default=2, alias="SYNC_WRITE_QUORUM")
+    sync_breaker_failures: int = Field(default=3, alias="SYNC_BREAKER_FAILURES")
+    sync_breaker_reset_seconds: float = Field(default=30.0, alias="SYNC_BREAKER_RESET_SECONDS")
+    sync_outbox_enabled: bool = Field(default=False, alias="SYNC_OUTBOX_ENABLED")
+
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
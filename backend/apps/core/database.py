@@ -2,10 +2,10 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
-from typing import Dict, Generator
+from typing import Dict, Generator, Optional
 
 from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from .config import get_settings
@@ -89,11 +89,17 @@ class DatabaseManager:
         return self._engines[name]
 
     @contextmanager
-    def session_scope(self, name: str) -> Generator[Session, None, None]:
-        """Provide a transactional scope around a series of operations."""
+    def session_scope(
+        self, name: str, bind: Optional[Connection] = None
+    ) -> Generator[Session, None, None]:
+        """Provide a transactional scope around a series of operations.
+
+        ``bind`` pins the session to one checked-out connection, so commits inside the
+        scope keep using it instead of returning it to the pool.
+        """
 
         session_factory = self._sessions[name]
-        session = session_factory()
+        session = session_factory(bind=bind) if bind is not None else session_factory()
         session.info.setdefault("db_name", name)
         try:
             yield session
@@ -14,7 +14,7 @@ from .inventory import (
     Tag,
 )
 from .operations import AuditLog, Blacklist, ConfigItem, ModerationTask, Report
-from .sync import ConflictRecord, DailyStat, SyncConfig, SyncLog
+from .sync import ConflictRecord, DailyStat, SyncConfig, SyncLog, SyncOutbox
 from .transactions import Delivery, Offer, Payment, Review, Transaction, TransactionLog
 from .users import Permission, Role, RolePermission, User, UserProfile, UserRole
 
@@ -55,6 +55,7 @@ __all__ = [
     "SearchTrending",
     "SyncConfig",
     "SyncLog",
+    "SyncOutbox",
     "Tag",
     "Transaction",
     "TransactionLog",
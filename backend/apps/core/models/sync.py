@@ -7,7 +7,7 @@ from typing import Optional
 from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Integer, JSON, String
 from sqlalchemy.orm import Mapped, mapped_column
 
-from .base import BaseModel
+from .base import Base, BaseModel, PrimaryKeyMixin
 
 
 class SyncConfig(BaseModel):
@@ -69,3 +69,18 @@ class DailyStat(BaseModel):
     inventory_changes: Mapped[int] = mapped_column(
         Integer, nullable=False, server_default="0", default=0
     )
+
+
+class SyncOutbox(Base, PrimaryKeyMixin):
+    """Sync events written in the originating transaction, waiting to be relayed."""
+
+    __tablename__ = "sync_outbox"
+
+    table_name: Mapped[str] = mapped_column(String(128), nullable=False)
+    action: Mapped[str] = mapped_column(String(16), nullable=False)
+    record_id: Mapped[Optional[str]] = mapped_column(String(64))
+    origin: Mapped[str] = mapped_column(String(64), nullable=False)
+    sync_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    group_id: Mapped[Optional[str]] = mapped_column(String(32), index=True)
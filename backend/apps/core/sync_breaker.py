@@ -0,0 +1,184 @@
+"""Per-target circuit breakers for replication.
+
+After ``failure_threshold`` consecutive connection failures a target is parked: its
+name is added to a Redis set shared by every worker process, and from then on events
+for it are appended to a per-target backlog stream instead of waiting for a pool
+checkout timeout. A drainer replays the backlog in order once the target answers
+again and releases the target when the backlog is empty. Parking and releasing are
+atomic against each other, so a stale parked-set cache never parks an event after
+the release.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, Optional, Set
+
+from loguru import logger
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy.exc import DBAPIError, DisconnectionError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+PARKED_KEY = "campuswap:sync:parked"
+BACKLOG_KEY_PREFIX = "campuswap:sync:backlog:"
+
+# MySQL/MariaDB client errors: can't connect (2002 socket, 2003 TCP), server has gone
+# away (2006) and lost connection during query (2013).
+MYSQL_CONNECTION_ERRORS = frozenset({2002, 2003, 2006, 2013})
+# SQLSTATE class 08 (connection exception) and the server shutting down.
+PG_CONNECTION_SQLSTATE_CLASS = "08"
+PG_SHUTDOWN_SQLSTATES = frozenset({"57P01", "57P02", "57P03"})
+
+
+def backlog_key(target: str) -> str:
+    """Return the backlog stream of a parked target."""
+
+    return f"{BACKLOG_KEY_PREFIX}{target}"
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    """Whether ``exc`` means the target is unreachable rather than the statement bad.
+
+    Only connectivity counts: pool disconnects and checkout timeouts, errors after
+    which SQLAlchemy invalidated the connection, and driver errors that can only come
+    from a failed connection. Schema, data and syntax errors, deadlocks and lock
+    timeouts all come from a reachable server and never trip a breaker.
+    """
+
+    if isinstance(exc, (DisconnectionError, PoolTimeoutError)):
+        return True
+    if not isinstance(exc, DBAPIError):
+        return False
+    if exc.connection_invalidated:
+        return True
+    orig = exc.orig
+    args = getattr(orig, "args", ())
+    if args and isinstance(args[0], int):
+        return args[0] in MYSQL_CONNECTION_ERRORS
+    if type(orig).__module__.split(".")[0] in {"psycopg", "psycopg2"}:
+        sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+        if sqlstate:
+            return sqlstate.startswith(PG_CONNECTION_SQLSTATE_CLASS) or (
+                sqlstate in PG_SHUTDOWN_SQLSTATES
+            )
+        # Server errors always carry an SQLSTATE; psycopg raises these without one only
+        # when the connection could not be made or was closed.
+        return isinstance(exc, (OperationalError, InterfaceError))
+    return False
+
+
+@dataclass
+class CircuitBreaker:
+    """Consecutive-failure breaker of one target within this process."""
+
+    failure_threshold: int = 3
+    reset_timeout: float = 30.0
+    failures: int = 0
+    opened_at: Optional[float] = None
+
+    def record_failure(self) -> bool:
+        """Count a connection failure; returns True when the breaker opens."""
+
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            was_open = self.opened_at is not None
+            self.opened_at = time.monotonic()
+            return not was_open
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def allow_probe(self) -> bool:
+        """Whether the target may be tried again, e.g. by the backlog drainer."""
+
+        return self.opened_at is None or time.monotonic() - self.opened_at >= self.reset_timeout
+
+
+class TargetBreakers:
+    """Breakers of all targets plus the cached, cross-process parked set."""
+
+    def __init__(
+        self,
+        redis_client: Any,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        cache_seconds: float = 1.0,
+    ) -> None:
+        self._redis = redis_client
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self.cache_seconds = cache_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = Lock()
+        self._parked: Set[str] = set()
+        self._parked_at = float("-inf")
+
+    def breaker(self, target: str) -> CircuitBreaker:
+        with self._lock:
+            return self._breaker(target)
+
+    def parked(self, target: str) -> bool:
+        """Whether events for ``target`` must go to its backlog instead."""
+
+        return target in self.parked_targets()
+
+    def parked_targets(self, refresh: bool = False) -> Set[str]:
+        now = time.monotonic()
+        if refresh or now - self._parked_at >= self.cache_seconds:
+            try:
+                self._parked = set(self._redis.smembers(PARKED_KEY))
+                self._parked_at = now
+            except RedisError as exc:  # pragma: no cover - network failure
+                logger.warning("Failed to read parked sync targets", error=str(exc))
+        return set(self._parked)
+
+    def record_failure(self, target: str, exc: BaseException) -> None:
+        """Count a failure of ``target``; park it when its breaker opens."""
+
+        if not is_connection_error(exc):
+            return
+        with self._lock:
+            opened = self._breaker(target).record_failure()
+        if opened:
+            logger.warning("Sync target circuit opened, parking its events", target=target)
+            self._redis.sadd(PARKED_KEY, target)
+            self._parked.add(target)
+
+    def record_success(self, target: str) -> None:
+        with self._lock:
+            self._breaker(target).record_success()
+
+    def release(self, target: str) -> bool:
+        """Resume live replication to ``target`` if its backlog is empty.
+
+        The backlog is WATCHed, so an event parked concurrently makes the release fail
+        and the drainer applies it first. Parking checks the parked set the same way
+        (see :meth:`SyncEngine.park_events`), so no event is parked after the release
+        and every parked event is applied before live writes resume.
+        """
+
+        key = backlog_key(target)
+        with self._redis.pipeline() as pipeline:
+            try:
+                pipeline.watch(key)
+                if pipeline.xlen(key):
+                    return False
+                pipeline.multi()
+                pipeline.srem(PARKED_KEY, target)
+                pipeline.execute()
+            except WatchError:
+                return False
+        self._parked.discard(target)
+        self.record_success(target)
+        logger.info("Sync target circuit closed", target=target)
+        return True
+
+    def _breaker(self, target: str) -> CircuitBreaker:
+        breaker = self._breakers.get(target)
+        if breaker is None:
+            breaker = CircuitBreaker(self._failure_threshold, self._reset_timeout)
+            self._breakers[target] = breaker
+        return breaker
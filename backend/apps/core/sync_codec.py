@@ -0,0 +1,155 @@
+"""Compact, versioned binary wire format for sync stream entries.
+
+Version 2 entries carry two fields: ``v`` (the format version) and ``d``, a msgpack
+array of the event attributes. The SQL text is replaced by a template ID registered
+once in a Redis hash, parameters are sent positionally in template order, and
+datetimes/Decimals use msgpack extension types instead of tagged JSON objects.
+Entries without ``v`` are legacy JSON and are still decoded by
+:meth:`apps.core.sync_engine.SyncEvent.from_stream`.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+import msgpack
+import redis
+
+WIRE_VERSION = "2"
+TEMPLATE_KEY = "campuswap:sync:templates"
+
+# Same bind-parameter syntax sqlalchemy.text() recognises.
+_BIND_PATTERN = re.compile(r"(?<![:\w\\]):(\w+)(?!:)")
+
+_EXT_DATETIME = 1
+_EXT_DATE = 2
+_EXT_TIME = 3
+_EXT_DECIMAL = 4
+
+
+@dataclass(frozen=True)
+class StatementTemplate:
+    """A replicated SQL statement and the order of its bind parameters."""
+
+    template_id: str
+    sql: str
+    param_names: tuple[str, ...]
+
+    def positional(self, params: Dict[str, Any]) -> Optional[List[Any]]:
+        """Return params in template order, or ``None`` when a bind is missing."""
+
+        if any(name not in params for name in self.param_names):
+            return None
+        return [params[name] for name in self.param_names]
+
+    def named(self, values: List[Any]) -> Dict[str, Any]:
+        """Map positional values back onto their bind parameter names."""
+
+        return dict(zip(self.param_names, values))
+
+
+@lru_cache(maxsize=4096)
+def template_for(sql: str) -> StatementTemplate:
+    """Build (and memoise) the template describing a statement."""
+
+    names = tuple(dict.fromkeys(_BIND_PATTERN.findall(sql)))
+    template_id = hashlib.sha1(sql.encode("utf-8")).hexdigest()[:16]
+    return StatementTemplate(template_id=template_id, sql=sql, param_names=names)
+
+
+class TemplateRegistry:
+    """Share statement templates between publishers and workers through Redis."""
+
+    def __init__(self, redis_client: redis.Redis, key: str = TEMPLATE_KEY) -> None:
+        self._redis = redis_client
+        self._key = key
+        self._known: Dict[str, StatementTemplate] = {}
+
+    def stage(
+        self, pipeline: Any, templates: Iterable[StatementTemplate]
+    ) -> List[StatementTemplate]:
+        """Queue HSETNX for templates this process has not registered yet."""
+
+        staged: Dict[str, StatementTemplate] = {}
+        for template in templates:
+            if template.template_id in self._known or template.template_id in staged:
+                continue
+            pipeline.hsetnx(
+                self._key,
+                template.template_id,
+                json.dumps({"sql": template.sql, "params": list(template.param_names)}),
+            )
+            staged[template.template_id] = template
+        return list(staged.values())
+
+    def mark_registered(self, templates: Iterable[StatementTemplate]) -> None:
+        """Remember templates once the pipeline that registered them succeeded."""
+
+        for template in templates:
+            self._known[template.template_id] = template
+
+    def resolve(self, template_id: str) -> StatementTemplate:
+        """Return the template for an ID, fetching it from Redis on a cache miss."""
+
+        template = self._known.get(template_id)
+        if template is not None:
+            return template
+        raw = self._redis.hget(self._key, template_id)
+        if raw is None:
+            raise KeyError(f"Unknown sync statement template {template_id}")
+        data = json.loads(raw)
+        template = StatementTemplate(
+            template_id=template_id, sql=data["sql"], param_names=tuple(data["params"])
+        )
+        self._known[template_id] = template
+        return template
+
+
+def pack(values: List[Any]) -> bytes:
+    """Serialize a list of event attributes with native type tags."""
+
+    return msgpack.packb(values, default=_encode_ext, use_bin_type=True)
+
+
+def unpack(data: Any) -> List[Any]:
+    """Deserialize :func:`pack` output.
+
+    Clients created with ``decode_responses=True`` hand binary fields back as ``str``;
+    they must use ``encoding_errors="surrogateescape"`` so the original bytes can be
+    recovered losslessly here.
+    """
+
+    if isinstance(data, str):
+        data = data.encode("utf-8", "surrogateescape")
+    return msgpack.unpackb(data, ext_hook=_decode_ext, raw=False)
+
+
+def _encode_ext(value: Any) -> msgpack.ExtType:
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, value.isoformat().encode("ascii"))
+    if isinstance(value, date):
+        return msgpack.ExtType(_EXT_DATE, value.isoformat().encode("ascii"))
+    if isinstance(value, time):
+        return msgpack.ExtType(_EXT_TIME, value.isoformat().encode("ascii"))
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(value).encode("ascii"))
+    raise TypeError(f"Cannot encode {type(value).__name__} in sync wire format")
+
+
+def _decode_ext(code: int, data: bytes) -> Any:
+    text = data.decode("ascii")
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(text)
+    if code == _EXT_DATE:
+        return date.fromisoformat(text)
+    if code == _EXT_TIME:
+        return time.fromisoformat(text)
+    if code == _EXT_DECIMAL:
+        return Decimal(text)
+    return msgpack.ExtType(code, data)
@@ -0,0 +1,234 @@
+"""Buffered conflict persistence with periodic e-mail digests.
+
+Replication threads only enqueue conflicts. A writer thread stores them in
+``conflict_records`` with bulk inserts, and a digest thread sends one e-mail per
+window summarising conflicts grouped by table and target. A batch that still fails
+after retrying with backoff is parked in a Redis dead-letter stream, from which
+:meth:`ConflictRecorder.replay_dead_letters` stores it again each digest window.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import queue
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional
+
+import redis
+from loguru import logger
+from sqlalchemy import insert
+
+from apps.core.config import get_settings
+from apps.core.database import db_manager
+from apps.core.models import ConflictRecord
+from apps.services.notifications import email_notifier
+
+FLUSH_INTERVAL_SECONDS = 1.0
+BATCH_SIZE = 500
+SAMPLE_RECORDS = 10
+WRITE_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 30.0
+DEAD_LETTER_STREAM = "campuswap:sync:conflicts:dead"
+
+
+@dataclass
+class ConflictDigest:
+    """Conflicts of one ``(table, target)`` pair seen during a digest window."""
+
+    count: int = 0
+    sources: set[str] = field(default_factory=set)
+    record_ids: List[str] = field(default_factory=list)
+
+
+class ConflictRecorder:
+    """Queue conflicts off the replication path and persist them in the background."""
+
+    def __init__(
+        self,
+        digest_interval: float | None = None,
+        batch_size: int = BATCH_SIZE,
+        max_queue: int = 50_000,
+    ) -> None:
+        settings = get_settings()
+        self._digest_interval = (
+            digest_interval
+            if digest_interval is not None
+            else settings.sync_conflict_digest_seconds
+        )
+        self._batch_size = batch_size
+        self._queue: queue.Queue[Dict[str, Any]] = queue.Queue(maxsize=max_queue)
+        self._digest: Dict[tuple[str, str], ConflictDigest] = {}
+        self._digest_lock = Lock()
+        self._start_lock = Lock()
+        self._stop = Event()
+        self._threads: List[Thread] = []
+        self._redis_url = settings.redis_url
+        self._redis_client: Optional[redis.Redis] = None
+
+    def record(self, table: str, record_id: str, source: str, target: str, payload: dict) -> None:
+        """Enqueue a conflict; blocks only when the writer is far behind."""
+
+        self._ensure_started()
+        self._queue.put(
+            {
+                "table_name": table,
+                "record_id": record_id,
+                "source": source,
+                "target": target,
+                "payload": payload,
+            }
+        )
+
+    def flush(self, timeout: float = 10.0) -> None:
+        """Wait until queued conflicts are stored, then send the pending digest."""
+
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._send_digest()
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            self._threads = [
+                Thread(target=self._write_loop, name="sync-conflict-writer", daemon=True),
+                Thread(target=self._digest_loop, name="sync-conflict-digest", daemon=True),
+            ]
+            for thread in self._threads:
+                thread.start()
+            atexit.register(self.flush)
+
+    def _write_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                batch = [self._queue.get(timeout=FLUSH_INTERVAL_SECONDS)]
+            except queue.Empty:
+                continue
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._persist(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _persist(self, rows: List[Dict[str, Any]]) -> None:
+        """Write a batch, retrying with exponential backoff before dead-lettering it."""
+
+        delay = RETRY_BASE_SECONDS
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                self._write(rows)
+                return
+            except Exception as exc:
+                logger.warning(
+                    "Failed to persist sync conflicts",
+                    count=len(rows),
+                    attempt=attempt,
+                    error=str(exc),
+                )
+            if attempt == WRITE_ATTEMPTS or self._stop.wait(delay):
+                break
+            delay = min(delay * 2, RETRY_MAX_SECONDS)
+        self._dead_letter(rows)
+
+    def _dead_letter(self, rows: List[Dict[str, Any]]) -> None:
+        """Park a batch the database would not take in the dead-letter stream."""
+
+        try:
+            pipeline = self._redis().pipeline(transaction=False)
+            for row in rows:
+                pipeline.xadd(DEAD_LETTER_STREAM, {"conflict": json.dumps(row, default=str)})
+            pipeline.execute()
+        except Exception as exc:  # pragma: no cover - database and redis both down
+            logger.exception(
+                "Dropped sync conflicts, dead-letter stream unavailable",
+                count=len(rows),
+                error=str(exc),
+                conflicts=rows,
+            )
+            return
+        logger.error("Moved sync conflicts to dead-letter stream", count=len(rows))
+
+    def replay_dead_letters(self, count: int = BATCH_SIZE) -> int:
+        """Store up to ``count`` dead-lettered conflicts and remove them from the stream."""
+
+        client = self._redis()
+        entries = client.xrange(DEAD_LETTER_STREAM, count=count)
+        if not entries:
+            return 0
+        self._write([json.loads(fields["conflict"]) for _, fields in entries])
+        client.xdel(DEAD_LETTER_STREAM, *[entry_id for entry_id, _ in entries])
+        return len(entries)
+
+    def _redis(self) -> redis.Redis:
+        if self._redis_client is None:
+            self._redis_client = redis.Redis.from_url(self._redis_url, decode_responses=True)
+        return self._redis_client
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        """Bulk insert a batch of conflicts and add it to the current digest."""
+
+        with db_manager.session_scope("mysql") as session:
+            session.execute(insert(ConflictRecord.__table__), rows)
+
+        logger.info("Conflicts persisted", count=len(rows))
+        with self._digest_lock:
+            for row in rows:
+                key = (row["table_name"], row["target"])
+                digest = self._digest.setdefault(key, ConflictDigest())
+                digest.count += 1
+                digest.sources.add(row["source"])
+                if len(digest.record_ids) < SAMPLE_RECORDS:
+                    digest.record_ids.append(row["record_id"])
+
+    def _digest_loop(self) -> None:
+        while not self._stop.wait(self._digest_interval):
+            self._retry_dead_letters()
+            self._send_digest()
+
+    def _retry_dead_letters(self) -> None:
+        """Give dead-lettered conflicts another chance once per digest window."""
+
+        try:
+            while self.replay_dead_letters() == BATCH_SIZE:
+                pass
+        except Exception as exc:
+            logger.warning("Dead-lettered sync conflicts not replayed yet", error=str(exc))
+
+    def _send_digest(self) -> None:
+        with self._digest_lock:
+            digest, self._digest = self._digest, {}
+        if not digest:
+            return
+
+        total = sum(group.count for group in digest.values())
+        lines = [
+            "数据库同步冲突汇总",
+            f"时间: {datetime.now(timezone.utc).isoformat()}",
+            f"冲突总数: {total}",
+            "",
+        ]
+        for (table, target), group in sorted(digest.items()):
+            lines.append(
+                f"表: {table}  目标: {target}  来源: {', '.join(sorted(group.sources))}  "
+                f"数量: {group.count}"
+            )
+            lines.append(f"  记录示例: {', '.join(group.record_ids)}")
+        lines.append("")
+        lines.append("请登录管理端处理。")
+        subject = f"Sync conflicts detected: {total} in {len(digest)} table/target groups"
+        email_notifier.send(subject, "\n".join(lines))
+
+
+conflict_recorder = ConflictRecorder()
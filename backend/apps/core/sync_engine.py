@@ -2,20 +2,39 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+import os
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import Any, Dict, Iterable, Optional
+from functools import partial
+from threading import Lock
+from typing import AbstractSet, Any, Callable, Dict, Iterable, List, Optional, Sequence
+from uuid import uuid4
 
 import redis
 from loguru import logger
+from redis.exceptions import RedisError, WatchError
 from sqlalchemy import select, text
+from sqlalchemy.orm import Session
 
-from apps.core.models import ConflictRecord, DailyStat, SyncConfig, SyncLog
-from apps.core.sync_payloads import decode_params
+from apps.core import sync_codec
+from apps.core.sync_breaker import (
+    PARKED_KEY,
+    TargetBreakers,
+    backlog_key,
+    is_connection_error,
+)
+from apps.core.models import DailyStat, SyncConfig, SyncLog
+from apps.core.sync_codec import StatementTemplate, TemplateRegistry, template_for
+from apps.core.sync_conflicts import conflict_recorder
+from apps.core.sync_metrics import read_sync_metrics
+from apps.core.sync_payloads import decode_params, encode_params
+from apps.core.sync_upsert import upsert_statement
 
 from .config import get_settings
 from .database import db_manager
-from apps.services.notifications import email_notifier
 
 
 @dataclass
@@ -29,6 +48,12 @@ class SyncEvent:
     occurred_at: datetime
     sync_version: int
     record_id: Optional[str] = None
+    # Events of one primary commit share a group ID; ``group_size`` counts the members
+    # published to the same stream, which replicas apply in a single transaction.
+    group_id: Optional[str] = None
+    group_size: int = 1
+    # Targets the writer already replicated to synchronously; workers skip them.
+    applied_targets: tuple[str, ...] = ()
 
     def as_message(self) -> Dict[str, Any]:
         """Serialize the event for Redis Streams."""
@@ -41,11 +66,58 @@ class SyncEvent:
             "occurred_at": self.occurred_at.isoformat(),
             "sync_version": self.sync_version,
             "record_id": self.record_id or "",
+            "group_id": self.group_id or "",
+            "group_size": self.group_size,
+            "applied_targets": ",".join(self.applied_targets),
+        }
+
+    def as_compact_message(self, template: StatementTemplate) -> Optional[Dict[str, Any]]:
+        """Serialize the event in the compact binary wire format.
+
+        Returns ``None`` when the params do not cover every bind of the template, in
+        which case callers fall back to :meth:`as_message`.
+        """
+
+        values = template.positional(decode_params(self.payload.get("params", {})))
+        if values is None:
+            return None
+        extra = {
+            key: value for key, value in self.payload.items() if key not in {"statement", "params"}
+        }
+        return {
+            "v": sync_codec.WIRE_VERSION,
+            "d": sync_codec.pack(
+                [
+                    self.table,
+                    self.action,
+                    self.origin,
+                    self.occurred_at,
+                    self.sync_version,
+                    self.record_id,
+                    template.template_id,
+                    values,
+                    extra or None,
+                    self.group_id,
+                    self.group_size,
+                    list(self.applied_targets),
+                ]
+            ),
         }
 
     @classmethod
-    def from_stream(cls, data: Dict[str, Any]) -> "SyncEvent":
-        """Instantiate a sync event from Redis stream payload."""
+    def from_stream(
+        cls, data: Dict[str, Any], templates: Optional[TemplateRegistry] = None
+    ) -> "SyncEvent":
+        """Instantiate a sync event from Redis stream payload.
+
+        Compact entries need ``templates`` to resolve their statement; legacy JSON
+        entries are decoded as before.
+        """
+
+        if data.get("v") == sync_codec.WIRE_VERSION:
+            if templates is None:
+                raise ValueError("Compact sync entries require a template registry")
+            return cls._from_compact(data["d"], templates)
 
         return cls(
             table=data["table"],
@@ -55,22 +127,274 @@ class SyncEvent:
             occurred_at=datetime.fromisoformat(data["occurred_at"]),
             sync_version=int(data["sync_version"]),
             record_id=(data.get("record_id") or None),
+            group_id=(data.get("group_id") or None),
+            group_size=int(data.get("group_size") or 1),
+            applied_targets=tuple(filter(None, data.get("applied_targets", "").split(","))),
+        )
+
+    @classmethod
+    def _from_compact(cls, raw: Any, templates: TemplateRegistry) -> "SyncEvent":
+        fields = sync_codec.unpack(raw)
+        template = templates.resolve(fields[6])
+        payload = dict(fields[8] or {})
+        payload["statement"] = template.sql
+        # Keep payload params in their JSON-safe form, as conflict records store them.
+        payload["params"] = encode_params(template.named(fields[7]))
+        return cls(
+            table=fields[0],
+            action=fields[1],
+            payload=payload,
+            origin=fields[2],
+            occurred_at=fields[3],
+            sync_version=int(fields[4]),
+            record_id=fields[5] or None,
+            group_id=fields[9] if len(fields) > 9 else None,
+            group_size=int(fields[10]) if len(fields) > 10 else 1,
+            applied_targets=tuple(fields[11]) if len(fields) > 11 else (),
         )
 
 
+@dataclass
+class ReplicationResult:
+    """Outcome of applying one sync event to a single target database."""
+
+    target: str
+    rowcount: int = 0
+    conflict: bool = False
+    error: Optional[str] = None
+    # Appended to the target's backlog while its circuit is open; applied on drain.
+    parked: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Whether the target applied the event without raising."""
+
+        return self.error is None
+
+
+class ReplicationError(RuntimeError):
+    """Raised when at least one target failed to apply a sync event."""
+
+    def __init__(self, event: SyncEvent, results: Dict[str, ReplicationResult]) -> None:
+        failed = sorted(target for target, result in results.items() if not result.ok)
+        super().__init__(f"Replication of {event.table} failed on: {', '.join(failed)}")
+        self.event = event
+        self.results = results
+
+
+@dataclass
+class _Stragglers:
+    """Targets still applying an event after a quorum replication returned."""
+
+    results: Dict[str, ReplicationResult]
+    remaining: int
+    on_settled: Optional[Callable[[Dict[str, ReplicationResult]], None]]
+    lock: Lock = field(default_factory=Lock)
+
+    def add(self, result: ReplicationResult) -> Optional[Dict[str, ReplicationResult]]:
+        """Record a finished target; returns every result once the last one reported."""
+
+        with self.lock:
+            self.results[result.target] = result
+            self.remaining -= 1
+            return dict(self.results) if self.remaining == 0 else None
+
+
+class CoalescedRowcountMismatch(RuntimeError):
+    """Raised when a coalesced UPDATE/DELETE run did not touch every row."""
+
+
+def _group_units(events: Sequence[SyncEvent], indexes: List[int]) -> List[List[int]]:
+    """Split indexes into units that must commit together.
+
+    Events of one commit group form a single unit placed at its first member; every
+    other event is a unit of its own.
+    """
+
+    units: List[List[int]] = []
+    groups: Dict[str, List[int]] = {}
+    for index in indexes:
+        group_id = events[index].group_id
+        if group_id is None:
+            units.append([index])
+            continue
+        unit = groups.get(group_id)
+        if unit is None:
+            unit = groups[group_id] = []
+            units.append(unit)
+        unit.append(index)
+    return units
+
+
+def _target_statement(session: Session, event: SyncEvent) -> str:
+    """Return the SQL to run on a target; inserts become version-guarded upserts."""
+
+    statement = event.payload["statement"]
+    if event.action != "insert":
+        return statement
+    return upsert_statement(statement, session.get_bind().dialect.name)
+
+
+def _statement_runs(events: Sequence[SyncEvent], indexes: List[int]) -> List[List[int]]:
+    """Split indexes into runs of consecutive events sharing action and statement text."""
+
+    runs: List[List[int]] = []
+    previous_key: Optional[tuple[str, str]] = None
+    for index in indexes:
+        event = events[index]
+        key = (event.action, event.payload["statement"])
+        if runs and key == previous_key:
+            runs[-1].append(index)
+        else:
+            runs.append([index])
+        previous_key = key
+    return runs
+
+
+# Drain locks expire if the draining process dies; renewed after every batch.
+DRAIN_LOCK_MS = 60_000
+# Priority lanes in read order, with each lane's share of a worker read round.
+LANE_WEIGHTS: Dict[str, int] = {"critical": 4, "normal": 2, "bulk": 1}
+DEFAULT_LANE = "normal"
+# Targets a quorum write reached after its event was already published, per entry.
+LATE_APPLIED_KEY = "campuswap:sync:late-applied"
+LATE_APPLIED_TTL_SECONDS = 24 * 3600
+
+
+def late_applied_key(stream_key: str, entry_id: str) -> str:
+    """Return the key listing targets that applied a published entry on their own."""
+
+    return f"{LATE_APPLIED_KEY}:{stream_key}:{entry_id}"
+
+
 class SyncEngine:
     """Fan-out database events to peer databases with optimistic locking."""
 
     def __init__(self) -> None:
         settings = get_settings()
-        self._redis = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+        # surrogateescape lets binary wire-format fields survive decode_responses.
+        self._redis = redis.Redis.from_url(
+            settings.redis_url, decode_responses=True, encoding_errors="surrogateescape"
+        )
         self._stream_key = "campuswap:sync:events"
+        self._wire_format = settings.sync_wire_format
+        self._templates = TemplateRegistry(self._redis)
+        self._shards = max(1, settings.sync_stream_shards)
+        self._priority_lanes = settings.sync_priority_lanes
+        self._table_lanes: Optional[Dict[str, str]] = None
+        self._stream_maxlen = settings.sync_stream_maxlen
+        self._stream_retention_seconds = settings.sync_stream_retention_seconds
+        self._parallel = settings.sync_parallel_replication
+        self.breakers = TargetBreakers(
+            self._redis,
+            failure_threshold=settings.sync_breaker_failures,
+            reset_timeout=settings.sync_breaker_reset_seconds,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.sync_replication_workers),
+            thread_name_prefix="sync-replicate",
+        )
 
-    def publish_event(self, event: SyncEvent) -> None:
-        """Push a sync event into Redis stream."""
+    def publish_event(self, event: SyncEvent) -> str:
+        """Push a sync event into Redis stream and return its entry ID."""
 
-        message_id = self._redis.xadd(self._stream_key, event.as_message())
+        message_id = self.publish_events([event])[0]
         logger.info("Sync event published", message_id=message_id, table=event.table)
+        return message_id
+
+    def record_late_applied(self, stream_key: str, entry_id: str, targets: Iterable[str]) -> None:
+        """Tell workers that ``targets`` applied a published entry after it was published.
+
+        Workers skip those targets when they pick the entry up. The note expires on its
+        own in case the entry was already processed.
+        """
+
+        self._redis.set(
+            late_applied_key(stream_key, entry_id),
+            json.dumps(sorted(targets)),
+            ex=LATE_APPLIED_TTL_SECONDS,
+        )
+
+    def publish_events(self, events: Sequence[SyncEvent]) -> List[str]:
+        """Push several sync events to Redis in a single pipelined round trip."""
+
+        if not events:
+            return []
+
+        self._assign_group_sizes(events)
+        message_ids = self._append_events(events, self.stream_key_for, self._trim_options())
+        logger.info(
+            "Sync events published",
+            count=len(message_ids),
+            first_id=message_ids[0],
+            last_id=message_ids[-1],
+        )
+        return message_ids
+
+    def _append_events(
+        self,
+        events: Sequence[SyncEvent],
+        key_for: Callable[[SyncEvent], str],
+        trim_options: Dict[str, Any],
+    ) -> List[str]:
+        """XADD encoded events in one pipeline, registering new statement templates."""
+
+        messages, templates = self._encode_messages(events)
+        pipeline = self._redis.pipeline(transaction=False)
+        staged = self._templates.stage(pipeline, templates)
+        for event, message in zip(events, messages):
+            pipeline.xadd(key_for(event), message, **trim_options)
+        message_ids = pipeline.execute()[len(staged):]
+        self._templates.mark_registered(staged)
+        return message_ids
+
+    def _assign_group_sizes(self, events: Sequence[SyncEvent]) -> None:
+        """Set each grouped event's size to its group's member count on its stream."""
+
+        sizes: Dict[tuple[str, str], int] = {}
+        for event in events:
+            if event.group_id:
+                key = (event.group_id, self.stream_key_for(event))
+                sizes[key] = sizes.get(key, 0) + 1
+        for event in events:
+            if event.group_id:
+                event.group_size = sizes[(event.group_id, self.stream_key_for(event))]
+
+    def decode_event(self, data: Dict[str, Any]) -> SyncEvent:
+        """Decode a stream entry in either wire format."""
+
+        return SyncEvent.from_stream(data, self._templates)
+
+    def _encode_messages(
+        self, events: Sequence[SyncEvent]
+    ) -> tuple[List[Dict[str, Any]], List[StatementTemplate]]:
+        """Encode events in the configured wire format, collecting used templates."""
+
+        messages: List[Dict[str, Any]] = []
+        templates: List[StatementTemplate] = []
+        for event in events:
+            message = None
+            if self._wire_format == "compact":
+                template = template_for(event.payload["statement"])
+                message = event.as_compact_message(template)
+                if message is not None:
+                    templates.append(template)
+            messages.append(message or event.as_message())
+        return messages, templates
+
+    def _trim_options(self) -> Dict[str, Any]:
+        """Build approximate XADD trimming arguments from settings.
+
+        A retention window trims by MINID and takes precedence over MAXLEN; both use
+        ``~`` so Redis only drops whole macro nodes and trimming stays cheap.
+        """
+
+        if self._stream_retention_seconds:
+            min_ms = int(time.time() * 1000) - self._stream_retention_seconds * 1000
+            return {"minid": f"{min_ms}-0", "approximate": True}
+        if self._stream_maxlen:
+            return {"maxlen": self._stream_maxlen, "approximate": True}
+        return {}
 
     @property
     def stream_key(self) -> str:
@@ -78,57 +402,585 @@ class SyncEngine:
 
         return self._stream_key
 
+    @property
+    def shard_count(self) -> int:
+        """Number of stream partitions events are spread across."""
+
+        return self._shards
+
+    @property
+    def lanes(self) -> List[str]:
+        """Priority lanes workers consume, most critical first.
+
+        Workers read every lane even while ``SYNC_PRIORITY_LANES`` is off, so publishing
+        into lanes can be switched on once all workers run this code.
+        """
+
+        return list(LANE_WEIGHTS)
+
+    @property
+    def stream_keys(self) -> List[str]:
+        """Every stream key a full set of workers has to consume, most critical first."""
+
+        return [
+            self.shard_stream_key(shard, lane)
+            for lane in self.lanes
+            for shard in range(self._shards)
+        ]
+
+    def lane_for(self, event: SyncEvent) -> str:
+        """Return the priority lane of an event's table.
+
+        Lanes come from ``DatabaseSyncManager.SYNC_TABLE_PRIORITIES``; all events of a
+        table share one lane, so per-record ordering is unaffected.
+        """
+
+        if not self._priority_lanes:
+            return DEFAULT_LANE
+        if self._table_lanes is None:
+            self.validate_lanes()
+        return self._table_lanes.get(event.table, DEFAULT_LANE)
+
+    def validate_lanes(self) -> Dict[str, str]:
+        """Check ``SYNC_TABLE_PRIORITIES`` against the schema and return the table lanes.
+
+        Raises ``ValueError`` for a lane that does not exist or a table no model maps, so
+        a misspelt key fails at startup instead of silently routing to the normal lane.
+        """
+
+        from apps.core.models import Base  # avoid import cycle
+        from apps.services.sync_manager import DatabaseSyncManager
+
+        priorities = DatabaseSyncManager.SYNC_TABLE_PRIORITIES
+        unknown_lanes = sorted({lane for lane in priorities.values() if lane not in LANE_WEIGHTS})
+        unknown_tables = sorted(set(priorities) - set(Base.metadata.tables))
+        if unknown_lanes or unknown_tables:
+            raise ValueError(
+                "Invalid SYNC_TABLE_PRIORITIES: "
+                f"unknown lanes {unknown_lanes}, unknown tables {unknown_tables}"
+            )
+        self._table_lanes = dict(priorities)
+        return dict(priorities)
+
+    def lane_of(self, stream_key: str) -> str:
+        """Return the priority lane a stream key belongs to."""
+
+        lane = stream_key[len(self._stream_key) + 1:].split(":", 1)[0]
+        return lane if lane in LANE_WEIGHTS else DEFAULT_LANE
+
+    def shard_for(self, event: SyncEvent) -> int:
+        """Map an event to a partition by hashing ``(table, record_id)``.
+
+        All events of one record land on the same partition, which keeps them in order
+        while unrelated records can be consumed by different workers in parallel.
+        """
+
+        if self._shards == 1:
+            return 0
+        key = f"{event.table}:{event.record_id or ''}"
+        return zlib.crc32(key.encode("utf-8")) % self._shards
+
+    def shard_stream_key(self, shard: int, lane: str = DEFAULT_LANE) -> str:
+        """Return the stream key backing a partition of a lane.
+
+        The normal lane keeps the unprefixed keys, so it needs no stream migration.
+        """
+
+        key = self._stream_key if lane == DEFAULT_LANE else f"{self._stream_key}:{lane}"
+        if self._shards == 1:
+            return key
+        return f"{key}:{shard}"
+
+    def stream_key_for(self, event: SyncEvent) -> str:
+        """Return the stream an event is published to."""
+
+        return self.shard_stream_key(self.shard_for(event), self.lane_for(event))
+
     @property
     def redis_client(self) -> redis.Redis:
         """Provide direct access to the configured Redis client."""
 
         return self._redis
 
-    def replicate(self, event: SyncEvent, targets: Iterable[str]) -> None:
-        """Perform replication into target databases with optimistic locking."""
+    def replication_metrics(self) -> Dict[str, Any]:
+        """Return worker throughput, stream lag and per-target apply latency."""
 
-        for target in targets:
-            with db_manager.session_scope(target) as session:
-                statement = text(event.payload["statement"])
-                params = decode_params(event.payload.get("params", {}))
-                result = session.execute(statement, params)
-                if event.action in {"update", "delete"} and result.rowcount == 0:
+        group_name = os.getenv("SYNC_STREAM_GROUP", "campuswap-sync-group")
+        metrics = read_sync_metrics(self._redis, self.stream_keys, group_name)
+        try:
+            parked = self.breakers.parked_targets(refresh=True)
+            metrics["backlog"] = {
+                target: self._redis.xlen(backlog_key(target)) for target in sorted(parked)
+            }
+        except RedisError as exc:  # pragma: no cover - network failure
+            logger.warning("Failed to read sync backlogs", error=str(exc))
+        return metrics
+
+    def park_events(
+        self, target: str, events: Sequence[SyncEvent]
+    ) -> Optional[List[ReplicationResult]]:
+        """Append events to a parked target's backlog instead of applying them.
+
+        Parked results count as handled, so stream entries can be acknowledged; the
+        backlog drainer applies them once the target is back. The append only happens
+        while the target is still parked, checked atomically against the drainer's
+        release; ``None`` means it was released meanwhile and the caller applies the
+        events live.
+        """
+
+        messages, templates = self._encode_messages(events)
+        key = backlog_key(target)
+        try:
+            with self._redis.pipeline() as pipeline:
+                while True:
+                    try:
+                        pipeline.watch(PARKED_KEY)
+                        if not pipeline.sismember(PARKED_KEY, target):
+                            self.breakers.parked_targets(refresh=True)
+                            return None
+                        pipeline.multi()
+                        staged = self._templates.stage(pipeline, templates)
+                        for message in messages:
+                            pipeline.xadd(key, message)
+                        pipeline.execute()
+                        break
+                    except WatchError:
+                        continue
+        except RedisError as exc:
+            logger.exception("Failed to park sync events", target=target, error=str(exc))
+            return [
+                ReplicationResult(target=target, error=f"parking failed: {exc}") for _ in events
+            ]
+        self._templates.mark_registered(staged)
+        logger.info("Parked sync events", target=target, count=len(events))
+        return [ReplicationResult(target=target, parked=True) for _ in events]
+
+    def drain_backlogs(self, batch_size: int = 500) -> int:
+        """Drain the backlog of every parked target that may be probed again."""
+
+        drained = 0
+        for target in sorted(self.breakers.parked_targets(refresh=True)):
+            drained += self.drain_backlog(target, batch_size)
+        return drained
+
+    def drain_backlog(self, target: str, batch_size: int = 500) -> int:
+        """Apply a parked target's backlog in order and release the target when empty.
+
+        Batches go through the regular batch path (one transaction per batch, coalesced
+        statements). Commit groups are never cut by a batch. Events that fail for reasons
+        other than connectivity are recorded as conflicts and dropped from the backlog;
+        a connection failure stops the drain until the breaker allows another probe.
+        Only one process drains a given target at a time.
+        """
+
+        if not self.breakers.breaker(target).allow_probe():
+            return 0
+        key = backlog_key(target)
+        lock_key, token = f"{key}:lock", uuid4().hex
+        if not self._redis.set(lock_key, token, nx=True, px=DRAIN_LOCK_MS):
+            return 0
+
+        drained = 0
+        try:
+            while True:
+                entries = self._redis.xrange(key, count=batch_size)
+                if not entries:
+                    if self.breakers.release(target):
+                        return drained
+                    continue  # an event was parked while checking
+
+                events = [self.decode_event(data) for _, data in entries]
+                last = events[-1]
+                members = sum(1 for event in events if event.group_id == last.group_id)
+                if last.group_id and members < last.group_size:
+                    for entry_id, data in self._redis.xrange(
+                        key, min=f"({entries[-1][0]}", count=last.group_size - members
+                    ):
+                        event = self.decode_event(data)
+                        if event.group_id != last.group_id:
+                            break
+                        entries.append((entry_id, data))
+                        events.append(event)
+
+                outcome, stop = self._drain_batch(target, events)
+                for index, result in outcome.items():
+                    if result.conflict or not result.ok:
+                        self._record_conflict(events[index], target)
+                # Units are applied in order, so the settled entries form a prefix.
+                settled = [entry[0] for index, entry in enumerate(entries) if index in outcome]
+                if settled:
+                    self._redis.xdel(key, *settled)
+                    self._redis.pexpire(lock_key, DRAIN_LOCK_MS)
+                    drained += len(settled)
+                    logger.info("Drained sync backlog batch", target=target, events=len(settled))
+                if stop is not None:
                     logger.warning(
-                        "Sync conflict detected",
-                        table=event.table,
+                        "Backlog drain stopped, target still unavailable",
                         target=target,
-                        record_id=event.record_id,
+                        error=str(stop),
                     )
-                    self._record_conflict(event, target)
-                else:
-                    logger.info(
-                        "Replicated event",
-                        target=target,
-                        table=event.table,
-                        rowcount=result.rowcount,
+                    return drained
+                self.breakers.record_success(target)
+        finally:
+            if self._redis.get(lock_key) == token:
+                self._redis.delete(lock_key)
+
+    def _drain_batch(
+        self, target: str, events: List[SyncEvent]
+    ) -> tuple[Dict[int, ReplicationResult], Optional[BaseException]]:
+        """Apply a backlog batch, returning the settled results and any connection error.
+
+        Only a connection failure stops the drain. Any other error falls back to one
+        commit group at a time, so a bad event fails on its own and is dropped from the
+        backlog instead of blocking it.
+        """
+
+        indexes = list(range(len(events)))
+        try:
+            return self._apply_batch_to(target, events, indexes, park=False), None
+        except Exception as exc:
+            if is_connection_error(exc):
+                return {}, exc
+            logger.exception("Backlog batch failed, applying it group by group", target=target)
+
+        outcome: Dict[int, ReplicationResult] = {}
+        for unit in _group_units(events, indexes):
+            try:
+                outcome.update(
+                    self._apply_batch_to(target, events, unit, coalesce=False, park=False)
+                )
+            except Exception as exc:
+                if is_connection_error(exc):
+                    return outcome, exc
+                for index in unit:
+                    outcome[index] = ReplicationResult(target=target, error=str(exc))
+        return outcome, None
+
+    def replicate(
+        self,
+        event: SyncEvent,
+        targets: Iterable[str],
+        parallel: Optional[bool] = None,
+        required: Optional[int] = None,
+        on_settled: Optional[Callable[[Dict[str, ReplicationResult]], None]] = None,
+    ) -> Dict[str, ReplicationResult]:
+        """Perform replication into target databases with optimistic locking.
+
+        Targets are applied concurrently on the engine's executor unless ``parallel`` is
+        disabled, so the event costs the slowest round trip instead of their sum. Every
+        target is attempted; conflicts are recorded once all targets have reported and a
+        :class:`ReplicationError` carrying the per-target results is raised on failure.
+
+        With ``required`` the call returns as soon as that many targets succeeded and
+        only the results gathered so far are returned; the remaining targets finish in
+        the background. It raises only when fewer than ``required`` targets succeed.
+
+        ``on_settled`` receives the results of every target once all of them reported,
+        which may be after the call returned. Anything that depends on which targets
+        applied the event, e.g. publishing it for the rest, belongs there.
+        """
+
+        target_list = list(targets)
+        if parallel is None:
+            parallel = self._parallel
+        if required is not None:
+            required = min(required, len(target_list))
+
+        if parallel and len(target_list) > 1:
+            futures = {
+                self._executor.submit(self._replicate_to, event, target): target
+                for target in target_list
+            }
+            results: Dict[str, ReplicationResult] = {}
+            confirmed = 0
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                confirmed += result.ok and not result.parked
+                if required is not None and confirmed >= required:
+                    break
+            in_flight = [future for future in futures if futures[future] not in results]
+            if in_flight:
+                stragglers = _Stragglers(dict(results), len(in_flight), on_settled)
+                on_settled = None
+                for future in in_flight:
+                    future.add_done_callback(partial(self._finish_straggler, event, stragglers))
+        else:
+            results = {target: self._replicate_to(event, target) for target in target_list}
+
+        for result in results.values():
+            if result.conflict:
+                self._record_conflict(event, result.target)
+        if on_settled is not None:
+            on_settled(dict(results))
+
+        if required is None:
+            if any(not result.ok for result in results.values()):
+                raise ReplicationError(event, results)
+        elif sum(1 for result in results.values() if result.ok and not result.parked) < required:
+            raise ReplicationError(event, results)
+        return results
+
+    def _finish_straggler(
+        self, event: SyncEvent, stragglers: _Stragglers, future: "Future[ReplicationResult]"
+    ) -> None:
+        """Report a target that completed after a quorum replication had returned."""
+
+        result = future.result()
+        if result.conflict:
+            self._record_conflict(event, result.target)
+        settled = stragglers.add(result)
+        if settled is None or stragglers.on_settled is None:
+            return
+        try:
+            stragglers.on_settled(settled)
+        except Exception as exc:  # pragma: no cover - runs on an executor thread
+            logger.exception(
+                "Settling quorum replication failed",
+                table=event.table,
+                record_id=event.record_id,
+                error=str(exc),
+            )
+
+    def replicate_batch(
+        self,
+        events: Sequence[SyncEvent],
+        targets: Iterable[str],
+        parallel: Optional[bool] = None,
+        coalesce: bool = True,
+        skip_targets: Optional[Sequence[AbstractSet[str]]] = None,
+        record_conflicts: bool = True,
+    ) -> List[Dict[str, ReplicationResult]]:
+        """Apply a batch of events with a single transaction per target.
+
+        Every event is routed to each target except its own origin. Targets run
+        concurrently; inside a target the whole batch shares one commit, and a failing
+        transaction is bisected until the offending events are isolated so the rest
+        still apply in order. Events sharing a ``group_id`` are never split, so each
+        commit group commits or fails as a whole on a target. With ``coalesce``
+        consecutive events sharing a statement template are sent as one
+        ``executemany``. ``skip_targets`` lists, per event, targets that already applied
+        it on an earlier delivery. ``record_conflicts`` can be disabled for replays onto
+        a freshly copied replica, where stale updates are expected to match nothing.
+        Returns per-event results aligned with ``events``.
+        """
+
+        plan = {
+            target: [
+                index
+                for index, event in enumerate(events)
+                if event.origin != target
+                and (skip_targets is None or target not in skip_targets[index])
+            ]
+            for target in targets
+        }
+        plan = {target: indexes for target, indexes in plan.items() if indexes}
+        if parallel is None:
+            parallel = self._parallel
+
+        if parallel and len(plan) > 1:
+            futures = {
+                target: self._executor.submit(
+                    self._apply_batch_to, target, events, indexes, coalesce
+                )
+                for target, indexes in plan.items()
+            }
+            outcomes = {target: future.result() for target, future in futures.items()}
+        else:
+            outcomes = {
+                target: self._apply_batch_to(target, events, indexes, coalesce)
+                for target, indexes in plan.items()
+            }
+
+        results: List[Dict[str, ReplicationResult]] = [{} for _ in events]
+        for target, outcome in outcomes.items():
+            for index, result in outcome.items():
+                results[index][target] = result
+                if result.conflict and record_conflicts:
+                    self._record_conflict(events[index], target)
+        return results
+
+    def _apply_batch_to(
+        self,
+        target: str,
+        events: Sequence[SyncEvent],
+        indexes: List[int],
+        coalesce: bool = True,
+        park: bool = True,
+    ) -> Dict[int, ReplicationResult]:
+        """Apply the selected events to one target, splitting on failure.
+
+        While the target is parked the events go to its backlog. A connection failure
+        is not bisected: the remaining events fail (or are parked once the breaker
+        opens), and with ``park`` disabled the error is raised to the caller.
+        """
+
+        if park and self.breakers.parked(target):
+            parked = self.park_events(target, [events[i] for i in indexes])
+            if parked is not None:
+                return dict(zip(indexes, parked))
+
+        outcome: Dict[int, ReplicationResult] = {}
+        pending = [(_group_units(events, indexes), coalesce)]
+        while pending:
+            units, coalesce_chunk = pending.pop(0)
+            chunk = [index for unit in units for index in unit]
+            try:
+                with db_manager.session_scope(target) as session:
+                    chunk_results = self._apply_chunk(
+                        session, target, events, chunk, coalesce_chunk
                     )
+            except Exception as exc:
+                if is_connection_error(exc):
+                    self.breakers.record_failure(target, exc)
+                    if not park:
+                        raise
+                    rest = chunk + [i for units_, _ in pending for unit in units_ for i in unit]
+                    pending.clear()
+                    parked = None
+                    if self.breakers.parked(target):
+                        parked = self.park_events(target, [events[i] for i in rest])
+                    if parked is not None:
+                        outcome.update(zip(rest, parked))
+                    else:
+                        logger.warning("Target unavailable", target=target, error=str(exc))
+                        for index in rest:
+                            outcome[index] = ReplicationResult(target=target, error=str(exc))
+                    continue
+                if len(units) > 1:
+                    middle = len(units) // 2
+                    pending[:0] = [
+                        (units[:middle], coalesce_chunk),
+                        (units[middle:], coalesce_chunk),
+                    ]
+                    continue
+                if coalesce_chunk and isinstance(exc, CoalescedRowcountMismatch):
+                    # One commit group cannot be split; replay it statement by statement
+                    # so the conflicting events are pinpointed inside one transaction.
+                    pending.insert(0, (units, False))
+                    continue
+                event = events[chunk[0]]
+                logger.exception(
+                    "Replication failed",
+                    target=target,
+                    table=event.table,
+                    record_id=event.record_id,
+                    group_id=event.group_id,
+                    events=len(chunk),
+                    error=str(exc),
+                )
+                for index in chunk:
+                    outcome[index] = ReplicationResult(target=target, error=str(exc))
+                continue
 
-    def _record_conflict(self, event: SyncEvent, target: str) -> None:
-        """Persist conflict information for manual resolution."""
+            outcome.update(chunk_results)
+            self.breakers.record_success(target)
+            logger.info("Replicated batch", target=target, events=len(chunk))
+        return outcome
 
-        with db_manager.session_scope("mysql") as session:
-            record = ConflictRecord(
-                table_name=event.table,
-                record_id=event.record_id or str(event.payload.get("record_id", "unknown")),
-                source=event.origin,
+    def _apply_chunk(
+        self,
+        session: Session,
+        target: str,
+        events: Sequence[SyncEvent],
+        chunk: List[int],
+        coalesce: bool,
+    ) -> Dict[int, ReplicationResult]:
+        """Apply a chunk of events in an open session, coalescing identical statements."""
+
+        # Guarded UPDATE/DELETE runs are only batched when the driver reports a reliable
+        # total rowcount for executemany, otherwise conflicts could go unnoticed.
+        sane_rowcount = session.get_bind().dialect.supports_sane_multi_rowcount
+        results: Dict[int, ReplicationResult] = {}
+        for run in _statement_runs(events, chunk) if coalesce else ([index] for index in chunk):
+            action = events[run[0]].action
+            if len(run) > 1 and (action == "insert" or sane_rowcount):
+                results.update(self._apply_many(session, target, events, run))
+            else:
+                for index in run:
+                    results[index] = self._apply_event(session, events[index], target)
+        return results
+
+    def _apply_many(
+        self, session: Session, target: str, events: Sequence[SyncEvent], run: List[int]
+    ) -> Dict[int, ReplicationResult]:
+        """Send a run of events sharing one statement as a single executemany."""
+
+        first = events[run[0]]
+        params = [decode_params(events[index].payload.get("params", {})) for index in run]
+        rowcount = session.execute(text(_target_statement(session, first)), params).rowcount
+        if first.action in {"update", "delete"} and rowcount != len(run):
+            # Roll the chunk back so bisection replays these events one by one and
+            # pinpoints which of them conflicted.
+            raise CoalescedRowcountMismatch(
+                f"{first.action} on {first.table} matched {rowcount} of {len(run)} rows"
+            )
+        logger.debug("Coalesced statement run", target=target, table=first.table, size=len(run))
+        return {index: ReplicationResult(target=target, rowcount=1) for index in run}
+
+    def _replicate_to(self, event: SyncEvent, target: str) -> ReplicationResult:
+        """Apply a single event to one target inside its own transaction."""
+
+        if self.breakers.parked(target):
+            parked = self.park_events(target, [event])
+            if parked is not None:
+                return parked[0]
+        try:
+            with db_manager.session_scope(target) as session:
+                result = self._apply_event(session, event, target)
+        except Exception as exc:
+            self.breakers.record_failure(target, exc)
+            parked = self.park_events(target, [event]) if self.breakers.parked(target) else None
+            if parked is not None:
+                return parked[0]
+            logger.exception(
+                "Replication failed",
                 target=target,
-                payload=event.payload,
+                table=event.table,
+                record_id=event.record_id,
+                error=str(exc),
             )
-            session.add(record)
-            session.flush()
-            logger.info("Conflict persisted", conflict_id=record.id)
-            subject = f"Sync conflict detected on {event.table}"
-            body = (
-                "数据库同步冲突提醒\n\n"
-                f"表: {event.table}\n来源: {event.origin}\n目标: {target}\n记录: {record.record_id}\n"
-                "请登录管理端处理。"
+            return ReplicationResult(target=target, error=str(exc))
+
+        self.breakers.record_success(target)
+        logger.info(
+            "Replicated event",
+            target=target,
+            table=event.table,
+            rowcount=result.rowcount,
+        )
+        return result
+
+    def _apply_event(self, session: Session, event: SyncEvent, target: str) -> ReplicationResult:
+        """Execute an event's statement in an open target session."""
+
+        statement = text(_target_statement(session, event))
+        params = decode_params(event.payload.get("params", {}))
+        rowcount = session.execute(statement, params).rowcount
+        if event.action in {"update", "delete"} and rowcount == 0:
+            logger.warning(
+                "Sync conflict detected",
+                table=event.table,
+                target=target,
+                record_id=event.record_id,
             )
-            email_notifier.send(subject, body)
+            return ReplicationResult(target=target, rowcount=rowcount, conflict=True)
+        return ReplicationResult(target=target, rowcount=rowcount)
+
+    def _record_conflict(self, event: SyncEvent, target: str) -> None:
+        """Queue conflict information for manual resolution.
+
+        Conflicts are persisted in bulk and e-mailed as periodic digests by
+        :data:`apps.core.sync_conflicts.conflict_recorder`, off the replication path.
+        """
+
+        conflict_recorder.record(
+            table=event.table,
+            record_id=event.record_id or str(event.payload.get("record_id", "unknown")),
+            source=event.origin,
+            target=target,
+            payload=event.payload,
+        )
 
     def run_periodic_sync(self) -> None:
         """Run scheduled sync verification tasks and update stats."""
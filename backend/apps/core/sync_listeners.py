@@ -5,15 +5,23 @@ from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
+from uuid import uuid4
 
 from loguru import logger
-from sqlalchemy import event, inspect
-from sqlalchemy.orm import Session, class_mapper, sessionmaker
+from sqlalchemy import Column, event, insert, inspect
+from sqlalchemy.orm import Mapper, Session, sessionmaker
 from sqlalchemy.orm.state import InstanceState
 
+from apps.core.config import get_settings
+from apps.core.models import SyncOutbox
 from apps.core.sync_payloads import encode_params
 
 META_COLUMNS = {"created_at", "updated_at", "sync_version"}
+# Always part of an update event, so targets advance version and timestamp.
+UPDATE_META_COLUMNS = {"updated_at", "sync_version"}
+
+# Per-mapper ``(attribute key, column name)`` pairs used to snapshot row images.
+_ROW_COLUMNS: Dict[Mapper[Any], tuple[tuple[str, str], ...]] = {}
 
 
 @dataclass
@@ -26,6 +34,7 @@ class PendingSyncMutation:
     primary_key: Dict[str, Any]
     record_id: str
     previous_version: Optional[int]
+    row_data: Optional[Dict[str, Any]] = None
 
 
 def register_sync_listeners(factory: sessionmaker[Session]) -> None:
@@ -33,10 +42,22 @@ def register_sync_listeners(factory: sessionmaker[Session]) -> None:
 
     event.listen(factory, "before_flush", _before_flush)
     event.listen(factory, "after_flush", _after_flush)
+    event.listen(factory, "before_commit", _before_commit)
     event.listen(factory, "after_commit", _after_commit)
     event.listen(factory, "after_rollback", _after_rollback)
 
 
+def queue_sync_event(session: Session, sync_event: Any) -> None:
+    """Publish a hand-built :class:`SyncEvent` together with the session's commit.
+
+    For statements executed outside the ORM. The event goes through the outbox or is
+    published after commit exactly like captured ORM mutations, and is dropped on
+    rollback.
+    """
+
+    session.info.setdefault("queued_sync_events", []).append(sync_event)
+
+
 def _before_flush(session: Session, _flush_context: Any, _instances: Any) -> None:
     if not _is_primary_session(session):
         return
@@ -48,6 +69,7 @@ def _before_flush(session: Session, _flush_context: Any, _instances: Any) -> Non
             continue
         _initialize_new_object(obj, now)
 
+    versioned = _versioned_records(session)
     for obj in list(session.dirty):
         if not _is_tracked_object(obj):
             continue
@@ -55,7 +77,9 @@ def _before_flush(session: Session, _flush_context: Any, _instances: Any) -> Non
         if state.deleted or not _has_meaningful_changes(state):
             continue
         _touch_updated(obj, now)
-        _increment_version(obj, state)
+        key = _version_key(state)
+        if key is not None and key not in versioned:
+            versioned[key] = _increment_version(obj)
 
 
 def _after_flush(session: Session, _flush_context: Any) -> None:
@@ -63,48 +87,169 @@ def _after_flush(session: Session, _flush_context: Any) -> None:
         return
 
     pending = session.info.setdefault("pending_sync_events", [])
-    pending.extend(_collect_mutations(session))
+    mutations = _collect_mutations(session)
+    versioned = _versioned_records(session)
+    for mutation in mutations:
+        if mutation.action == "insert":
+            # A row inserted in this transaction keeps its initial version until commit.
+            versioned.setdefault((mutation.table_name, mutation.record_id), None)
+    _merge_mutations(pending, mutations)
+
+
+def _before_commit(session: Session) -> None:
+    if not _is_primary_session(session) or not get_settings().sync_outbox_enabled:
+        return
+
+    # Flush now so the mutations of the commit's final flush land in the outbox too.
+    session.flush()
+    pending: List[Optional[PendingSyncMutation]] = session.info.pop("pending_sync_events", [])
+    ready_events = _build_ready_events(session, pending)
+    ready_events.extend(_queued_payloads(session.info.pop("queued_sync_events", [])))
+    if ready_events:
+        _write_outbox(session, session.info.get("db_name", "mysql"), ready_events)
 
 
 def _after_commit(session: Session) -> None:
+    _reset_versioned_records(session)
     if not _is_primary_session(session):
         session.info.pop("pending_sync_events", None)
+        session.info.pop("queued_sync_events", None)
         return
 
-    pending: List[PendingSyncMutation] = session.info.pop("pending_sync_events", [])
-    if not pending:
+    pending: List[Optional[PendingSyncMutation]] = session.info.pop("pending_sync_events", [])
+    ready_events = _build_ready_events(session, pending)
+    ready_events.extend(_queued_payloads(session.info.pop("queued_sync_events", [])))
+    if not ready_events:
         return
 
+    _publish_events(session.info.get("db_name", "mysql"), ready_events)
+
+
+def _after_rollback(session: Session) -> None:
+    _reset_versioned_records(session)
+    session.info.pop("pending_sync_events", None)
+    session.info.pop("queued_sync_events", None)
+
+
+def _queued_payloads(sync_events: List[Any]) -> List[Dict[str, Any]]:
+    """Convert queued SyncEvents into the payload form built for ORM mutations."""
+
+    return [
+        {
+            "table": sync_event.table,
+            "action": sync_event.action,
+            "record_id": sync_event.record_id,
+            "sync_version": sync_event.sync_version,
+            "statement": sync_event.payload["statement"],
+            "params": encode_params(sync_event.payload.get("params", {})),
+        }
+        for sync_event in sync_events
+    ]
+
+
+def _merge_mutations(
+    pending: List[Optional[PendingSyncMutation]], mutations: List[PendingSyncMutation]
+) -> None:
+    """Fold the mutations of a flush into the transaction's pending ones.
+
+    A record flushed several times in one transaction (autoflush, then commit) yields
+    a single mutation: its version was bumped once, so replicas must see one event
+    carrying every changed column with its final value, guarded by the version the
+    record had before the transaction. An insert absorbs later updates and keeps its
+    place; merged updates and deletes move to the latest flush, after anything they
+    may now reference. A record inserted and deleted again produces nothing. Replaced
+    entries become ``None`` so positions stay stable.
+    """
+
+    latest = {
+        (mutation.table_name, mutation.record_id): position
+        for position, mutation in enumerate(pending)
+        if mutation is not None
+    }
+    for mutation in mutations:
+        key = (mutation.table_name, mutation.record_id)
+        position = latest.get(key)
+        previous = pending[position] if position is not None else None
+        if previous is not None and previous.action != "delete":
+            pending[position] = None
+            if mutation.action == "delete":
+                if previous.action == "insert":
+                    del latest[key]
+                    continue
+                mutation.previous_version = previous.previous_version
+            else:
+                previous.row_data = {**(previous.row_data or {}), **(mutation.row_data or {})}
+                if previous.action == "insert":
+                    pending[position] = previous
+                    continue
+                mutation = previous
+        latest[key] = len(pending)
+        pending.append(mutation)
+
+
+def _build_ready_events(
+    session: Session, pending: List[Optional[PendingSyncMutation]]
+) -> List[Dict[str, Any]]:
     ready_events: List[Dict[str, Any]] = []
     for mutation in pending:
+        if mutation is None:
+            continue
         payload = _build_sql_payload(session, mutation)
         if payload is not None:
             ready_events.append(payload)
+    return ready_events
 
-    if not ready_events:
-        return
 
-    _publish_events(session.info.get("db_name", "mysql"), ready_events)
+def _commit_group_id(events: List[Dict[str, Any]]) -> Optional[str]:
+    """Tag events of a multi-row commit so replicas apply them in one transaction.
 
+    Mutations are merged per record before this point, so a group holds at most one
+    ORM event per record and its size counts records, not flushes.
+    """
+
+    return uuid4().hex if len(events) > 1 else None
 
-def _after_rollback(session: Session) -> None:
-    session.info.pop("pending_sync_events", None)
+
+def _write_outbox(session: Session, origin: str, events: List[Dict[str, Any]]) -> None:
+    occurred_at = datetime.now(timezone.utc)
+    group_id = _commit_group_id(events)
+    session.execute(
+        insert(SyncOutbox.__table__),
+        [
+            {
+                "table_name": payload["table"],
+                "action": payload["action"],
+                "record_id": payload["record_id"],
+                "origin": origin,
+                "sync_version": payload["sync_version"],
+                "payload": {"statement": payload["statement"], "params": payload["params"]},
+                "occurred_at": occurred_at,
+                "group_id": group_id,
+            }
+            for payload in events
+        ],
+    )
 
 
 def _publish_events(origin: str, events: List[Dict[str, Any]]) -> None:
     from apps.core.sync_engine import SyncEvent, sync_engine
 
-    for payload in events:
-        sync_event = SyncEvent(
+    occurred_at = datetime.now(timezone.utc)
+    group_id = _commit_group_id(events)
+    sync_events = [
+        SyncEvent(
             table=payload["table"],
             action=payload["action"],
             payload={"statement": payload["statement"], "params": payload["params"]},
             origin=origin,
-            occurred_at=datetime.now(timezone.utc),
+            occurred_at=occurred_at,
             sync_version=payload["sync_version"],
             record_id=payload["record_id"],
+            group_id=group_id,
         )
-        sync_engine.publish_event(sync_event)
+        for payload in events
+    ]
+    sync_engine.publish_events(sync_events)
 
 
 def _collect_mutations(session: Session) -> List[PendingSyncMutation]:
@@ -125,6 +270,7 @@ def _collect_mutations(session: Session) -> List[PendingSyncMutation]:
                 primary_key=pk,
                 record_id=_record_id(pk),
                 previous_version=None,
+                row_data=_snapshot_row(state),
             )
         )
 
@@ -137,7 +283,7 @@ def _collect_mutations(session: Session) -> List[PendingSyncMutation]:
         pk = _extract_primary_key(state)
         if not pk:
             continue
-        previous_version = state.info.get("previous_sync_version")
+        previous_version = _versioned_records(session).get(_version_key(state))
         mutations.append(
             PendingSyncMutation(
                 action="update",
@@ -146,6 +292,7 @@ def _collect_mutations(session: Session) -> List[PendingSyncMutation]:
                 primary_key=pk,
                 record_id=_record_id(pk),
                 previous_version=previous_version,
+                row_data=_snapshot_row(state, _changed_keys(state) | UPDATE_META_COLUMNS),
             )
         )
 
@@ -172,24 +319,21 @@ def _collect_mutations(session: Session) -> List[PendingSyncMutation]:
 
 
 def _build_sql_payload(session: Session, mutation: PendingSyncMutation) -> Optional[Dict[str, Any]]:
-    mapper = class_mapper(mutation.model_class)
-
     if mutation.action == "delete":
         statement, params = _compose_delete_statement(
             mutation.table_name, mutation.primary_key, mutation.previous_version
         )
         sync_version = mutation.previous_version or 0
     else:
-        instance = session.get(mutation.model_class, _identity_from_pk(mapper, mutation.primary_key))
-        if instance is None:
+        row_data = mutation.row_data
+        if not row_data:
             logger.warning(
-                "Skipped sync mutation because row no longer exists",
+                "Skipped sync mutation without a row image",
                 table=mutation.table_name,
                 action=mutation.action,
                 record_id=mutation.record_id,
             )
             return None
-        row_data = _serialize_instance(mapper, instance)
         if mutation.action == "insert":
             statement, params = _compose_insert_statement(mutation.table_name, row_data)
         else:
@@ -275,23 +419,46 @@ def _touch_updated(obj: Any, now: datetime) -> None:
         setattr(obj, "updated_at", now)
 
 
-def _increment_version(obj: Any, state: InstanceState[Any]) -> None:
-    if state.info.get("sync_version_incremented"):
-        return
+def _increment_version(obj: Any) -> int:
+    """Bump the version and return the one it replaced."""
+
     current_version = getattr(obj, "sync_version", 1) or 1
-    state.info["previous_sync_version"] = current_version
     setattr(obj, "sync_version", current_version + 1)
-    state.info["sync_version_incremented"] = True
+    return current_version
+
+
+def _versioned_records(session: Session) -> Dict[tuple[str, str], Optional[int]]:
+    """Records whose version this transaction already set, with the version they replaced.
+
+    Keyed by ``(table, record_id)`` rather than kept on the instance state, which is lost
+    when the identity map drops an unreferenced object and a later ``get`` reloads it.
+    Inserted records map to ``None``.
+    """
+
+    return session.info.setdefault("versioned_records", {})
+
+
+def _version_key(state: InstanceState[Any]) -> Optional[tuple[str, str]]:
+    pk = _extract_primary_key(state)
+    return (_table_name(state), _record_id(pk)) if pk else None
+
+
+def _reset_versioned_records(session: Session) -> None:
+    """Let the next transaction bump the versions of this transaction's records again."""
+
+    session.info.pop("versioned_records", None)
 
 
 def _has_meaningful_changes(state: InstanceState[Any]) -> bool:
-    for attr in state.mapper.column_attrs:
-        if attr.key in META_COLUMNS:
-            continue
-        history = state.attrs[attr.key].history
-        if history.has_changes():
-            return True
-    return False
+    return bool(_changed_keys(state) - META_COLUMNS)
+
+
+def _changed_keys(state: InstanceState[Any]) -> set[str]:
+    return {
+        attr.key
+        for attr in state.mapper.column_attrs
+        if state.attrs[attr.key].history.has_changes()
+    }
 
 
 def _is_tracked_object(obj: Any) -> bool:
@@ -326,16 +493,32 @@ def _current_version(state: InstanceState[Any]) -> Optional[int]:
     return state.attrs["sync_version"].value
 
 
-def _identity_from_pk(mapper, primary_key: Dict[str, Any]):
-    identity = tuple(primary_key[column.key] for column in mapper.primary_key)
-    return identity[0] if len(identity) == 1 else identity
+def _row_columns(mapper: Mapper[Any]) -> tuple[tuple[str, str], ...]:
+    columns = _ROW_COLUMNS.get(mapper)
+    if columns is None:
+        columns = tuple(
+            (prop.key, prop.columns[0].name)
+            for prop in mapper.column_attrs
+            if isinstance(prop.columns[0], Column)
+        )
+        _ROW_COLUMNS[mapper] = columns
+    return columns
+
+
+def _snapshot_row(state: InstanceState[Any], keys: Optional[set[str]] = None) -> Dict[str, Any]:
+    """Copy the flushed column values of an instance without touching the database.
 
+    ``keys`` limits the snapshot to those attributes, e.g. the ones an update changed.
+    Columns that are not loaded (deferred, or expired server-generated values) are left
+    out, so targets keep their own value or server default for them.
+    """
 
-def _serialize_instance(mapper, instance: Any) -> Dict[str, Any]:
-    values: Dict[str, Any] = {}
-    for column in mapper.columns:
-        values[column.key] = getattr(instance, column.key)
-    return values
+    loaded = state.dict
+    return {
+        column: loaded[key]
+        for key, column in _row_columns(state.mapper)
+        if key in loaded and (keys is None or key in keys)
+    }
 
 
 def _table_name(state: InstanceState[Any]) -> str:
@@ -0,0 +1,239 @@
+"""Replication metrics shared between sync workers and the admin APIs.
+
+Each worker process keeps cumulative apply-latency histograms per target and
+periodically writes a snapshot to Redis under its consumer name. Readers merge the
+snapshots of all live workers and add stream lag from XINFO/XPENDING.
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, List, Mapping, Sequence
+
+from loguru import logger
+from redis.exceptions import RedisError, ResponseError
+
+METRICS_KEY_PREFIX = "campuswap:sync:metrics:"
+SNAPSHOT_TTL_SECONDS = 60
+FLUSH_INTERVAL_SECONDS = 5.0
+
+# Upper bounds in seconds; the last bucket catches everything slower.
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"),
+)
+
+
+@dataclass
+class Histogram:
+    """Cumulative fixed-bucket histogram."""
+
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    counts: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+    total: float = 0.0
+    count: int = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def merge(self, data: Mapping[str, Any]) -> None:
+        """Add a snapshot produced by :meth:`as_dict` into this histogram."""
+
+        for index, value in enumerate(data.get("counts", [])[: len(self.counts)]):
+            self.counts[index] += int(value)
+        self.total += float(data.get("sum", 0.0))
+        self.count += int(data.get("count", 0))
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate a quantile as the upper bound of the bucket that contains it."""
+
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound if bound != float("inf") else self.buckets[-2]
+        return self.buckets[-2]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"counts": list(self.counts), "sum": self.total, "count": self.count}
+
+    def summary(self) -> Dict[str, Any]:
+        """Return counts plus mean and p50/p95/p99 estimates for dashboards."""
+
+        return {
+            "count": self.count,
+            "mean": (self.total / self.count) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": [
+                {"le": "+Inf" if bound == float("inf") else bound, "count": bucket_count}
+                for bound, bucket_count in zip(self.buckets, self.counts)
+            ],
+        }
+
+
+class WorkerMetrics:
+    """In-process replication counters for one sync worker."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._latency: Dict[str, Histogram] = {}
+        self._events = 0
+        self._started_at = time.time()
+        self._last_flush = time.monotonic()
+        self._events_at_last_flush = 0
+        self._gauges: Dict[str, Any] = {}
+
+    def record_apply(self, occurred_at: datetime, targets: Sequence[str]) -> None:
+        """Record one event applied to ``targets`` at the current time."""
+
+        if occurred_at.tzinfo is None:
+            occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+        latency = max(0.0, (datetime.now(timezone.utc) - occurred_at).total_seconds())
+        with self._lock:
+            self._events += 1
+            for target in targets:
+                self._latency.setdefault(target, Histogram()).observe(latency)
+
+    def set_gauge(self, name: str, value: Any) -> None:
+        """Publish an arbitrary worker gauge alongside the counters."""
+
+        with self._lock:
+            self._gauges[name] = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counters and the event rate since the previous snapshot."""
+
+        now = time.monotonic()
+        with self._lock:
+            elapsed = max(now - self._last_flush, 1e-6)
+            rate = (self._events - self._events_at_last_flush) / elapsed
+            self._last_flush = now
+            self._events_at_last_flush = self._events
+            return {
+                "events": self._events,
+                "events_per_sec": round(rate, 2),
+                "started_at": self._started_at,
+                "reported_at": time.time(),
+                "latency": {target: hist.as_dict() for target, hist in self._latency.items()},
+                "gauges": dict(self._gauges),
+            }
+
+    def maybe_flush(self, redis_client: Any, consumer_name: str) -> None:
+        """Write a snapshot to Redis when the flush interval has elapsed."""
+
+        if time.monotonic() - self._last_flush < FLUSH_INTERVAL_SECONDS:
+            return
+        self.flush(redis_client, consumer_name)
+
+    def flush(self, redis_client: Any, consumer_name: str) -> None:
+        try:
+            redis_client.set(
+                f"{METRICS_KEY_PREFIX}{consumer_name}",
+                json.dumps(self.snapshot()),
+                ex=SNAPSHOT_TTL_SECONDS,
+            )
+        except RedisError as exc:  # pragma: no cover - network failure
+            logger.warning("Failed to publish sync worker metrics", error=str(exc))
+
+
+worker_metrics = WorkerMetrics()
+
+
+def _entry_id_ms(entry_id: str | None) -> int | None:
+    if not entry_id or entry_id == "0-0":
+        return None
+    return int(entry_id.split("-", 1)[0])
+
+
+def stream_lag(redis_client: Any, stream_keys: Sequence[str], group_name: str) -> Dict[str, Any]:
+    """Return per-stream lag of the consumer group from XINFO and XPENDING."""
+
+    now_ms = int(time.time() * 1000)
+    streams: Dict[str, Any] = {}
+    for stream_key in stream_keys:
+        try:
+            info = redis_client.xinfo_stream(stream_key)
+        except ResponseError:  # stream not created yet
+            streams[stream_key] = {"length": 0, "lag": 0, "pending": 0}
+            continue
+        group = next(
+            (g for g in redis_client.xinfo_groups(stream_key) if g["name"] == group_name), None
+        )
+        if group is None:
+            streams[stream_key] = {"length": info["length"], "lag": info["length"], "pending": 0}
+            continue
+
+        pending = redis_client.xpending(stream_key, group_name)
+        oldest_pending_ms = _entry_id_ms(pending.get("min"))
+        last_generated_ms = _entry_id_ms(info.get("last-generated-id"))
+        last_delivered_ms = _entry_id_ms(group.get("last-delivered-id"))
+        lag = group.get("lag")
+        streams[stream_key] = {
+            "length": info["length"],
+            "lag": lag,
+            "pending": pending.get("pending", 0),
+            "oldest_pending_age_seconds": (
+                (now_ms - oldest_pending_ms) / 1000 if oldest_pending_ms else None
+            ),
+            # How far the group's read position trails the newest entry.
+            "delivery_delay_seconds": (
+                (last_generated_ms - last_delivered_ms) / 1000
+                if lag and last_generated_ms and last_delivered_ms
+                else 0.0
+            ),
+        }
+    return streams
+
+
+def read_sync_metrics(
+    redis_client: Any, stream_keys: Sequence[str], group_name: str
+) -> Dict[str, Any]:
+    """Aggregate live worker snapshots and stream lag for the admin APIs."""
+
+    try:
+        snapshots = []
+        for key in redis_client.scan_iter(match=f"{METRICS_KEY_PREFIX}*"):
+            raw = redis_client.get(key)
+            if raw:
+                snapshots.append((key[len(METRICS_KEY_PREFIX):], json.loads(raw)))
+        streams = stream_lag(redis_client, stream_keys, group_name)
+    except RedisError as exc:  # pragma: no cover - network failure
+        logger.warning("Failed to read sync metrics", error=str(exc))
+        return {"available": False}
+
+    latency: Dict[str, Histogram] = {}
+    for _, snapshot in snapshots:
+        for target, data in snapshot.get("latency", {}).items():
+            latency.setdefault(target, Histogram()).merge(data)
+
+    return {
+        "available": True,
+        "workers": {
+            name: {
+                "events": snapshot.get("events", 0),
+                "events_per_sec": snapshot.get("events_per_sec", 0.0),
+                "reported_at": snapshot.get("reported_at"),
+                **snapshot.get("gauges", {}),
+            }
+            for name, snapshot in snapshots
+        },
+        "events_per_sec": round(
+            sum(snapshot.get("events_per_sec", 0.0) for _, snapshot in snapshots), 2
+        ),
+        "lag": sum(stream.get("lag") or 0 for stream in streams.values()),
+        "pending": sum(stream.get("pending") or 0 for stream in streams.values()),
+        "streams": streams,
+        "apply_latency_seconds": {target: hist.summary() for target, hist in latency.items()},
+    }
@@ -0,0 +1,127 @@
+"""Translate replicated INSERTs into idempotent, version-guarded upserts.
+
+Redelivered insert events must not fail with duplicate keys. Each target gets its
+native upsert form: ``ON DUPLICATE KEY UPDATE`` on MySQL/MariaDB and ``ON CONFLICT
+DO UPDATE`` on PostgreSQL and SQLite. The update only happens when the incoming
+row carries a newer ``sync_version``, so replaying an old event never overwrites
+newer data.
+"""
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import text
+
+from apps.core.models import Base
+
+VERSION_COLUMN = "sync_version"
+SUPPORTED_DIALECTS = {"mysql", "mariadb", "postgresql", "sqlite"}
+
+_INSERT_PATTERN = re.compile(
+    r"^\s*INSERT\s+INTO\s+([\w.]+)\s*\(([^)]*)\)\s*VALUES\s*\((.*)\)\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+@lru_cache(maxsize=256)
+def primary_key_columns(table_name: str) -> tuple[str, ...]:
+    """Return the primary key columns of a mapped table, defaulting to ``id``."""
+
+    table = Base.metadata.tables.get(table_name)
+    if table is None or not table.primary_key.columns:
+        return ("id",)
+    return tuple(column.name for column in table.primary_key.columns)
+
+
+@lru_cache(maxsize=1024)
+def build_upsert(
+    table_name: str, columns: tuple[str, ...], dialect_name: str, guarded: bool = True
+) -> str:
+    """Build an upsert of ``columns`` (bound by name) for the given dialect.
+
+    With ``guarded`` an existing row is only overwritten by a higher ``sync_version``;
+    unguarded upserts always take the incoming values, e.g. for forced repairs.
+    """
+
+    insert = (
+        f"INSERT INTO {table_name} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(f':{column}' for column in columns)})"
+    )
+    return f"{insert} {upsert_clause(table_name, columns, dialect_name, guarded)}"
+
+
+@lru_cache(maxsize=1024)
+def upsert_clause(
+    table_name: str, columns: tuple[str, ...], dialect_name: str, guarded: bool = True
+) -> str:
+    """Return the conflict clause appended to an ``INSERT`` of ``columns``.
+
+    Also usable after ``INSERT ... SELECT`` on PostgreSQL, e.g. from a COPY staging
+    table.
+    """
+
+    primary_key = primary_key_columns(table_name)
+    updates = [column for column in columns if column not in primary_key]
+    guard = guarded and VERSION_COLUMN in updates
+
+    if dialect_name in {"mysql", "mariadb"}:
+        if not updates:
+            return f"ON DUPLICATE KEY UPDATE {primary_key[0]} = {primary_key[0]}"
+        if not guard:
+            assignments = [f"{column} = VALUES({column})" for column in updates]
+        else:
+            # MySQL applies assignments left to right, so the version must change last
+            # for the other columns to compare against the stored version.
+            newer = f"VALUES({VERSION_COLUMN}) > {VERSION_COLUMN}"
+            assignments = [
+                f"{column} = IF({newer}, VALUES({column}), {column})"
+                for column in updates
+                if column != VERSION_COLUMN
+            ]
+            assignments.append(
+                f"{VERSION_COLUMN} = GREATEST({VERSION_COLUMN}, VALUES({VERSION_COLUMN}))"
+            )
+        return f"ON DUPLICATE KEY UPDATE {', '.join(assignments)}"
+
+    conflict = f"ON CONFLICT ({', '.join(primary_key)})"
+    if not updates:
+        return f"{conflict} DO NOTHING"
+    assignments = ", ".join(f"{column} = excluded.{column}" for column in updates)
+    clause = f"{conflict} DO UPDATE SET {assignments}"
+    if guard:
+        clause += f" WHERE {table_name}.{VERSION_COLUMN} < excluded.{VERSION_COLUMN}"
+    return clause
+
+
+@lru_cache(maxsize=4096)
+def upsert_statement(statement: str, dialect_name: str, guarded: bool = True) -> str:
+    """Rewrite a replicated ``INSERT`` as an upsert; other statements pass through."""
+
+    if dialect_name not in SUPPORTED_DIALECTS:
+        return statement
+    match = _INSERT_PATTERN.match(statement)
+    if match is None:
+        return statement
+    columns = tuple(column.strip() for column in match.group(2).split(","))
+    values = [value.strip() for value in match.group(3).split(",")]
+    if values != [f":{column}" for column in columns]:
+        return statement
+    return build_upsert(match.group(1), columns, dialect_name, guarded)
+
+
+def upsert_rows(
+    session: Any, table_name: str, rows: Sequence[Dict[str, Any]], guarded: bool = True
+) -> int:
+    """Upsert rows sharing the same keys with one ``executemany``.
+
+    ``session`` may be a Session or a Connection. Returns the driver rowcount.
+    """
+
+    if not rows:
+        return 0
+    bind = session.get_bind() if hasattr(session, "get_bind") else session
+    statement = build_upsert(table_name, tuple(rows[0].keys()), bind.dialect.name, guarded)
+    params: List[Dict[str, Any]] = list(rows)
+    return session.execute(text(statement), params).rowcount
@@ -1,7 +1,10 @@
 """Inventory service router definitions with 4-database sync."""
+from typing import Any
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from sqlalchemy import select
+from sqlalchemy.orm import Session
 
 from apps.core.database import db_manager
 from apps.core.models import Category, Item
@@ -10,6 +13,17 @@ from apps.services.db_operations import db_operation_service
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
 
+def _sync_fields(session: Session) -> dict[str, Any]:
+    """Report where a write landed; the sync worker replicates the rest."""
+
+    sync = db_operation_service.sync_summary(session)
+    return {
+        "consistency": "primary",
+        "synced_to": sync["synced_to"],
+        "pending_targets": sync["pending_targets"],
+    }
+
+
 class ItemPayload(BaseModel):
     """Payload describing item creation or update."""
 
@@ -48,12 +62,12 @@ def list_items(limit: int = 20) -> list[dict[str, str | float | int | None]]:
 
 
 @router.post("/items", status_code=201)
-def create_item(payload: ItemPayload) -> dict[str, str | int | float]:
+def create_item(payload: ItemPayload) -> dict[str, Any]:
     """
-    Create a new item listing with automatic sync to all 4 databases.
+    Create a new item listing on the primary.
     
-    Uses transaction management with deadlock retry.
-    Syncs to: MySQL, MariaDB, PostgreSQL, SQLite
+    Uses transaction management with deadlock retry. The sync event is published
+    with the commit and the sync worker replicates it to MariaDB, PostgreSQL, SQLite.
     """
     # 先验证分类存在(从主库查询)
     with db_manager.session_scope("mysql") as session:
@@ -61,7 +75,7 @@ def create_item(payload: ItemPayload) -> dict[str, str | int | float]:
         if category is None:
             raise HTTPException(status_code=400, detail="Category not found")
     
-    # 使用统一服务插入并同步到所有数据库
+    # 使用统一服务插入主库并发布同步事件
     with db_manager.session_scope("mysql") as session:
         item_data = {
             'seller_id': payload.seller_id,
@@ -73,12 +87,13 @@ def create_item(payload: ItemPayload) -> dict[str, str | int | float]:
             'status': 'draft',
         }
         
-        # 自动同步到四个数据库
+        # 主库提交后由 sync worker 同步到其余数据库
         item_id = db_operation_service.insert_with_sync(
             session=session,
             table='items',
             data=item_data,
             sync_to_all=True,
+            consistency="primary",
         )
         
         return {
@@ -86,14 +101,14 @@ def create_item(payload: ItemPayload) -> dict[str, str | int | float]:
             "title": payload.title,
             "status": "draft",
             "price": float(payload.price),
-            "synced_to": ["mysql", "mariadb", "postgres", "sqlite"],
+            **_sync_fields(session),
         }
 
 
 @router.put("/items/{item_id}", status_code=200)
-def update_item(item_id: int, payload: ItemPayload) -> dict[str, str | int]:
+def update_item(item_id: int, payload: ItemPayload) -> dict[str, Any]:
     """
-    Update an item with automatic sync to all 4 databases.
+    Update an item on the primary; the sync worker replicates it to the others.
     
     Uses optimistic locking and transaction management.
     """
@@ -105,13 +120,14 @@ def update_item(item_id: int, payload: ItemPayload) -> dict[str, str | int]:
             'currency': payload.currency,
         }
         
-        # 自动同步到四个数据库
+        # 主库提交后由 sync worker 同步到其余数据库
         rowcount = db_operation_service.update_with_sync(
             session=session,
             table='items',
             record_id=item_id,
             data=update_data,
             sync_to_all=True,
+            consistency="primary",
         )
         
         if rowcount == 0:
@@ -120,24 +136,25 @@ def update_item(item_id: int, payload: ItemPayload) -> dict[str, str | int]:
         return {
             "id": item_id,
             "message": "Item updated successfully",
-            "synced_to": ["mysql", "mariadb", "postgres", "sqlite"],
+            **_sync_fields(session),
         }
 
 
 @router.delete("/items/{item_id}", status_code=200)
-def delete_item(item_id: int) -> dict[str, str | int]:
+def delete_item(item_id: int) -> dict[str, Any]:
     """
-    Delete an item with automatic sync to all 4 databases.
+    Delete an item on the primary; the sync worker replicates it to the others.
     
     Uses transaction management with deadlock retry.
     """
     with db_manager.session_scope("mysql") as session:
-        # 自动同步到四个数据库
+        # 主库提交后由 sync worker 同步到其余数据库
         rowcount = db_operation_service.delete_with_sync(
             session=session,
             table='items',
             record_id=item_id,
             sync_to_all=True,
+            consistency="primary",
         )
         
         if rowcount == 0:
@@ -146,7 +163,7 @@ def delete_item(item_id: int) -> dict[str, str | int]:
         return {
             "id": item_id,
             "message": "Item deleted successfully",
-            "synced_to": ["mysql", "mariadb", "postgres", "sqlite"],
+            **_sync_fields(session),
         }
 
 
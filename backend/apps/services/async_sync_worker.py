@@ -0,0 +1,606 @@
+"""asyncio-native sync worker built on redis.asyncio and async SQLAlchemy engines."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from loguru import logger
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from apps.core.config import get_settings
+from apps.core.sync_engine import ReplicationResult, SyncEvent, _group_units, sync_engine
+from apps.core.sync_metrics import worker_metrics
+from apps.core.sync_payloads import decode_params
+from apps.core.sync_upsert import upsert_statement
+from apps.core.transaction import TransactionConfig, configure_engine_isolation
+from apps.services.sync_worker import (
+    ALL_TARGETS,
+    AdaptiveBatchSizer,
+    CommitGroupGate,
+    StreamEntry,
+    _by_lane,
+    _check_processes,
+    _claim_page,
+    _decode_entries,
+    _lane_counts,
+    _lane_streams,
+    _load_progress,
+    _settle,
+    _streams_for_process,
+)
+
+_ASYNC_DRIVERS = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql+mysqldb": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "postgresql+psycopg": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+    "postgresql": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_dsn(dsn: str) -> str:
+    """Swap the DBAPI driver of a DSN for its asyncio counterpart."""
+
+    scheme, _, rest = dsn.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def _create_engines(concurrency: int) -> Dict[str, AsyncEngine]:
+    """Create one async engine per database sized for the requested concurrency."""
+
+    settings = get_settings()
+    dsns = {
+        "mysql": settings.mysql_dsn,
+        "mariadb": settings.mariadb_dsn,
+        "postgres": settings.postgres_dsn,
+        "sqlite": settings.sqlite_dsn,
+    }
+    engines: Dict[str, AsyncEngine] = {}
+    for name, dsn in dsns.items():
+        options: Dict[str, object] = {"pool_pre_ping": True}
+        if not dsn.startswith("sqlite"):
+            options.update(
+                pool_size=concurrency,
+                max_overflow=0,
+                pool_timeout=TransactionConfig.POOL_TIMEOUT,
+                pool_recycle=TransactionConfig.POOL_RECYCLE,
+            )
+        engine = create_async_engine(_async_dsn(dsn), **options)
+        configure_engine_isolation(engine.sync_engine, name)
+        engines[name] = engine
+    return engines
+
+
+class AsyncSyncWorker:
+    """Consume sync streams and overlap database I/O across events and targets.
+
+    Events of one ``(table, record_id)`` are applied strictly in stream order; distinct
+    records and all targets of an event run concurrently, bounded by ``concurrency``
+    in-flight statements. Commit groups are applied in one transaction per target, in
+    stream order relative to the records around them. As in
+    :func:`apps.services.sync_worker.consume_events`, entries are acknowledged only once
+    applied everywhere, and idle pending entries are periodically claimed and retried or
+    dead-lettered. The read ``count`` adapts to apply time and backlog the same way, and
+    priority lanes are read with the same weighted fairness, most critical first.
+    """
+
+    def __init__(
+        self,
+        streams: Sequence[str],
+        consumer_name: str,
+        concurrency: int = 32,
+        batch_size: int = 100,
+        block_ms: int = 5000,
+        claim_interval: float = 30.0,
+        claim_idle_ms: int = 60_000,
+        max_attempts: int = 5,
+        group_timeout: float = 5.0,
+        drain_interval: float = 5.0,
+        min_batch_size: int = 10,
+        max_batch_size: int = 1000,
+        batch_target_ms: int = 500,
+    ) -> None:
+        settings = get_settings()
+        self.streams = list(streams)
+        self.group_name = os.getenv("SYNC_STREAM_GROUP", "campuswap-sync-group")
+        self.consumer_name = consumer_name
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_interval = claim_interval
+        self.claim_idle_ms = claim_idle_ms
+        self.max_attempts = max_attempts
+        self.drain_interval = drain_interval
+        self.gate = CommitGroupGate(group_timeout)
+        self.sizer = AdaptiveBatchSizer(
+            batch_size, min_batch_size, max_batch_size, batch_target_ms / 1000
+        )
+        self.stop_event = asyncio.Event()
+        self._redis = aioredis.Redis.from_url(
+            settings.redis_url, decode_responses=True, encoding_errors="surrogateescape"
+        )
+        self._engines = _create_engines(concurrency)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(self, replay_pending: bool = True, max_batches: int | None = None) -> int:
+        """Consume until stopped and return the number of fully replicated events."""
+
+        for stream_key in self.streams:
+            await self._ensure_consumer_group(stream_key)
+
+        read_id = "0" if replay_pending else ">"
+        processed = 0
+        batches = 0
+        loop = asyncio.get_running_loop()
+        next_claim = loop.time()
+        drainer = asyncio.create_task(self._drain_backlogs()) if self.drain_interval > 0 else None
+        try:
+            while not self.stop_event.is_set():
+                await asyncio.to_thread(
+                    worker_metrics.maybe_flush, sync_engine.redis_client, self.consumer_name
+                )
+                if self.claim_interval > 0 and loop.time() >= next_claim:
+                    try:
+                        processed += await self._recover_pending()
+                    except RedisError as exc:  # pragma: no cover - network failure
+                        logger.exception("Pending entry recovery failed", error=str(exc))
+                    next_claim = loop.time() + self.claim_interval
+                try:
+                    response = await self._read(read_id)
+                except RedisError as exc:  # pragma: no cover - network failure
+                    logger.exception("Redis read failed", error=str(exc))
+                    await asyncio.sleep(1.0)
+                    continue
+
+                deliveries = 1 if read_id == ">" else 2
+                read_id = ">"
+                batches += 1
+                started = loop.time()
+                entries: List[StreamEntry] = []
+                if response:
+                    entries = await asyncio.to_thread(
+                        _decode_entries, response, self.group_name, deliveries
+                    )
+                read = len(entries)
+                if entries or self.gate.holding:
+                    for lane_entries in _by_lane(self.gate.release(entries)):
+                        processed += await self._process(lane_entries)
+                self.sizer.observe(read, loop.time() - started if read else 0.0)
+                if max_batches is not None and batches >= max_batches:
+                    break
+        finally:
+            if drainer is not None:
+                drainer.cancel()
+            await asyncio.to_thread(
+                worker_metrics.flush, sync_engine.redis_client, self.consumer_name
+            )
+            await self.close()
+        return processed
+
+    async def _drain_backlogs(self) -> None:
+        """Periodically replay the backlogs of parked targets."""
+
+        while not self.stop_event.is_set():
+            await asyncio.sleep(self.drain_interval)
+            try:
+                await asyncio.to_thread(sync_engine.drain_backlogs, self.batch_size)
+            except Exception as exc:  # pragma: no cover - keep draining on the next tick
+                logger.exception("Draining parked sync backlogs failed", error=str(exc))
+
+    async def _read(self, read_id: str) -> List[Any]:
+        """Read every lane without blocking, then block on all streams if all were empty."""
+
+        lanes = _lane_streams(self.streams)
+        response: List[Any] = []
+        if len(lanes) > 1:
+            for lane, count in _lane_counts(lanes, self.sizer.current).items():
+                response.extend(
+                    await self._redis.xreadgroup(
+                        self.group_name,
+                        self.consumer_name,
+                        {stream_key: read_id for stream_key in lanes[lane]},
+                        count=count,
+                    )
+                    or []
+                )
+            if response or read_id != ">":
+                return response
+        return await self._redis.xreadgroup(
+            self.group_name,
+            self.consumer_name,
+            {stream_key: read_id for stream_key in self.streams},
+            count=self.sizer.current,
+            block=self._block_ms(),
+        )
+
+    def _block_ms(self) -> int:
+        if self.gate.holding:
+            return min(self.block_ms, int(self.gate.timeout * 1000))
+        return self.block_ms
+
+    async def close(self) -> None:
+        """Release Redis and database connections."""
+
+        await self._redis.aclose()
+        for engine in self._engines.values():
+            await engine.dispose()
+
+    async def _ensure_consumer_group(self, stream_key: str) -> None:
+        try:
+            await self._redis.xgroup_create(stream_key, self.group_name, id="0-0", mkstream=True)
+            logger.info("Created Redis consumer group", group=self.group_name, stream=stream_key)
+        except ResponseError as exc:
+            if "BUSYGROUP" not in str(exc):  # pragma: no cover - unexpected redis error
+                raise
+
+    async def _recover_pending(self) -> int:
+        """Claim entries idle in any consumer's pending list and retry them."""
+
+        processed = 0
+        for stream_key in self.streams:
+            start_id = "0-0"
+            while not self.stop_event.is_set():
+                start_id, entries = await asyncio.to_thread(
+                    _claim_page,
+                    stream_key,
+                    self.group_name,
+                    self.consumer_name,
+                    start_id,
+                    self.claim_idle_ms,
+                    self.batch_size,
+                    self.max_attempts,
+                )
+                if entries:
+                    processed += await self._process(entries)
+                if start_id == "0-0":
+                    break
+        return processed
+
+    async def _process(self, entries: List[StreamEntry]) -> int:
+        """Apply a batch, keeping per-record order while records run concurrently.
+
+        Returns the number of entries applied everywhere, which are acknowledged.
+        """
+
+        done = await asyncio.to_thread(_load_progress, entries)
+        outcomes: List[Dict[str, ReplicationResult]] = [{} for _ in entries]
+        segment: List[int] = []
+        for unit in _group_units([entry.event for entry in entries], list(range(len(entries)))):
+            if len(unit) == 1:
+                segment.append(unit[0])
+                continue
+            await self._process_segment(entries, segment, done, outcomes)
+            segment = []
+            await self._process_group(entries, unit, done, outcomes)
+        await self._process_segment(entries, segment, done, outcomes)
+        return await asyncio.to_thread(_settle, entries, outcomes, done, self.group_name)
+
+    async def _process_segment(
+        self,
+        entries: List[StreamEntry],
+        indexes: List[int],
+        done: List[Set[str]],
+        outcomes: List[Dict[str, ReplicationResult]],
+    ) -> None:
+        by_record: Dict[tuple[str, str], List[int]] = {}
+        for index in indexes:
+            entry = entries[index]
+            key = (entry.event.table, entry.event.record_id or entry.entry_id)
+            by_record.setdefault(key, []).append(index)
+
+        await asyncio.gather(
+            *(self._process_record(entries, chain, done, outcomes) for chain in by_record.values())
+        )
+
+    async def _process_record(
+        self,
+        entries: List[StreamEntry],
+        chain: List[int],
+        done: List[Set[str]],
+        outcomes: List[Dict[str, ReplicationResult]],
+    ) -> None:
+        for index in chain:
+            event = entries[index].event
+            targets = [
+                target
+                for target in ALL_TARGETS
+                if target != event.origin and target not in done[index]
+            ]
+            results = await asyncio.gather(*(self._apply(event, target) for target in targets))
+            outcomes[index] = {result.target: result for result in results}
+
+    async def _process_group(
+        self,
+        entries: List[StreamEntry],
+        unit: List[int],
+        done: List[Set[str]],
+        outcomes: List[Dict[str, ReplicationResult]],
+    ) -> None:
+        """Apply one commit group with a single transaction per target."""
+
+        per_target = await asyncio.gather(
+            *(
+                self._apply_group(
+                    [entries[index].event for index in unit],
+                    [
+                        position
+                        for position, index in enumerate(unit)
+                        if entries[index].event.origin != target and target not in done[index]
+                    ],
+                    target,
+                )
+                for target in ALL_TARGETS
+            )
+        )
+        for target_results in per_target:
+            for position, result in target_results.items():
+                outcomes[unit[position]][result.target] = result
+
+    async def _apply_group(
+        self, events: List[SyncEvent], positions: List[int], target: str
+    ) -> Dict[int, ReplicationResult]:
+        if not positions:
+            return {}
+        if sync_engine.breakers.parked(target):
+            parked = await self._park(events, positions, target)
+            if parked is not None:
+                return parked
+        async with self._semaphore:
+            try:
+                rowcounts: Dict[int, int] = {}
+                async with self._engines[target].begin() as connection:
+                    for position in positions:
+                        event = events[position]
+                        result = await connection.execute(
+                            text(self._statement(event, target)),
+                            decode_params(event.payload.get("params", {})),
+                        )
+                        rowcounts[position] = result.rowcount
+            except Exception as exc:
+                logger.exception(
+                    "Replication failed",
+                    target=target,
+                    group_id=events[positions[0]].group_id,
+                    events=len(positions),
+                    error=str(exc),
+                )
+                sync_engine.breakers.record_failure(target, exc)
+                if sync_engine.breakers.parked(target):
+                    parked = await self._park(events, positions, target)
+                    if parked is not None:
+                        return parked
+                return {
+                    position: ReplicationResult(target=target, error=str(exc))
+                    for position in positions
+                }
+
+        sync_engine.breakers.record_success(target)
+        return {
+            position: self._result_for(events[position], target, rowcount)
+            for position, rowcount in rowcounts.items()
+        }
+
+    async def _apply(self, event: SyncEvent, target: str) -> ReplicationResult:
+        """Apply one event to one target in its own transaction."""
+
+        if sync_engine.breakers.parked(target):
+            parked = await self._park([event], [0], target)
+            if parked is not None:
+                return parked[0]
+        async with self._semaphore:
+            try:
+                async with self._engines[target].begin() as connection:
+                    result = await connection.execute(
+                        text(self._statement(event, target)),
+                        decode_params(event.payload.get("params", {})),
+                    )
+                    rowcount = result.rowcount
+            except Exception as exc:
+                logger.exception(
+                    "Replication failed",
+                    target=target,
+                    table=event.table,
+                    record_id=event.record_id,
+                    error=str(exc),
+                )
+                sync_engine.breakers.record_failure(target, exc)
+                if sync_engine.breakers.parked(target):
+                    parked = await self._park([event], [0], target)
+                    if parked is not None:
+                        return parked[0]
+                return ReplicationResult(target=target, error=str(exc))
+
+        sync_engine.breakers.record_success(target)
+        return self._result_for(event, target, rowcount)
+
+    async def _park(
+        self, events: List[SyncEvent], positions: List[int], target: str
+    ) -> Optional[Dict[int, ReplicationResult]]:
+        """Move events of a parked target to its backlog stream.
+
+        Returns ``None`` when the target was released meanwhile; apply the events live.
+        """
+
+        parked = await asyncio.to_thread(
+            sync_engine.park_events, target, [events[position] for position in positions]
+        )
+        return None if parked is None else dict(zip(positions, parked))
+
+    def _statement(self, event: SyncEvent, target: str) -> str:
+        """Return the SQL to run on a target; inserts become version-guarded upserts."""
+
+        if event.action != "insert":
+            return event.payload["statement"]
+        return upsert_statement(event.payload["statement"], self._engines[target].dialect.name)
+
+    def _result_for(self, event: SyncEvent, target: str, rowcount: int) -> ReplicationResult:
+        """Turn a statement rowcount into a result, recording optimistic-lock conflicts."""
+
+        if event.action in {"update", "delete"} and rowcount == 0:
+            logger.warning(
+                "Sync conflict detected",
+                table=event.table,
+                target=target,
+                record_id=event.record_id,
+            )
+            sync_engine._record_conflict(event, target)
+            return ReplicationResult(target=target, rowcount=rowcount, conflict=True)
+        return ReplicationResult(target=target, rowcount=rowcount)
+
+
+async def run_async_worker(
+    concurrency: int = 32,
+    batch_size: int = 100,
+    block_ms: int = 5000,
+    replay_pending: bool = True,
+    processes: int = 1,
+    process_index: int = 0,
+    claim_interval: float = 30.0,
+    claim_idle_ms: int = 60_000,
+    max_attempts: int = 5,
+    group_timeout: float = 5.0,
+    drain_interval: float = 5.0,
+    min_batch_size: int = 10,
+    max_batch_size: int = 1000,
+    batch_target_ms: int = 500,
+) -> int:
+    """Run the asyncio worker until SIGINT/SIGTERM."""
+
+    _check_processes(processes, process_index)
+    sync_engine.validate_lanes()
+    consumer_name = os.getenv("SYNC_CONSUMER_NAME", socket.gethostname())
+    if processes > 1:
+        consumer_name = f"{consumer_name}-{process_index}"
+    worker = AsyncSyncWorker(
+        streams=_streams_for_process(process_index, processes),
+        consumer_name=consumer_name,
+        concurrency=concurrency,
+        batch_size=batch_size,
+        block_ms=block_ms,
+        claim_interval=claim_interval,
+        claim_idle_ms=claim_idle_ms,
+        max_attempts=max_attempts,
+        group_timeout=group_timeout,
+        drain_interval=drain_interval,
+        min_batch_size=min_batch_size,
+        max_batch_size=max_batch_size,
+        batch_target_ms=batch_target_ms,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):  # pragma: no cover - runtime hook
+        loop.add_signal_handler(sig, worker.stop_event.set)
+
+    logger.info(
+        "Starting async sync worker",
+        concurrency=concurrency,
+        batch_size=batch_size,
+        streams=worker.streams,
+    )
+    processed = await worker.run(replay_pending=replay_pending)
+    logger.info("Async sync worker stopped", processed_events=processed)
+    return processed
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Create CLI parser for launching the async worker."""
+
+    parser = argparse.ArgumentParser(description="CampuSwap Async Sync Worker")
+    parser.add_argument(
+        "--concurrency", type=int, default=32, help="Max in-flight statements across targets"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=100, help="Initial events per Redis read"
+    )
+    parser.add_argument(
+        "--min-batch-size", type=int, default=10, help="Lower bound of the adaptive read size"
+    )
+    parser.add_argument(
+        "--max-batch-size", type=int, default=1000, help="Upper bound of the adaptive read size"
+    )
+    parser.add_argument(
+        "--batch-target-ms",
+        type=int,
+        default=500,
+        help="Apply time per batch the read size adapts towards",
+    )
+    parser.add_argument("--block-ms", type=int, default=5000, help="Blocking read timeout")
+    parser.add_argument(
+        "--no-replay", action="store_true", help="Skip replaying pending entries on startup"
+    )
+    parser.add_argument(
+        "--claim-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between XAUTOCLAIM sweeps for stuck pending entries (0 disables)",
+    )
+    parser.add_argument(
+        "--claim-idle-ms", type=int, default=60_000, help="Idle time before an entry is claimed"
+    )
+    parser.add_argument(
+        "--max-attempts", type=int, default=5, help="Deliveries before dead-lettering an entry"
+    )
+    parser.add_argument(
+        "--group-timeout",
+        type=float,
+        default=5.0,
+        help="Seconds to wait for the rest of a commit group before applying it partially",
+    )
+    parser.add_argument(
+        "--drain-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between backlog drains of parked targets (0 disables)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Worker processes to split the stream partitions (SYNC_STREAM_SHARDS) across",
+    )
+    parser.add_argument(
+        "--process-index", type=int, default=0, help="Slice of --processes consumed here"
+    )
+    return parser
+
+
+def main() -> None:  # pragma: no cover - CLI
+    """Console entry point for the async sync worker."""
+
+    parser = _build_parser()
+    args = parser.parse_args()
+    try:
+        _check_processes(args.processes, args.process_index)
+    except ValueError as exc:
+        parser.error(str(exc))
+    asyncio.run(
+        run_async_worker(
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            block_ms=args.block_ms,
+            replay_pending=not args.no_replay,
+            processes=args.processes,
+            process_index=args.process_index,
+            claim_interval=args.claim_interval,
+            claim_idle_ms=args.claim_idle_ms,
+            max_attempts=args.max_attempts,
+            group_timeout=args.group_timeout,
+            drain_interval=args.drain_interval,
+            min_batch_size=args.min_batch_size,
+            max_batch_size=args.max_batch_size,
+            batch_target_ms=args.batch_target_ms,
+        )
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI bootstrap
+    main()
@@ -10,17 +10,99 @@ This module provides high-level database operations that automatically:
 from __future__ import annotations
 
 import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from threading import Lock
 from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from apps.core.config import get_settings
 from apps.core.database import db_manager
-from apps.core.sync_engine import SyncEvent, sync_engine
+from apps.core.sync_engine import ReplicationError, ReplicationResult, SyncEvent, sync_engine
+from apps.core.sync_listeners import queue_sync_event
+from apps.core.sync_payloads import encode_params
 from apps.core.transaction import with_transaction, IsolationLevel
 
+# primary: 仅写主库并随提交发布同步事件
+# quorum:  主库提交后等待 SYNC_WRITE_QUORUM 个目标库确认
+# all:     主库提交后等待全部目标库确认
+CONSISTENCY_LEVELS = ("primary", "quorum", "all")
+
+
+@dataclass
+class SyncReceipt:
+    """
+    How far one write had replicated when the call returned.
+    
+    ``pending_targets`` are completed by the sync worker (or are still being applied);
+    ``satisfied`` tells whether the requested consistency level was reached.
+    """
+    table: str
+    record_id: Optional[str]
+    consistency: str
+    satisfied: bool
+    applied_targets: List[str] = field(default_factory=list)
+    pending_targets: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'table': self.table,
+            'record_id': self.record_id,
+            'consistency': self.consistency,
+            'satisfied': self.satisfied,
+            'applied_targets': self.applied_targets,
+            'pending_targets': self.pending_targets,
+        }
+
+
+@dataclass
+class _QuorumHandoff:
+    """
+    Hands a quorum write over to the sync worker while slow targets still apply it.
+    
+    The event is published as soon as the write returns, tagged with the targets
+    that applied it by then. Targets that succeed afterwards are recorded against
+    the published entry so the worker skips them.
+    """
+    event: SyncEvent
+    engine: Any
+    lock: Lock = field(default_factory=Lock)
+    entry: Optional[Tuple[str, str]] = None
+    settled: Optional[Dict[str, ReplicationResult]] = None
+
+    def publish(self, targets: List[str], results: Dict[str, ReplicationResult]) -> None:
+        """Publish the event for the targets that have not applied it yet."""
+        with self.lock:
+            # 若全部目标已在此之前完成，以最终结果为准
+            results = self.settled or results
+            self.event.applied_targets = tuple(
+                target for target, result in results.items() if result.ok
+            )
+            if len(self.event.applied_targets) == len(targets):
+                return
+            self.entry = (
+                self.engine.stream_key_for(self.event),
+                self.engine.publish_event(self.event),
+            )
+
+    def settle(self, results: Dict[str, ReplicationResult]) -> None:
+        """Record the targets that succeeded after the event was published."""
+        with self.lock:
+            self.settled = results
+            entry = self.entry
+        if entry is None:
+            return
+        late = [
+            target for target, result in results.items()
+            if result.ok and target not in self.event.applied_targets
+        ]
+        if late:
+            self.engine.record_late_applied(*entry, late)
+
 
 class DatabaseOperationService:
     """
@@ -28,7 +110,7 @@ class DatabaseOperationService:
     
     All operations automatically:
     - Execute in transactions with retry on deadlock
-    - Replicate to all target databases
+    - Replicate to the target databases per the requested consistency level
     - Publish events to Redis Streams for async sync
     - Log conflicts for manual resolution
     """
@@ -95,13 +177,13 @@ class DatabaseOperationService:
         
         return results
 
-    @with_transaction(PRIMARY_DATABASE, max_retries=3)
     def insert_with_sync(
         self,
         session: Session,
         table: str,
         data: Dict[str, Any],
         sync_to_all: bool = True,
+        consistency: Optional[str] = None,
     ) -> int:
         """
         Insert record with automatic sync to all databases.
@@ -111,10 +193,28 @@ class DatabaseOperationService:
             table: Table name
             data: Record data as dict
             sync_to_all: If True, sync to all databases
+            consistency: primary / quorum / all, see :data:`CONSISTENCY_LEVELS`
             
         Returns:
             Inserted record ID
         """
+        level = self._consistency_level(consistency)
+        inserted_id, event = self._insert_primary(
+            session=session, table=table, data=data, sync_to_all=sync_to_all, level=level
+        )
+        self._replicate_committed(session, event, level)
+        return inserted_id
+
+    @with_transaction(PRIMARY_DATABASE, max_retries=3)
+    def _insert_primary(
+        self,
+        session: Session,
+        table: str,
+        data: Dict[str, Any],
+        sync_to_all: bool,
+        level: str,
+    ) -> Tuple[int, Optional[SyncEvent]]:
+        """Insert on the primary inside a retried transaction."""
         # 构建 INSERT 语句
         columns = ', '.join(data.keys())
         placeholders = ', '.join([f':{key}' for key in data.keys()])
@@ -127,35 +227,24 @@ class DatabaseOperationService:
         # 获取插入的 ID (假设使用自增主键)
         inserted_id = result.lastrowid
         
-        if sync_to_all:
-            # 发布同步事件
-            event = SyncEvent(
-                table=table,
-                action='insert',
-                payload={
-                    'statement': sql,
-                    'params': data,
-                    'record_id': inserted_id,
-                },
-                origin=self.PRIMARY_DATABASE,
-                occurred_at=datetime.utcnow(),
-                sync_version=1,
-                record_id=str(inserted_id),
-            )
-            
-            # 立即同步到其他数据库
-            other_targets = [
-                db for db in self.TARGET_DATABASES 
-                if db != self.PRIMARY_DATABASE
-            ]
-            self.sync_engine.replicate(event, other_targets)
-            
-            # 发布到 Redis Stream (供 worker 异步处理)
-            self.sync_engine.publish_event(event)
+        if not sync_to_all:
+            return inserted_id, None
         
-        return inserted_id
+        event = SyncEvent(
+            table=table,
+            action='insert',
+            payload={
+                'statement': sql,
+                'params': encode_params(data),
+                'record_id': inserted_id,
+            },
+            origin=self.PRIMARY_DATABASE,
+            occurred_at=datetime.utcnow(),
+            sync_version=1,
+            record_id=str(inserted_id),
+        )
+        return inserted_id, self._dispatch_event(session, event, level)
 
-    @with_transaction(PRIMARY_DATABASE, max_retries=3)
     def update_with_sync(
         self,
         session: Session,
@@ -163,6 +252,7 @@ class DatabaseOperationService:
         record_id: int,
         data: Dict[str, Any],
         sync_to_all: bool = True,
+        consistency: Optional[str] = None,
     ) -> int:
         """
         Update record with automatic sync to all databases.
@@ -173,10 +263,34 @@ class DatabaseOperationService:
             record_id: Record ID to update
             data: New data as dict
             sync_to_all: If True, sync to all databases
+            consistency: primary / quorum / all, see :data:`CONSISTENCY_LEVELS`
             
         Returns:
             Number of affected rows
         """
+        level = self._consistency_level(consistency)
+        rowcount, event = self._update_primary(
+            session=session,
+            table=table,
+            record_id=record_id,
+            data=data,
+            sync_to_all=sync_to_all,
+            level=level,
+        )
+        self._replicate_committed(session, event, level)
+        return rowcount
+
+    @with_transaction(PRIMARY_DATABASE, max_retries=3)
+    def _update_primary(
+        self,
+        session: Session,
+        table: str,
+        record_id: int,
+        data: Dict[str, Any],
+        sync_to_all: bool,
+        level: str,
+    ) -> Tuple[int, Optional[SyncEvent]]:
+        """Update on the primary inside a retried transaction."""
         # 构建 UPDATE 语句
         set_clause = ', '.join([f"{key} = :{key}" for key in data.keys()])
         sql = f"UPDATE {table} SET {set_clause} WHERE id = :record_id"
@@ -187,41 +301,31 @@ class DatabaseOperationService:
         result = session.execute(text(sql), params)
         session.flush()
         
-        if sync_to_all and result.rowcount > 0:
-            # 发布同步事件
-            event = SyncEvent(
-                table=table,
-                action='update',
-                payload={
-                    'statement': sql,
-                    'params': params,
-                    'record_id': record_id,
-                },
-                origin=self.PRIMARY_DATABASE,
-                occurred_at=datetime.utcnow(),
-                sync_version=1,
-                record_id=str(record_id),
-            )
-            
-            # 立即同步到其他数据库
-            other_targets = [
-                db for db in self.TARGET_DATABASES 
-                if db != self.PRIMARY_DATABASE
-            ]
-            self.sync_engine.replicate(event, other_targets)
-            
-            # 发布到 Redis Stream
-            self.sync_engine.publish_event(event)
+        if not sync_to_all or result.rowcount == 0:
+            return result.rowcount, None
         
-        return result.rowcount
+        event = SyncEvent(
+            table=table,
+            action='update',
+            payload={
+                'statement': sql,
+                'params': encode_params(params),
+                'record_id': record_id,
+            },
+            origin=self.PRIMARY_DATABASE,
+            occurred_at=datetime.utcnow(),
+            sync_version=1,
+            record_id=str(record_id),
+        )
+        return result.rowcount, self._dispatch_event(session, event, level)
 
-    @with_transaction(PRIMARY_DATABASE, max_retries=3)
     def delete_with_sync(
         self,
         session: Session,
         table: str,
         record_id: int,
         sync_to_all: bool = True,
+        consistency: Optional[str] = None,
     ) -> int:
         """
         Delete record with automatic sync to all databases.
@@ -231,10 +335,32 @@ class DatabaseOperationService:
             table: Table name
             record_id: Record ID to delete
             sync_to_all: If True, sync to all databases
+            consistency: primary / quorum / all, see :data:`CONSISTENCY_LEVELS`
             
         Returns:
             Number of affected rows
         """
+        level = self._consistency_level(consistency)
+        rowcount, event = self._delete_primary(
+            session=session,
+            table=table,
+            record_id=record_id,
+            sync_to_all=sync_to_all,
+            level=level,
+        )
+        self._replicate_committed(session, event, level)
+        return rowcount
+
+    @with_transaction(PRIMARY_DATABASE, max_retries=3)
+    def _delete_primary(
+        self,
+        session: Session,
+        table: str,
+        record_id: int,
+        sync_to_all: bool,
+        level: str,
+    ) -> Tuple[int, Optional[SyncEvent]]:
+        """Delete on the primary inside a retried transaction."""
         sql = f"DELETE FROM {table} WHERE id = :record_id"
         params = {'record_id': record_id}
         
@@ -242,88 +368,237 @@ class DatabaseOperationService:
         result = session.execute(text(sql), params)
         session.flush()
         
-        if sync_to_all and result.rowcount > 0:
-            # 发布同步事件
-            event = SyncEvent(
-                table=table,
-                action='delete',
-                payload={
-                    'statement': sql,
-                    'params': params,
-                    'record_id': record_id,
-                },
-                origin=self.PRIMARY_DATABASE,
-                occurred_at=datetime.utcnow(),
-                sync_version=1,
-                record_id=str(record_id),
+        if not sync_to_all or result.rowcount == 0:
+            return result.rowcount, None
+        
+        event = SyncEvent(
+            table=table,
+            action='delete',
+            payload={
+                'statement': sql,
+                'params': params,
+                'record_id': record_id,
+            },
+            origin=self.PRIMARY_DATABASE,
+            occurred_at=datetime.utcnow(),
+            sync_version=1,
+            record_id=str(record_id),
+        )
+        return result.rowcount, self._dispatch_event(session, event, level)
+
+    @staticmethod
+    def sync_receipts(session: Session) -> List[SyncReceipt]:
+        """Return the receipts of the ``*_with_sync`` writes made through ``session``."""
+        return list(session.info.get('sync_receipts', []))
+
+    def sync_summary(self, session: Session) -> Dict[str, Any]:
+        """
+        Summarize the receipts of ``session`` for an API response.
+        
+        ``synced_to`` lists the databases every write reached, ``pending_targets``
+        those the sync worker still has to complete for at least one write.
+        """
+        receipts = self.sync_receipts(session)
+        synced_to = [
+            db for db in self.TARGET_DATABASES
+            if all(db in receipt.applied_targets for receipt in receipts)
+        ]
+        return {
+            'satisfied': all(receipt.satisfied for receipt in receipts),
+            'synced_to': synced_to,
+            'pending_targets': [db for db in self.TARGET_DATABASES if db not in synced_to],
+            'writes': [receipt.as_dict() for receipt in receipts],
+        }
+
+    def _consistency_level(self, consistency: Optional[str]) -> str:
+        """Resolve the requested consistency level, defaulting to the configured one."""
+        level = consistency or get_settings().sync_default_consistency
+        if level not in CONSISTENCY_LEVELS:
+            raise ValueError(
+                f"Unknown consistency level {level!r}, expected one of {CONSISTENCY_LEVELS}"
             )
-            
-            # 立即同步到其他数据库
-            other_targets = [
-                db for db in self.TARGET_DATABASES 
-                if db != self.PRIMARY_DATABASE
-            ]
-            self.sync_engine.replicate(event, other_targets)
-            
-            # 发布到 Redis Stream
-            self.sync_engine.publish_event(event)
+        return level
+
+    def _dispatch_event(
+        self, session: Session, event: SyncEvent, level: str
+    ) -> Optional[SyncEvent]:
+        """
+        Hand an event over inside the primary transaction.
         
-        return result.rowcount
+        ``primary`` events are published with the commit (or written to the outbox);
+        the others are replicated synchronously once the commit succeeded.
+        """
+        if level == "primary":
+            queue_sync_event(session, event)
+        return event
+
+    def _replicate_committed(
+        self, session: Session, event: Optional[SyncEvent], level: str
+    ) -> None:
+        """
+        Replicate a committed primary write before returning to the caller.
+        
+        ``quorum`` returns once SYNC_WRITE_QUORUM targets applied the event, ``all``
+        once every target did. When some target is still missing the event is then
+        published right away, tagged with the targets that applied it, so the worker
+        finishes the rest; targets still applying it in the background are skipped by
+        the worker once they succeed (see :class:`_QuorumHandoff`). The primary commit
+        stands either way, so a shortfall is reported on the write's
+        :class:`SyncReceipt` (see :meth:`sync_receipts`) instead of raised.
+        """
+        if event is None:
+            return
+        
+        other_targets = [
+            db for db in self.TARGET_DATABASES 
+            if db != self.PRIMARY_DATABASE
+        ]
+        if level == "primary":
+            # 事件随主库提交发布，由 worker 同步其余数据库
+            session.info.setdefault('sync_receipts', []).append(SyncReceipt(
+                table=event.table,
+                record_id=event.record_id,
+                consistency=level,
+                satisfied=True,
+                applied_targets=[self.PRIMARY_DATABASE],
+                pending_targets=other_targets,
+            ))
+            return
+        
+        # 立即同步到其他数据库
+        required = len(other_targets)
+        if level == "quorum":
+            required = get_settings().sync_write_quorum
+        
+        handoff = _QuorumHandoff(event, self.sync_engine)
+        try:
+            results = self.sync_engine.replicate(
+                event,
+                other_targets,
+                required=required,
+                on_settled=handoff.settle,
+            )
+        except ReplicationError as exc:
+            results = exc.results
+        # 不等待慢的目标库，立即发布给 worker 补齐
+        handoff.publish(other_targets, results)
+        
+        applied = [
+            target for target, result in results.items() if result.ok and not result.parked
+        ]
+        receipt = SyncReceipt(
+            table=event.table,
+            record_id=event.record_id,
+            consistency=level,
+            satisfied=len(applied) >= min(required, len(other_targets)),
+            applied_targets=[self.PRIMARY_DATABASE, *applied],
+            pending_targets=[target for target in other_targets if target not in applied],
+        )
+        if not receipt.satisfied:
+            logger.warning(
+                "Consistency level not reached, remaining targets left to the sync worker",
+                table=event.table,
+                record_id=event.record_id,
+                consistency=level,
+                applied=receipt.applied_targets,
+            )
+        session.info.setdefault('sync_receipts', []).append(receipt)
 
     def bulk_insert_with_sync(
         self,
         table: str,
         records: List[Dict[str, Any]],
+        chunk_size: int = 1000,
     ) -> Dict[str, Any]:
         """
         Bulk insert records to all databases with transaction management.
         
+        Records are split into chunks of ``chunk_size`` rows, each sent as one
+        ``executemany`` in its own transaction (the MySQL drivers rewrite it into a
+        multi-row ``VALUES`` insert). The four databases are written concurrently and
+        a failing chunk is reported without stopping the remaining ones.
+        
         Args:
             table: Table name
-            records: List of records to insert
+            records: List of records to insert, all with the same keys
+            chunk_size: Rows per chunk transaction
             
         Returns:
-            Results dict with success/failure per database
+            Results dict per database with inserted count and failed chunks
         """
-        results = {}
+        if not records:
+            return {}
         
-        for db_name in self.TARGET_DATABASES:
+        columns = list(records[0].keys())
+        if any(list(record.keys()) != columns for record in records):
+            raise ValueError("All records of a bulk insert must have the same keys")
+        
+        column_list = ', '.join(columns)
+        placeholders = ', '.join([f':{key}' for key in columns])
+        sql = f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})"
+        chunk_size = max(1, chunk_size)
+        chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+        
+        # 四个数据库并发写入，每个数据库内按块顺序提交
+        with ThreadPoolExecutor(max_workers=len(self.TARGET_DATABASES)) as executor:
+            futures = {
+                db_name: executor.submit(self._bulk_insert_chunks, db_name, table, sql, chunks)
+                for db_name in self.TARGET_DATABASES
+            }
+            return {db_name: future.result() for db_name, future in futures.items()}
+
+    def _bulk_insert_chunks(
+        self,
+        db_name: str,
+        table: str,
+        sql: str,
+        chunks: List[List[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """Insert chunks into one database, one transaction per chunk."""
+        inserted = 0
+        failed_chunks = []
+        offset = 0
+        
+        for index, chunk in enumerate(chunks):
             try:
                 with db_manager.session_scope(db_name) as session:
-                    # 批量插入
-                    if records:
-                        columns = ', '.join(records[0].keys())
-                        placeholders = ', '.join([f':{key}' for key in records[0].keys()])
-                        sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-                        
-                        for record in records:
-                            session.execute(text(sql), record)
-                        
-                        session.flush()
-                        
-                        results[db_name] = {
-                            'status': 'success',
-                            'count': len(records),
-                        }
-                        
-                        logger.info(
-                            f"Bulk insert to {db_name}",
-                            table=table,
-                            count=len(records),
-                        )
-                        
+                    session.execute(text(sql), chunk)
+                inserted += len(chunk)
             except Exception as e:
-                results[db_name] = {
-                    'status': 'failed',
+                failed_chunks.append({
+                    'chunk': index,
+                    'offset': offset,
+                    'size': len(chunk),
                     'error': str(e),
-                }
+                })
                 logger.error(
-                    f"Bulk insert failed on {db_name}",
+                    f"Bulk insert chunk failed on {db_name}",
                     table=table,
+                    chunk=index,
+                    size=len(chunk),
                     error=str(e),
                 )
+            offset += len(chunk)
         
-        return results
+        if not failed_chunks:
+            status = 'success'
+        elif inserted:
+            status = 'partial'
+        else:
+            status = 'failed'
+        
+        logger.info(
+            f"Bulk insert to {db_name}",
+            table=table,
+            count=inserted,
+            failed_chunks=len(failed_chunks),
+        )
+        return {
+            'status': status,
+            'count': inserted,
+            'chunks': len(chunks),
+            'failed_chunks': failed_chunks,
+        }
 
     def verify_sync_consistency(
         self,
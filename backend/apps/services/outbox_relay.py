@@ -0,0 +1,190 @@
+"""Relay committed sync_outbox rows into the Redis sync stream."""
+from __future__ import annotations
+
+import argparse
+import signal
+import time
+from threading import Event
+
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlalchemy import delete, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+
+from apps.core.database import db_manager
+from apps.core.models import SyncOutbox
+from apps.core.sync_engine import SyncEvent, sync_engine
+
+
+STOP_EVENT = Event()
+OUTBOX_LOCK = "campuswap:sync:outbox"
+
+
+def _handle_shutdown(signum: int, _frame: object) -> None:  # pragma: no cover - signal
+    """Signal handler that stops the relay loop gracefully."""
+
+    logger.warning("Outbox relay received shutdown signal", signal=signum)
+    STOP_EVENT.set()
+
+
+def relay_once(batch_size: int = 500) -> int:
+    """Publish one batch of outbox rows and delete them in the same transaction.
+
+    Only the relay holding the ``OUTBOX_LOCK`` advisory lock claims rows; others
+    return 0 and stand by. With a single active relay rows are published exactly in
+    id order and commit groups are never split between relays. A crash after
+    publishing but before commit re-publishes the batch, which keeps delivery
+    at-least-once. Commit groups cut off by ``batch_size`` are completed from the
+    outbox so every group is published in one piece.
+    """
+
+    with db_manager.get_engine("mysql").connect() as connection:
+        try:
+            if not _try_lock(connection):
+                return 0
+            count = _relay_batch(connection, batch_size)
+            _release_lock(connection)
+        except Exception:
+            # Dropping the physical connection releases the lock with it and keeps a
+            # broken connection out of the pool.
+            connection.invalidate()
+            raise
+    if count:
+        logger.info("Relayed outbox rows", count=count)
+    return count
+
+
+def _relay_batch(connection: Connection, batch_size: int) -> int:
+    """Publish the oldest outbox rows and delete them, committing on ``connection``."""
+
+    outbox = SyncOutbox.__table__
+    rows = connection.execute(select(outbox).order_by(outbox.c.id).limit(batch_size)).all()
+    if not rows:
+        connection.commit()
+        return 0
+    group_ids = {row.group_id for row in rows if row.group_id}
+    if group_ids:
+        rows.extend(
+            connection.execute(
+                select(outbox)
+                .where(
+                    outbox.c.group_id.in_(group_ids),
+                    outbox.c.id.notin_([row.id for row in rows]),
+                )
+                .order_by(outbox.c.id)
+            ).all()
+        )
+        rows.sort(key=lambda row: row.id)
+
+    events = [
+        SyncEvent(
+            table=row.table_name,
+            action=row.action,
+            payload=row.payload,
+            origin=row.origin,
+            occurred_at=row.occurred_at,
+            sync_version=row.sync_version,
+            record_id=row.record_id,
+            group_id=row.group_id,
+        )
+        for row in rows
+    ]
+    sync_engine.publish_events(events)
+    connection.execute(delete(outbox).where(outbox.c.id.in_([row.id for row in rows])))
+    connection.commit()
+    return len(rows)
+
+
+def _try_lock(connection: Connection) -> bool:
+    """Take the relay advisory lock on ``connection`` without waiting."""
+
+    dialect = connection.dialect.name
+    if dialect in ("mysql", "mariadb"):
+        statement = text("SELECT GET_LOCK(:name, 0)")
+    elif dialect == "postgresql":
+        statement = text("SELECT pg_try_advisory_lock(hashtext(:name))")
+    else:
+        # SQLite serialises writers on its own.
+        return True
+    return bool(connection.execute(statement, {"name": OUTBOX_LOCK}).scalar())
+
+
+def _release_lock(connection: Connection) -> None:
+    dialect = connection.dialect.name
+    if dialect in ("mysql", "mariadb"):
+        statement = text("SELECT RELEASE_LOCK(:name)")
+    elif dialect == "postgresql":
+        statement = text("SELECT pg_advisory_unlock(hashtext(:name))")
+    else:
+        return
+    connection.execute(statement, {"name": OUTBOX_LOCK})
+    connection.commit()
+
+
+def relay_outbox(
+    batch_size: int = 500,
+    poll_interval: float = 0.5,
+    max_batches: int | None = None,
+) -> int:
+    """Drain the outbox until stopped, sleeping only when it is empty.
+
+    Redis and database failures are logged and retried after ``poll_interval``; the
+    rows stay in the outbox until a batch is published and deleted.
+    """
+
+    relayed = 0
+    batches = 0
+    while not STOP_EVENT.is_set():
+        try:
+            count = relay_once(batch_size)
+        except RedisError as exc:
+            logger.exception("Outbox relay publish failed", error=str(exc))
+            time.sleep(poll_interval)
+            continue
+        except SQLAlchemyError as exc:
+            logger.exception("Outbox relay database access failed", error=str(exc))
+            time.sleep(poll_interval)
+            continue
+
+        relayed += count
+        batches += 1
+        if max_batches is not None and batches >= max_batches:
+            break
+        if count < batch_size:
+            time.sleep(poll_interval)
+
+    return relayed
+
+
+def run_relay(batch_size: int = 500, poll_interval: float = 0.5) -> None:
+    """Run the outbox relay until interrupted."""
+
+    for sig in (signal.SIGINT, signal.SIGTERM):  # pragma: no cover - runtime hook
+        signal.signal(sig, _handle_shutdown)
+
+    logger.info("Starting outbox relay", batch_size=batch_size, poll_interval=poll_interval)
+    relayed = relay_outbox(batch_size=batch_size, poll_interval=poll_interval)
+    logger.info("Outbox relay stopped", relayed_events=relayed)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Create CLI parser for launching the relay."""
+
+    parser = argparse.ArgumentParser(description="CampuSwap Sync Outbox Relay")
+    parser.add_argument("--batch-size", type=int, default=500, help="Max rows per relay batch")
+    parser.add_argument(
+        "--poll-interval", type=float, default=0.5, help="Seconds to wait when outbox is empty"
+    )
+    return parser
+
+
+def main() -> None:  # pragma: no cover - CLI
+    """Console entry point for the outbox relay."""
+
+    args = _build_parser().parse_args()
+    run_relay(batch_size=args.batch_size, poll_interval=args.poll_interval)
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI bootstrap
+    main()
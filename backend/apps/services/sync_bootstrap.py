@@ -0,0 +1,312 @@
+"""Bulk bootstrap of a new or lagging replica from the MySQL primary.
+
+The bootstrap first records the tail ID of every sync stream, then copies each synced
+table in primary-key ranges read through a server-side cursor, and finally replays the
+streams from the recorded IDs onto the replica so the regular sync worker can carry
+on. Progress is checkpointed in Redis, so an interrupted run resumes where it stopped
+and a rerun after completion only catches up on the stream.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import signal
+import time
+from threading import Event
+from typing import Any, Dict, List, Optional, Sequence
+
+from loguru import logger
+from redis.exceptions import ResponseError
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+from apps.core.database import db_manager
+from apps.core.sync_engine import sync_engine
+from apps.core.sync_upsert import primary_key_columns, upsert_clause, upsert_rows
+from apps.services.sync_manager import DatabaseSyncManager
+
+
+SOURCE = "mysql"
+REPLICA_TARGETS: tuple[str, ...] = ("mariadb", "postgres", "sqlite")
+CHECKPOINT_KEY_PREFIX = "campuswap:sync:bootstrap:"
+STOP_EVENT = Event()
+
+
+def _handle_shutdown(signum: int, _frame: object) -> None:  # pragma: no cover - signal
+    """Signal handler that stops the bootstrap after the current range."""
+
+    logger.warning("Sync bootstrap received shutdown signal", signal=signum)
+    STOP_EVENT.set()
+
+
+def _checkpoint_key(target: str) -> str:
+    return f"{CHECKPOINT_KEY_PREFIX}{target}"
+
+
+def _id_tuple(entry_id: str) -> tuple[int, int]:
+    milliseconds, _, sequence = entry_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+def _stream_tail(stream_key: str) -> str:
+    try:
+        return sync_engine.redis_client.xinfo_stream(stream_key)["last-generated-id"]
+    except ResponseError:  # stream not created yet
+        return "0-0"
+
+
+def record_handoff(target: str) -> Dict[str, str]:
+    """Return the stream IDs the replay starts after, recording them on first use.
+
+    IDs are taken before any row is copied, so every change the copy might miss is
+    still ahead of them in the stream.
+    """
+
+    redis_client = sync_engine.redis_client
+    key = _checkpoint_key(target)
+    stored = redis_client.hgetall(key)
+    handoff = {
+        stream: stored.get(f"handoff:{stream}") or _stream_tail(stream)
+        for stream in sync_engine.stream_keys
+    }
+    redis_client.hset(
+        key, mapping={f"handoff:{stream}": entry_id for stream, entry_id in handoff.items()}
+    )
+    return handoff
+
+
+def _source_tables(tables: Sequence[str]) -> List[str]:
+    inspector = inspect(db_manager.get_engine(SOURCE))
+    present = []
+    for table in tables:
+        if inspector.has_table(table):
+            present.append(table)
+        else:
+            logger.warning("Skipping table missing on primary", table=table)
+    return present
+
+
+def _stage_rows(session: Session, staging: str, columns: List[str], rows: List[tuple]) -> None:
+    """Stream rows into a PostgreSQL staging table with ``COPY FROM STDIN``."""
+
+    raw = session.connection().connection.driver_connection
+    with raw.cursor() as cursor:
+        with cursor.copy(f"COPY {staging} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def copy_range(
+    table: str,
+    target: str,
+    after: Any = None,
+    range_rows: int = 50_000,
+    chunk_rows: int = 5_000,
+) -> tuple[int, Any]:
+    """Copy the next primary-key range of ``table`` into ``target``.
+
+    Rows after ``after`` are streamed from the primary in chunks of ``chunk_rows`` and
+    written in one target transaction: PostgreSQL receives them through ``COPY`` into
+    a staging table followed by a single upsert, MySQL/MariaDB and SQLite through an
+    ``executemany`` upsert, which the MySQL drivers send as multi-row ``INSERT``.
+    Upserts are version-guarded, so rows the live worker already advanced are kept.
+    Returns the number of rows copied and the last primary key of the range.
+    """
+
+    primary_key = primary_key_columns(table)[0]
+    query = f"SELECT * FROM {table}"
+    params: Dict[str, Any] = {"limit": range_rows}
+    if after is not None:
+        query += f" WHERE {primary_key} > :after"
+        params["after"] = after
+    query += f" ORDER BY {primary_key} LIMIT :limit"
+
+    copied = 0
+    last = after
+    with db_manager.session_scope(SOURCE) as source, db_manager.session_scope(target) as replica:
+        result = source.execute(
+            text(query),
+            params,
+            execution_options={"stream_results": True, "yield_per": chunk_rows},
+        )
+        columns = list(result.keys())
+        key_index = columns.index(primary_key)
+        staging: Optional[str] = None
+        if replica.get_bind().dialect.name == "postgresql":
+            staging = f"_bootstrap_{table}"
+            replica.execute(
+                text(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table}) ON COMMIT DROP")
+            )
+
+        for partition in result.partitions():
+            rows = [tuple(row) for row in partition]
+            if staging is not None:
+                _stage_rows(replica, staging, columns, rows)
+            else:
+                upsert_rows(replica, table, [dict(zip(columns, row)) for row in rows])
+            copied += len(rows)
+            last = rows[-1][key_index]
+
+        if staging is not None and copied:
+            column_list = ", ".join(columns)
+            clause = upsert_clause(table, tuple(columns), "postgresql")
+            replica.execute(
+                text(
+                    f"INSERT INTO {table} ({column_list}) "
+                    f"SELECT {column_list} FROM {staging} {clause}"
+                )
+            )
+    return copied, last
+
+
+def copy_table(
+    table: str, target: str, range_rows: int = 50_000, chunk_rows: int = 5_000
+) -> int:
+    """Copy a whole table range by range, checkpointing after each committed range."""
+
+    redis_client = sync_engine.redis_client
+    key = _checkpoint_key(target)
+    if redis_client.hget(key, f"done:{table}"):
+        logger.info("Table already bootstrapped", table=table, target=target)
+        return 0
+
+    stored = redis_client.hget(key, f"table:{table}")
+    after = json.loads(stored) if stored else None
+    total = 0
+    started = time.monotonic()
+    while not STOP_EVENT.is_set():
+        copied, after = copy_range(table, target, after, range_rows, chunk_rows)
+        total += copied
+        if copied < range_rows:
+            redis_client.hset(key, f"done:{table}", "1")
+            break
+        redis_client.hset(key, f"table:{table}", json.dumps(after, default=str))
+        logger.info("Bootstrap range copied", table=table, target=target, rows=total, last=after)
+
+    logger.info(
+        "Bootstrapped table",
+        table=table,
+        target=target,
+        rows=total,
+        seconds=round(time.monotonic() - started, 2),
+    )
+    return total
+
+
+def replay_stream(target: str, handoff: Dict[str, str], batch_size: int = 500) -> int:
+    """Replay every stream entry after its handoff ID onto ``target``.
+
+    Updates and deletes that the copied rows already reflect match nothing and are
+    not reported as conflicts. The handoff IDs advance as batches are applied.
+    """
+
+    redis_client = sync_engine.redis_client
+    key = _checkpoint_key(target)
+    replayed = 0
+    for stream, last_id in handoff.items():
+        try:
+            first_entry = redis_client.xinfo_stream(stream).get("first-entry")
+        except ResponseError:
+            continue
+        if first_entry and _id_tuple(first_entry[0]) > _id_tuple(last_id) and last_id != "0-0":
+            logger.warning(
+                "Stream trimmed past the handoff ID, replica may miss changes",
+                stream=stream,
+                handoff=last_id,
+                first_entry=first_entry[0],
+            )
+
+        while not STOP_EVENT.is_set():
+            entries = redis_client.xrange(stream, min=f"({last_id}", max="+", count=batch_size)
+            if not entries:
+                break
+            events = [sync_engine.decode_event(data) for _, data in entries]
+            results = sync_engine.replicate_batch(events, [target], record_conflicts=False)
+            failed = sum(1 for result in results if target in result and not result[target].ok)
+            if failed:
+                logger.warning("Replay entries failed", stream=stream, target=target, failed=failed)
+            last_id = entries[-1][0]
+            redis_client.hset(key, f"handoff:{stream}", last_id)
+            replayed += len(entries)
+    return replayed
+
+
+def run_bootstrap(
+    target: str,
+    tables: Optional[Sequence[str]] = None,
+    range_rows: int = 50_000,
+    chunk_rows: int = 5_000,
+    batch_size: int = 500,
+    reset: bool = False,
+) -> Dict[str, int]:
+    """Copy the synced tables into ``target`` and hand off to the sync stream."""
+
+    if target not in REPLICA_TARGETS:
+        raise ValueError(f"Unsupported bootstrap target: {target}")
+    if reset:
+        sync_engine.redis_client.delete(_checkpoint_key(target))
+
+    handoff = record_handoff(target)
+    logger.info("Starting sync bootstrap", target=target, handoff=handoff)
+
+    copied: Dict[str, int] = {}
+    for table in _source_tables(sorted(tables or DatabaseSyncManager.SYNC_TABLES)):
+        if STOP_EVENT.is_set():
+            return copied
+        copied[table] = copy_table(table, target, range_rows, chunk_rows)
+
+    replayed = replay_stream(target, handoff, batch_size)
+    if not STOP_EVENT.is_set():
+        sync_engine.redis_client.hset(
+            _checkpoint_key(target), "completed_at", str(int(time.time()))
+        )
+    logger.info(
+        "Sync bootstrap finished",
+        target=target,
+        rows=sum(copied.values()),
+        replayed_events=replayed,
+    )
+    return copied
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Create CLI parser for the bootstrap command."""
+
+    parser = argparse.ArgumentParser(description="CampuSwap Sync Replica Bootstrap")
+    parser.add_argument("target", choices=REPLICA_TARGETS, help="Replica to bootstrap")
+    parser.add_argument(
+        "--table", action="append", dest="tables", help="Only copy this table (repeatable)"
+    )
+    parser.add_argument(
+        "--range-rows", type=int, default=50_000, help="Rows per checkpointed transaction"
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, default=5_000, help="Rows fetched per server-side cursor read"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=500, help="Stream entries per replay batch"
+    )
+    parser.add_argument(
+        "--reset", action="store_true", help="Discard checkpoints and copy everything again"
+    )
+    return parser
+
+
+def main() -> None:  # pragma: no cover - CLI
+    """Console entry point for the bootstrap command."""
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, _handle_shutdown)
+    args = _build_parser().parse_args()
+    run_bootstrap(
+        target=args.target,
+        tables=args.tables,
+        range_rows=args.range_rows,
+        chunk_rows=args.chunk_rows,
+        batch_size=args.batch_size,
+        reset=args.reset,
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI bootstrap
+    main()
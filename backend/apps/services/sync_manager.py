@@ -4,18 +4,23 @@
 from __future__ import annotations
 
 import asyncio
+import math
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Set
 from contextlib import contextmanager
 
 from loguru import logger
-from sqlalchemy import text, select
+from sqlalchemy import bindparam, text, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, DatabaseError
 
+from apps.core.config import get_settings
 from apps.core.database import db_manager
 from apps.core.models import ConflictRecord, SyncLog, SyncConfig
+from apps.core.sync_upsert import primary_key_columns, upsert_rows
 from apps.services.notifications import email_notifier
+from apps.services.sync_verifier import range_verifier
 
 
 class DatabaseSyncManager:
@@ -39,11 +44,32 @@ class DatabaseSyncManager:
         "shopping_cart", "messages", "notifications", "favorites",
         "comments", "search_history", "view_history", "transactions"
     }
+
+    # 同步事件优先级通道（未列出的表走 normal 通道），高优先级通道的事件先被消费
+    # 键为模型的 __tablename__，启动时由 sync_engine.validate_lanes 校验
+    SYNC_TABLE_PRIORITIES = {
+        "transactions": "critical",
+        "payments": "critical",
+        "cart_items": "bulk",
+        "search_history": "bulk",
+    }
+    
+    # 客户端在服务端超时之后再多等待的秒数，让数据库先中止语句并返回真实结果
+    WRITE_TIMEOUT_GRACE = 2.0
     
-    def __init__(self):
+    def __init__(self, write_timeout: Optional[float] = None):
         self.success_count = 0
         self.failure_count = 0
         self.conflict_count = 0
+        # 同步数据库驱动在专用线程池中执行，避免阻塞事件循环
+        self.write_timeout = (
+            write_timeout if write_timeout is not None
+            else get_settings().sync_write_timeout_seconds
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.DB_PRIORITY) * 4,
+            thread_name_prefix="sync-write"
+        )
         
     async def sync_write(
         self,
@@ -70,9 +96,10 @@ class DatabaseSyncManager:
             logger.warning(f"Table {table} is not in sync list, skipping sync")
             return {"status": "skipped", "reason": "table not in sync list"}
         
-        # 添加版本号（乐观锁）
+        # 未提供版本号时，由主库写入在同一事务中读取并传递给其他数据库（乐观锁）
+        version_future: Optional[Future] = None
         if action in ["update", "delete"] and "version" not in data:
-            data["version"] = await self._get_current_version(table, record_id)
+            version_future = Future()
         
         # 添加更新时间
         if action in ["insert", "update"]:
@@ -80,36 +107,25 @@ class DatabaseSyncManager:
             if action == "insert":
                 data["created_at"] = datetime.utcnow()
         
-        # 并行写入四个数据库
-        results = {}
-        tasks = []
-        
-        for db_name in self.DB_PRIORITY:
-            task = self._write_to_database(
-                db_name=db_name,
-                table=table,
-                action=action,
-                data=data,
-                record_id=record_id
+        # 并发写入四个数据库（每个数据库独立超时）
+        outcomes = await asyncio.gather(
+            *(
+                self._write_to_database(
+                    db_name=db_name,
+                    table=table,
+                    action=action,
+                    data=dict(data),
+                    record_id=record_id,
+                    version_future=version_future
+                )
+                for db_name in self.DB_PRIORITY
             )
-            tasks.append((db_name, task))
-        
-        # 执行并行写入
-        for db_name, task in tasks:
-            try:
-                result = await task
-                results[db_name] = result
-                if result["success"]:
-                    self.success_count += 1
-                else:
-                    self.failure_count += 1
-            except Exception as e:
-                logger.error(f"Failed to sync to {db_name}: {str(e)}")
-                results[db_name] = {
-                    "success": False,
-                    "error": str(e),
-                    "timestamp": datetime.utcnow()
-                }
+        )
+        results = dict(zip(self.DB_PRIORITY, outcomes))
+        for result in outcomes:
+            if result["success"]:
+                self.success_count += 1
+            else:
                 self.failure_count += 1
         
         # 检测冲突
@@ -140,22 +156,65 @@ class DatabaseSyncManager:
         table: str,
         action: str,
         data: Dict[str, Any],
-        record_id: Optional[int]
+        record_id: Optional[int],
+        version_future: Optional[Future] = None
     ) -> Dict[str, Any]:
         """
         向单个数据库写入数据
+        
+        阻塞的数据库调用在线程池中执行。write_timeout 同时设置为会话的服务端超时，
+        由数据库中止超时的语句；客户端多等待 WRITE_TIMEOUT_GRACE 秒仍无结果才放弃，
+        此时写入结果未知
         """
+        loop = asyncio.get_running_loop()
         try:
-            with db_manager.session_scope(db_name) as session:
+            return await asyncio.wait_for(
+                loop.run_in_executor(
+                    self._executor,
+                    self._write_blocking,
+                    db_name, table, action, data, record_id, version_future
+                ),
+                timeout=self.write_timeout + self.WRITE_TIMEOUT_GRACE
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Database write timed out on {db_name}.{table}, outcome unknown")
+            return {
+                "success": False,
+                "error": f"timed out after {self.write_timeout}s, outcome unknown",
+                "db": db_name,
+                "timestamp": datetime.utcnow()
+            }
+    
+    def _write_blocking(
+        self,
+        db_name: str,
+        table: str,
+        action: str,
+        data: Dict[str, Any],
+        record_id: Optional[int],
+        version_future: Optional[Future]
+    ) -> Dict[str, Any]:
+        """在工作线程中执行单个数据库的写入事务"""
+        try:
+            # 固定一个连接，保证超时设置与恢复作用在同一连接上（写入中途会 commit）
+            with db_manager.get_engine(db_name).connect() as connection, \
+                    db_manager.session_scope(db_name, bind=connection) as session, \
+                    self._write_deadline(session):
+                if version_future is not None:
+                    data["version"] = self._resolve_version(
+                        session, db_name, table, record_id, version_future
+                    )
                 if action == "insert":
-                    return await self._execute_insert(session, table, data)
+                    return self._execute_insert(session, table, data)
                 elif action == "update":
-                    return await self._execute_update(session, table, data, record_id)
+                    return self._execute_update(session, table, data, record_id)
                 elif action == "delete":
-                    return await self._execute_delete(session, table, record_id, data.get("version"))
+                    return self._execute_delete(session, table, record_id, data.get("version"))
                 else:
                     raise ValueError(f"Unknown action: {action}")
         except Exception as e:
+            if version_future is not None and not version_future.done():
+                version_future.set_exception(e)
             logger.error(f"Database write error on {db_name}.{table}: {str(e)}")
             return {
                 "success": False,
@@ -164,7 +223,50 @@ class DatabaseSyncManager:
                 "timestamp": datetime.utcnow()
             }
     
-    async def _execute_insert(
+    @contextmanager
+    def _write_deadline(self, session: Session):
+        """
+        为写入会话设置服务端超时
+        
+        PostgreSQL 使用 SET LOCAL statement_timeout（随事务结束失效）；MySQL 设置
+        innodb_lock_wait_timeout，MariaDB 另设 max_statement_time，结束后恢复连接原有的
+        会话值（含 configure_engine_isolation 设置的锁超时），避免影响连接池中的其他会话；
+        恢复失败时记录日志并作废该连接，不掩盖写入本身的异常；SQLite 设置 busy_timeout
+        """
+        dialect = session.get_bind().dialect
+        millis = max(1, int(self.write_timeout * 1000))
+        if dialect.name == "postgresql":
+            session.execute(text(f"SET LOCAL statement_timeout = {millis}"))
+            yield
+            return
+        if dialect.name == "sqlite":
+            session.execute(text(f"PRAGMA busy_timeout = {millis}"))
+            yield
+            return
+        
+        limits = {"innodb_lock_wait_timeout": max(1, math.ceil(self.write_timeout))}
+        if getattr(dialect, "is_mariadb", False):
+            limits["max_statement_time"] = self.write_timeout
+        connection = session.connection()
+        current = ", ".join(f"@@SESSION.{name}" for name in limits)
+        previous = dict(zip(limits, session.execute(text(f"SELECT {current}")).one()))
+        assignments = ", ".join(f"SESSION {name} = {value}" for name, value in limits.items())
+        session.execute(text(f"SET {assignments}"))
+        try:
+            yield
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            restore = ", ".join(f"SESSION {name} = {value}" for name, value in previous.items())
+            try:
+                session.execute(text(f"SET {restore}"))
+            except Exception as exc:
+                # 连接带着缩短的超时回到连接池会影响后续会话，直接作废
+                logger.warning(f"Failed to restore session timeouts, dropping connection: {exc}")
+                connection.invalidate()
+    
+    def _execute_insert(
         self,
         session: Session,
         table: str,
@@ -189,7 +291,7 @@ class DatabaseSyncManager:
             "timestamp": datetime.utcnow()
         }
     
-    async def _execute_update(
+    def _execute_update(
         self,
         session: Session,
         table: str,
@@ -234,7 +336,7 @@ class DatabaseSyncManager:
             "timestamp": datetime.utcnow()
         }
     
-    async def _execute_delete(
+    def _execute_delete(
         self,
         session: Session,
         table: str,
@@ -271,17 +373,30 @@ class DatabaseSyncManager:
             "timestamp": datetime.utcnow()
         }
     
-    async def _get_current_version(self, table: str, record_id: int) -> int:
-        """从主库获取当前版本号"""
-        try:
-            with db_manager.session_scope("mysql") as session:
-                query = f"SELECT version FROM {table} WHERE id = :id"
-                result = session.execute(text(query), {"id": record_id})
-                row = result.fetchone()
-                return row[0] if row else 0
-        except Exception as e:
-            logger.error(f"Failed to get version for {table}.{record_id}: {str(e)}")
-            return 0
+    def _resolve_version(
+        self,
+        session: Session,
+        db_name: str,
+        table: str,
+        record_id: Optional[int],
+        version_future: Future
+    ) -> int:
+        """
+        获取乐观锁版本号
+        
+        主库在写入事务内加锁读取当前版本号并发布给其他数据库，
+        其他数据库等待该结果，省去一次单独的主库查询
+        """
+        if db_name != self.DB_PRIORITY[0]:
+            return version_future.result(timeout=self.write_timeout)
+        
+        query = f"SELECT version FROM {table} WHERE id = :id"
+        if session.get_bind().dialect.name != "sqlite":
+            query += " FOR UPDATE"
+        row = session.execute(text(query), {"id": record_id}).fetchone()
+        version = row[0] if row else 0
+        version_future.set_result(version)
+        return version
     
     async def _detect_conflicts(
         self,
@@ -461,6 +576,27 @@ class DatabaseSyncManager:
             "timestamp": datetime.utcnow()
         }
     
+    async def verify_table_consistency(
+        self,
+        table: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        content: bool = True
+    ) -> Dict[str, Any]:
+        """
+        全表一致性验证
+        
+        默认按主键区间比较每行规范化内容的哈希摘要，能发现版本号相同但内容不同的记录；
+        content=False 时只比较 (id, sync_version) 聚合，开销更小但只能发现缺失行和版本差异
+        """
+        if table not in self.SYNC_TABLES:
+            raise ValueError(f"Table {table} is not configured for sync")
+        
+        report = await asyncio.to_thread(
+            range_verifier.verify_table, table, self.DB_PRIORITY, start, end, content
+        )
+        return {**report.as_dict(), "timestamp": datetime.utcnow()}
+    
     async def sync_repair(
         self,
         table: str,
@@ -493,17 +629,8 @@ class DatabaseSyncManager:
             for db_name in self.DB_PRIORITY[1:]:  # 跳过MySQL
                 try:
                     with db_manager.session_scope(db_name) as session:
-                        # 先尝试删除
-                        session.execute(
-                            text(f"DELETE FROM {table} WHERE id = :id"),
-                            {"id": record_id}
-                        )
-                        
-                        # 重新插入
-                        columns = ", ".join(data.keys())
-                        placeholders = ", ".join([f":{key}" for key in data.keys()])
-                        query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-                        session.execute(text(query), data)
+                        # 以主库数据强制覆盖（原生 upsert，不受版本号保护）
+                        upsert_rows(session, table, [data], guarded=False)
                         session.commit()
                         
                         repair_results[db_name] = {"success": True}
@@ -521,6 +648,180 @@ class DatabaseSyncManager:
             logger.error(f"Sync repair failed: {str(e)}")
             return {"success": False, "error": str(e)}
     
+    async def sync_repair_bulk(
+        self,
+        table: str,
+        record_ids: Optional[List[int]] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        targets: Optional[List[str]] = None,
+        chunk_size: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        批量同步修复
+        
+        按ID列表或主键区间 [start, end) 分块读取主库（MySQL）数据，
+        每个分块以原生 upsert 并行写入各目标库，并删除主库中已不存在的记录
+        """
+        if table not in self.SYNC_TABLES:
+            raise ValueError(f"Table {table} is not configured for sync")
+        if record_ids is None and start is None and end is None:
+            raise ValueError("Either record_ids or a key range is required")
+        
+        targets = targets or self.DB_PRIORITY[1:]
+        unknown = set(targets) - set(self.DB_PRIORITY[1:])
+        if unknown:
+            raise ValueError(f"Unknown repair targets: {', '.join(sorted(unknown))}")
+        
+        primary_key = primary_key_columns(table)[0]
+        upserted = {db_name: 0 for db_name in targets}
+        deleted = {db_name: 0 for db_name in targets}
+        errors: Dict[str, str] = {}
+        chunks = 0
+        
+        # 主库分块读取与目标库写入都是阻塞调用，均放到线程池执行，不占用事件循环
+        reader = self._primary_chunks(table, primary_key, record_ids, start, end, chunk_size)
+        while True:
+            chunk = await asyncio.to_thread(next, reader, None)
+            if chunk is None:
+                break
+            rows, scope = chunk
+            chunks += 1
+            active = [db_name for db_name in targets if db_name not in errors]
+            outcomes = await asyncio.gather(
+                *(
+                    asyncio.to_thread(
+                        self._repair_chunk, db_name, table, primary_key, rows, scope
+                    )
+                    for db_name in active
+                ),
+                return_exceptions=True
+            )
+            for db_name, outcome in zip(active, outcomes):
+                if isinstance(outcome, Exception):
+                    # 后续分块不再写入失败的目标库，已提交的分块保持有效
+                    logger.error(f"Bulk repair failed on {db_name}: {str(outcome)}")
+                    errors[db_name] = str(outcome)
+                    continue
+                upserted[db_name] += outcome[0]
+                deleted[db_name] += outcome[1]
+        
+        logger.info(
+            "Bulk sync repair finished",
+            table=table,
+            chunks=chunks,
+            upserted=upserted,
+            deleted=deleted
+        )
+        return {
+            "success": not errors,
+            "repaired_dbs": [db_name for db_name in targets if db_name not in errors],
+            "chunks": chunks,
+            "upserted": upserted,
+            "deleted": deleted,
+            "errors": errors,
+            "timestamp": datetime.utcnow()
+        }
+    
+    def _primary_chunks(
+        self,
+        table: str,
+        primary_key: str,
+        record_ids: Optional[List[int]],
+        start: Optional[int],
+        end: Optional[int],
+        chunk_size: int
+    ):
+        """
+        分块读取主库记录
+        
+        产出 (rows, scope)：scope 为 ("ids", 本块请求的ID) 或 ("range", 下界, 上界)，
+        边界形如 (比较符, 主键值)，用于在目标库中删除主库已不存在的记录
+        """
+        if record_ids is not None:
+            unique_ids = sorted(set(record_ids))
+            query = text(
+                f"SELECT * FROM {table} WHERE {primary_key} IN :ids"
+            ).bindparams(bindparam("ids", expanding=True))
+            for offset in range(0, len(unique_ids), chunk_size):
+                ids = unique_ids[offset:offset + chunk_size]
+                with db_manager.session_scope("mysql") as session:
+                    rows = [dict(row) for row in session.execute(query, {"ids": ids}).mappings()]
+                yield rows, ("ids", ids)
+            return
+        
+        conditions = []
+        params: Dict[str, Any] = {"limit": chunk_size}
+        if start is not None:
+            conditions.append(f"{primary_key} >= :start")
+            params["start"] = start
+        if end is not None:
+            conditions.append(f"{primary_key} < :end")
+            params["end"] = end
+        
+        lower = (">=", start) if start is not None else None
+        while True:
+            where = list(conditions)
+            if "after" in params:
+                where.append(f"{primary_key} > :after")
+            query = f"SELECT * FROM {table}"
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            query += f" ORDER BY {primary_key} LIMIT :limit"
+            with db_manager.session_scope("mysql") as session:
+                rows = [dict(row) for row in session.execute(text(query), params).mappings()]
+            
+            if len(rows) < chunk_size:
+                # 最后一块覆盖到区间终点，清理目标库多出的尾部记录
+                yield rows, ("range", lower, ("<", end) if end is not None else None)
+                return
+            upper = rows[-1][primary_key]
+            yield rows, ("range", lower, ("<=", upper))
+            params["after"] = upper
+            lower = (">", upper)
+    
+    def _repair_chunk(
+        self,
+        db_name: str,
+        table: str,
+        primary_key: str,
+        rows: List[Dict[str, Any]],
+        scope: tuple
+    ) -> tuple[int, int]:
+        """在一个目标库事务中写入一个分块，返回 (upsert行数, 删除行数)"""
+        present = [row[primary_key] for row in rows]
+        with db_manager.session_scope(db_name) as session:
+            upsert_rows(session, table, rows, guarded=False)
+            
+            if scope[0] == "ids":
+                missing = sorted(set(scope[1]) - set(present))
+                if not missing:
+                    return len(rows), 0
+                statement = text(
+                    f"DELETE FROM {table} WHERE {primary_key} IN :ids"
+                ).bindparams(bindparam("ids", expanding=True))
+                removed = session.execute(statement, {"ids": missing}).rowcount
+                return len(rows), removed
+            
+            _, lower, upper = scope
+            conditions = []
+            params: Dict[str, Any] = {}
+            for name, bound in (("lower", lower), ("upper", upper)):
+                if bound is not None:
+                    conditions.append(f"{primary_key} {bound[0]} :{name}")
+                    params[name] = bound[1]
+            statement = f"DELETE FROM {table}"
+            if present:
+                conditions.append(f"{primary_key} NOT IN :present")
+            if conditions:
+                statement += " WHERE " + " AND ".join(conditions)
+            query = text(statement)
+            if present:
+                query = query.bindparams(bindparam("present", expanding=True))
+                params["present"] = present
+            removed = session.execute(query, params).rowcount
+            return len(rows), removed
+    
     def get_stats(self) -> Dict[str, Any]:
         """获取同步统计信息"""
         return {
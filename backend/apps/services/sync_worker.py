@@ -2,30 +2,46 @@
 from __future__ import annotations
 
 import argparse
+import json
+import multiprocessing
 import os
 import signal
 import socket
 import time
-from threading import Event
-from typing import Iterable
+from dataclasses import dataclass, field, replace
+from threading import Event, Thread
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
 
 from loguru import logger
 from redis.exceptions import RedisError, ResponseError
 
-from apps.core.sync_engine import SyncEvent, sync_engine
+from apps.core.sync_engine import (
+    LANE_WEIGHTS,
+    ReplicationError,
+    ReplicationResult,
+    SyncEvent,
+    _group_units,
+    late_applied_key,
+    sync_engine,
+)
+from apps.core.sync_conflicts import conflict_recorder
+from apps.core.sync_metrics import worker_metrics
 
 
 ALL_TARGETS: tuple[str, ...] = ("mysql", "mariadb", "postgres", "sqlite")
+DEAD_LETTER_STREAM = "campuswap:sync:dead"
+# Targets that already applied a failed entry, keyed by "<stream>:<entry id>".
+PROGRESS_KEY = "campuswap:sync:progress"
 STOP_EVENT = Event()
 
 
-def _ensure_consumer_group(group_name: str) -> None:
+def _ensure_consumer_group(group_name: str, stream_key: str) -> None:
     """Create Redis consumer group if it does not exist."""
 
     redis_client = sync_engine.redis_client
     try:
         redis_client.xgroup_create(
-            sync_engine.stream_key,
+            stream_key,
             group_name,
             id="0-0",
             mkstream=True,
@@ -33,19 +49,106 @@ def _ensure_consumer_group(group_name: str) -> None:
         logger.info(
             "Created Redis consumer group",
             group=group_name,
-            stream=sync_engine.stream_key,
+            stream=stream_key,
         )
     except ResponseError as exc:  # group already exists
         if "BUSYGROUP" in str(exc):
             logger.debug(
                 "Redis consumer group already exists",
                 group=group_name,
-                stream=sync_engine.stream_key,
+                stream=stream_key,
             )
         else:  # pragma: no cover - unexpected redis error
             raise
 
 
+def _streams_for_process(process_index: int, processes: int) -> List[str]:
+    """Return the stream partitions owned by one of ``processes`` worker processes.
+
+    A process owns the same shards in every priority lane.
+    """
+
+    return [
+        sync_engine.shard_stream_key(shard, lane)
+        for lane in sync_engine.lanes
+        for shard in range(sync_engine.shard_count)
+        if shard % processes == process_index
+    ]
+
+
+def _lane_streams(stream_keys: Sequence[str]) -> Dict[str, List[str]]:
+    """Group stream keys by priority lane, most critical lane first."""
+
+    lanes: Dict[str, List[str]] = {lane: [] for lane in LANE_WEIGHTS}
+    for stream_key in stream_keys:
+        lanes[sync_engine.lane_of(stream_key)].append(stream_key)
+    return {lane: keys for lane, keys in lanes.items() if keys}
+
+
+def _lane_counts(lanes: Dict[str, List[str]], count: int) -> Dict[str, int]:
+    """Split a read ``count`` between lanes by weight; the top lane reads it in full."""
+
+    top = max(LANE_WEIGHTS[lane] for lane in lanes)
+    return {lane: max(1, count * LANE_WEIGHTS[lane] // top) for lane in lanes}
+
+
+def _by_lane(entries: List[StreamEntry]) -> List[List[StreamEntry]]:
+    """Split entries into per-lane batches, most critical lane first."""
+
+    batches: Dict[str, List[StreamEntry]] = {lane: [] for lane in LANE_WEIGHTS}
+    for entry in entries:
+        batches[sync_engine.lane_of(entry.stream)].append(entry)
+    return [batch for batch in batches.values() if batch]
+
+
+def _read_lanes(
+    group_name: str,
+    consumer_name: str,
+    stream_keys: Sequence[str],
+    read_id: str,
+    count: int,
+    block_ms: int,
+) -> List[Any]:
+    """Read entries with weighted fairness between priority lanes.
+
+    Each lane gets a non-blocking read of its share of ``count``, most critical lane
+    first, so a flood of bulk entries cannot crowd out critical ones. Only when every
+    lane is empty does the worker block on all streams at once.
+    """
+
+    redis_client = sync_engine.redis_client
+    lanes = _lane_streams(stream_keys)
+    if len(lanes) == 1:
+        return redis_client.xreadgroup(
+            group_name,
+            consumer_name,
+            {stream_key: read_id for stream_key in stream_keys},
+            count=count,
+            block=block_ms,
+        )
+
+    response: List[Any] = []
+    for lane, lane_count in _lane_counts(lanes, count).items():
+        response.extend(
+            redis_client.xreadgroup(
+                group_name,
+                consumer_name,
+                {stream_key: read_id for stream_key in lanes[lane]},
+                count=lane_count,
+            )
+            or []
+        )
+    if response or read_id != ">":
+        return response
+    return redis_client.xreadgroup(
+        group_name,
+        consumer_name,
+        {stream_key: read_id for stream_key in stream_keys},
+        count=count,
+        block=block_ms,
+    )
+
+
 def _handle_shutdown(signum: int, _frame: object) -> None:  # pragma: no cover - signal
     """Signal handler that stops the worker loop gracefully."""
 
@@ -53,32 +156,635 @@ def _handle_shutdown(signum: int, _frame: object) -> None:  # pragma: no cover -
     STOP_EVENT.set()
 
 
+@dataclass
+class StreamEntry:
+    """A decoded stream entry waiting to be replicated and acknowledged."""
+
+    stream: str
+    entry_id: str
+    event: SyncEvent
+    coalesced_ids: List[str] = field(default_factory=list)
+    deliveries: int = 1
+
+    @property
+    def entry_ids(self) -> List[str]:
+        """Stream IDs settled by this entry, including updates folded into it."""
+
+        return [*self.coalesced_ids, self.entry_id]
+
+
+def _targets_for(event: SyncEvent) -> tuple[str, ...]:
+    """Return every database except the one the event originated from."""
+
+    return tuple(target for target in ALL_TARGETS if target != event.origin)
+
+
+class AdaptiveBatchSizer:
+    """Choose the XREADGROUP ``count`` from measured apply time and backlog.
+
+    A full read means entries are queued behind it, so the count doubles while a
+    batch still applies within ``target_seconds``. A slow batch shrinks the count in
+    proportion, and a mostly empty read lets it decay back towards ``minimum``.
+    """
+
+    def __init__(
+        self,
+        initial: int = 100,
+        minimum: int = 10,
+        maximum: int = 1000,
+        target_seconds: float = 0.5,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.target_seconds = target_seconds
+        self.current = min(max(initial, self.minimum), self.maximum)
+
+    def observe(self, read: int, elapsed: float) -> int:
+        """Record a batch of ``read`` entries applied in ``elapsed`` seconds."""
+
+        if elapsed > self.target_seconds and read:
+            size = int(self.current * self.target_seconds / elapsed)
+        elif read >= self.current:
+            size = self.current * 2
+        elif read < self.current // 4:
+            size = self.current - self.current // 4
+        else:
+            size = self.current
+        self.current = min(max(size, self.minimum), self.maximum)
+        worker_metrics.set_gauge("batch_size", self.current)
+        return self.current
+
+
+class CommitGroupGate:
+    """Hold stream entries back until every member of their commit group arrived.
+
+    A stream is released up to its first incomplete group and the entries behind it
+    wait, preserving stream order. A group still incomplete after ``timeout`` seconds,
+    e.g. because its publisher died half-way, is released with the members it has.
+    """
+
+    def __init__(self, timeout: float = 5.0) -> None:
+        self.timeout = timeout
+        self._held: Dict[str, List[StreamEntry]] = {}
+        self._waiting: Dict[str, tuple[str, float]] = {}
+
+    @property
+    def holding(self) -> bool:
+        return any(self._held.values())
+
+    def release(self, entries: List[StreamEntry]) -> List[StreamEntry]:
+        """Add newly read entries and return those whose groups are complete."""
+
+        by_stream = self._held
+        self._held = {}
+        for entry in entries:
+            by_stream.setdefault(entry.stream, []).append(entry)
+
+        now = time.monotonic()
+        ready: List[StreamEntry] = []
+        for stream_key, stream_entries in by_stream.items():
+            cut = _first_incomplete_group(stream_entries)
+            if cut is None:
+                self._waiting.pop(stream_key, None)
+                ready.extend(stream_entries)
+                continue
+
+            group_id = stream_entries[cut].event.group_id or ""
+            waiting_for, since = self._waiting.get(stream_key, (group_id, now))
+            if waiting_for != group_id:
+                since = now
+            if now - since >= self.timeout:
+                logger.warning(
+                    "Releasing incomplete commit group", stream=stream_key, group_id=group_id
+                )
+                self._waiting.pop(stream_key, None)
+                ready.extend(stream_entries)
+                continue
+
+            self._waiting[stream_key] = (group_id, since)
+            ready.extend(stream_entries[:cut])
+            self._held[stream_key] = stream_entries[cut:]
+        return ready
+
+
+def _first_incomplete_group(entries: List[StreamEntry]) -> Optional[int]:
+    """Return the position of the first entry whose commit group is still missing members."""
+
+    counts: Dict[str, int] = {}
+    for entry in entries:
+        if entry.event.group_id and entry.event.group_size > 1:
+            counts[entry.event.group_id] = counts.get(entry.event.group_id, 0) + 1
+    for index, entry in enumerate(entries):
+        event = entry.event
+        if event.group_id and event.group_size > 1 and counts[event.group_id] < event.group_size:
+            return index
+    return None
+
+
+def _decode_entry(
+    stream_key: str, entry_id: str, payload: Dict[str, Any], group_name: str, deliveries: int = 1
+) -> Optional[StreamEntry]:
+    """Decode one stream entry, dead-lettering it when it cannot be parsed."""
+
+    try:
+        event = sync_engine.decode_event(payload)
+    except Exception as exc:  # pragma: no cover - defensive catch
+        logger.exception("Failed to decode sync event", event_id=entry_id, error=str(exc))
+        _dead_letter(stream_key, entry_id, payload, group_name, f"decode failed: {exc}", deliveries)
+        return None
+    return StreamEntry(stream_key, entry_id, event, deliveries=deliveries)
+
+
+def _decode_entries(response: list, group_name: str, deliveries: int = 1) -> List[StreamEntry]:
+    """Decode a XREADGROUP response, dead-lettering entries that cannot be parsed."""
+
+    entries: List[StreamEntry] = []
+    for stream_key, events in response:
+        for event_id, payload in events:
+            entry = _decode_entry(stream_key, event_id, payload, group_name, deliveries)
+            if entry is not None:
+                entries.append(entry)
+    return entries
+
+
+def _dead_letter(
+    stream_key: str,
+    entry_id: str,
+    payload: Dict[str, Any],
+    group_name: str,
+    reason: str,
+    deliveries: int,
+) -> None:
+    """Copy an entry to the dead-letter stream and acknowledge it atomically."""
+
+    fields = dict(payload)
+    fields.update(
+        {
+            "dead_stream": stream_key,
+            "dead_entry_id": entry_id,
+            "dead_reason": reason[:500],
+            "dead_deliveries": deliveries,
+        }
+    )
+    pipeline = sync_engine.redis_client.pipeline()
+    pipeline.xadd(DEAD_LETTER_STREAM, fields)
+    pipeline.xack(stream_key, group_name, entry_id)
+    pipeline.hdel(PROGRESS_KEY, _progress_field(stream_key, entry_id))
+    pipeline.execute()
+    logger.error(
+        "Moved sync event to dead-letter stream",
+        stream=stream_key,
+        event_id=entry_id,
+        reason=reason,
+        deliveries=deliveries,
+    )
+
+
+def _progress_field(stream_key: str, entry_id: str) -> str:
+    return f"{stream_key}:{entry_id}"
+
+
+def _load_progress(entries: List[StreamEntry]) -> List[Set[str]]:
+    """Return, per entry, the targets that already applied it.
+
+    These are the targets the writer replicated to synchronously, those that
+    finished the writer's replication after it published the entry, and those that
+    succeeded on an earlier delivery.
+    """
+
+    done: List[Set[str]] = [set(entry.event.applied_targets) for entry in entries]
+    retried = [index for index, entry in enumerate(entries) if entry.deliveries > 1]
+    handed_off = [index for index, entry in enumerate(entries) if entry.event.applied_targets]
+    if not retried and not handed_off:
+        return done
+
+    pipeline = sync_engine.redis_client.pipeline(transaction=False)
+    lookups: List[List[int]] = []
+    if retried:
+        pipeline.hmget(
+            PROGRESS_KEY,
+            [_progress_field(entries[index].stream, entries[index].entry_id) for index in retried],
+        )
+        lookups.append(retried)
+    if handed_off:
+        pipeline.mget(
+            [
+                late_applied_key(entries[index].stream, entries[index].entry_id)
+                for index in handed_off
+            ]
+        )
+        lookups.append(handed_off)
+    for indexes, values in zip(lookups, pipeline.execute()):
+        for index, raw in zip(indexes, values):
+            if raw:
+                done[index].update(json.loads(raw))
+    return done
+
+
+def _read_window(
+    group_name: str,
+    consumer_name: str,
+    stream_keys: Sequence[str],
+    response: list,
+    window_ms: int,
+    window_max: int,
+) -> list:
+    """Keep reading new entries after ``response`` until the window closes.
+
+    The window closes after ``window_ms`` milliseconds or once ``window_max`` entries
+    have been collected, whichever comes first.
+    """
+
+    response = list(response)
+    total = sum(len(events) for _, events in response)
+    deadline = time.monotonic() + window_ms / 1000
+    while total < window_max and not STOP_EVENT.is_set():
+        remaining_ms = int((deadline - time.monotonic()) * 1000)
+        if remaining_ms <= 0:
+            break
+        more = sync_engine.redis_client.xreadgroup(
+            group_name,
+            consumer_name,
+            {stream_key: ">" for stream_key in stream_keys},
+            count=window_max - total,
+            block=remaining_ms,
+        )
+        if not more:
+            break
+        response.extend(more)
+        total += sum(len(events) for _, events in more)
+    return response
+
+
+def _coalesce_updates(entries: List[StreamEntry]) -> List[StreamEntry]:
+    """Collapse successive updates of one record into its latest row image.
+
+    Only consecutive updates of a ``(table, record_id)`` that share a statement are
+    merged; an insert or delete of the record closes the run, so their ordering is
+    untouched. Members of a commit group are never merged so groups stay atomic, and
+    neither are updates the writer already applied to some targets synchronously.
+    The merged update keeps the first update's ``where_sync_version`` guard
+    with the last update's row image and ``sync_version``, and takes the last update's
+    position in the batch.
+    """
+
+    merged: List[Optional[StreamEntry]] = []
+    open_runs: Dict[tuple[str, str], int] = {}
+    for entry in entries:
+        event = entry.event
+        if not event.record_id:
+            merged.append(entry)
+            continue
+        key = (event.table, event.record_id)
+        if event.action != "update" or event.group_id or event.applied_targets:
+            open_runs.pop(key, None)
+            merged.append(entry)
+            continue
+
+        index = open_runs.get(key)
+        if index is not None:
+            previous = merged[index]
+            statement = event.payload["statement"]
+            if previous is not None and previous.event.payload["statement"] == statement:
+                merged[index] = None
+                entry = _merge_updates(previous, entry)
+        open_runs[key] = len(merged)
+        merged.append(entry)
+
+    return [entry for entry in merged if entry is not None]
+
+
+def _merge_updates(first: StreamEntry, latest: StreamEntry) -> StreamEntry:
+    """Fold ``first`` into ``latest`` while keeping the first optimistic-lock guard."""
+
+    params = dict(latest.event.payload.get("params", {}))
+    first_params = first.event.payload.get("params", {})
+    if "where_sync_version" in first_params:
+        params["where_sync_version"] = first_params["where_sync_version"]
+    event = replace(latest.event, payload={**latest.event.payload, "params": params})
+    return StreamEntry(
+        latest.stream,
+        latest.entry_id,
+        event,
+        coalesced_ids=first.entry_ids,
+        deliveries=max(first.deliveries, latest.deliveries),
+    )
+
+
+def _apply_each(
+    entries: List[StreamEntry], done: List[Set[str]]
+) -> List[Dict[str, ReplicationResult]]:
+    """Replicate entries one at a time, each in its own transaction per target.
+
+    Members of a commit group are applied together in one transaction per target.
+    """
+
+    outcomes: List[Dict[str, ReplicationResult]] = [{} for _ in entries]
+    for unit in _group_units([entry.event for entry in entries], list(range(len(entries)))):
+        if len(unit) > 1:
+            results = sync_engine.replicate_batch(
+                [entries[index].event for index in unit],
+                ALL_TARGETS,
+                skip_targets=[done[index] for index in unit],
+            )
+            for index, event_results in zip(unit, results):
+                outcomes[index] = event_results
+            continue
+
+        entry, skip = entries[unit[0]], done[unit[0]]
+        targets = [target for target in _targets_for(entry.event) if target not in skip]
+        try:
+            results = sync_engine.replicate(entry.event, targets)
+        except ReplicationError as exc:
+            results = exc.results
+        except Exception as exc:  # pragma: no cover - defensive catch
+            logger.exception(
+                "Failed to process sync event",
+                event_id=entry.entry_id,
+                error=str(exc),
+            )
+            results = {
+                target: ReplicationResult(target=target, error=str(exc)) for target in targets
+            }
+        else:
+            logger.info(
+                "Replicated event",
+                stream=entry.stream,
+                event_id=entry.entry_id,
+                rowcounts={target: result.rowcount for target, result in results.items()},
+                conflicts=[target for target, result in results.items() if result.conflict],
+            )
+        outcomes[unit[0]] = results
+    return outcomes
+
+
+def _apply_batch(
+    entries: List[StreamEntry], done: List[Set[str]]
+) -> List[Dict[str, ReplicationResult]]:
+    """Replicate a whole batch with one transaction per target."""
+
+    if not entries:
+        return []
+
+    outcomes = sync_engine.replicate_batch(
+        [entry.event for entry in entries], ALL_TARGETS, skip_targets=done
+    )
+    logger.info("Replicated event batch", events=len(entries))
+    return outcomes
+
+
+def _settle(
+    entries: List[StreamEntry],
+    outcomes: List[Dict[str, ReplicationResult]],
+    done: List[Set[str]],
+    group_name: str,
+) -> int:
+    """Acknowledge fully applied entries and return how many there were.
+
+    Failed entries stay pending so the recovery loop can claim and retry them. The
+    targets they already reached are remembered and skipped on the next attempt.
+    Later entries for the record of a failed entry stay pending as well, so the
+    retry cannot land after them and leave the older row image behind.
+    """
+
+    pipeline = sync_engine.redis_client.pipeline(transaction=False)
+    applied: List[StreamEntry] = []
+    blocked: Set[tuple[str, str]] = set()
+    for entry, results, skip in zip(entries, outcomes, done):
+        reached = {target for target, result in results.items() if result.ok}
+        worker_metrics.record_apply(entry.event.occurred_at, sorted(reached))
+        failed = {target: result.error for target, result in results.items() if not result.ok}
+        record = (entry.event.table, entry.event.record_id) if entry.event.record_id else None
+        if not failed and record not in blocked:
+            applied.append(entry)
+            continue
+
+        if failed:
+            logger.error(
+                "Failed to process sync event",
+                event_id=entry.entry_id,
+                deliveries=entry.deliveries,
+                errors=failed,
+            )
+        else:
+            logger.warning(
+                "Holding sync event behind a failed update of its record",
+                event_id=entry.entry_id,
+                table=entry.event.table,
+                record_id=entry.event.record_id,
+            )
+        if record is not None:
+            blocked.add(record)
+        if reached | skip:
+            progress = json.dumps(sorted(reached | skip))
+            for entry_id in entry.entry_ids:
+                pipeline.hset(PROGRESS_KEY, _progress_field(entry.stream, entry_id), progress)
+
+    _queue_acks(pipeline, applied, group_name)
+    pipeline.execute()
+    return len(applied)
+
+
+def _queue_acks(pipeline: Any, entries: List[StreamEntry], group_name: str) -> None:
+    """Queue one XACK per stream, dropping progress kept for retried entries."""
+
+    ids_by_stream: Dict[str, List[str]] = {}
+    for entry in entries:
+        ids_by_stream.setdefault(entry.stream, []).extend(entry.entry_ids)
+        if entry.event.applied_targets:
+            pipeline.delete(late_applied_key(entry.stream, entry.entry_id))
+        if entry.deliveries > 1:
+            pipeline.hdel(
+                PROGRESS_KEY,
+                *(_progress_field(entry.stream, entry_id) for entry_id in entry.entry_ids),
+            )
+    for stream_key, entry_ids in ids_by_stream.items():
+        pipeline.xack(stream_key, group_name, *entry_ids)
+
+
+def _claim_page(
+    stream_key: str,
+    group_name: str,
+    consumer_name: str,
+    start_id: str,
+    min_idle_ms: int,
+    count: int,
+    max_attempts: int,
+) -> tuple[str, List[StreamEntry]]:
+    """XAUTOCLAIM one page of idle entries, dead-lettering those out of attempts.
+
+    Returns the cursor for the next page (``"0-0"`` once the pending list has been
+    scanned) and the claimed entries that should be retried.
+    """
+
+    redis_client = sync_engine.redis_client
+    response = redis_client.xautoclaim(
+        stream_key, group_name, consumer_name, min_idle_ms, start_id=start_id, count=count
+    )
+    next_id = response[0]
+    # Entries trimmed from the stream while pending come back without fields.
+    messages = [(entry_id, payload) for entry_id, payload in response[1] if entry_id and payload]
+    if not messages:
+        return next_id, []
+
+    pipeline = redis_client.pipeline(transaction=False)
+    for entry_id, _ in messages:
+        pipeline.xpending_range(stream_key, group_name, min=entry_id, max=entry_id, count=1)
+    deliveries = {
+        entry_id: rows[0]["times_delivered"] if rows else 1
+        for (entry_id, _), rows in zip(messages, pipeline.execute())
+    }
+
+    entries: List[StreamEntry] = []
+    for entry_id, payload in messages:
+        if deliveries[entry_id] > max_attempts:
+            _dead_letter(
+                stream_key,
+                entry_id,
+                payload,
+                group_name,
+                "max delivery attempts exceeded",
+                deliveries[entry_id],
+            )
+            continue
+        entry = _decode_entry(stream_key, entry_id, payload, group_name, deliveries[entry_id])
+        if entry is not None:
+            entries.append(entry)
+    if entries:
+        logger.warning("Claimed stale sync events", stream=stream_key, count=len(entries))
+    return next_id, entries
+
+
+def _recover_pending(
+    group_name: str,
+    consumer_name: str,
+    stream_keys: Sequence[str],
+    min_idle_ms: int,
+    count: int,
+    max_attempts: int,
+    process: Callable[[List[StreamEntry]], int],
+) -> int:
+    """Claim entries idle in any consumer's pending list and retry them."""
+
+    processed = 0
+    for stream_key in stream_keys:
+        start_id = "0-0"
+        while not STOP_EVENT.is_set():
+            start_id, entries = _claim_page(
+                stream_key, group_name, consumer_name, start_id, min_idle_ms, count, max_attempts
+            )
+            if entries:
+                processed += process(entries)
+            if start_id == "0-0":
+                break
+    return processed
+
+
 def consume_events(
     batch_size: int = 100,
     block_ms: int = 5000,
     replay_pending: bool = True,
     idle_sleep: float = 1.0,
     max_batches: int | None = None,
+    batch_apply: bool = False,
+    streams: Sequence[str] | None = None,
+    consumer_name: str | None = None,
+    coalesce: bool = False,
+    coalesce_window_ms: int = 50,
+    coalesce_max: int = 1000,
+    claim_interval: float = 30.0,
+    claim_idle_ms: int = 60_000,
+    max_attempts: int = 5,
+    group_timeout: float = 5.0,
+    drain_interval: float = 5.0,
+    min_batch_size: int = 10,
+    max_batch_size: int = 1000,
+    batch_target_ms: int = 500,
 ) -> int:
-    """Poll the Redis stream and fan out events to configured databases."""
+    """Poll the Redis stream and fan out events to configured databases.
+
+    Reads block for up to ``block_ms`` and return as soon as an entry arrives. The read
+    ``count`` starts at ``batch_size`` and adapts between ``min_batch_size`` and
+    ``max_batch_size`` so a batch applies in about ``batch_target_ms``; the current
+    value is published as the ``batch_size`` worker gauge. ``idle_sleep`` is only the
+    back-off after a failed Redis read.
+
+    With ``batch_apply`` every XREADGROUP batch is applied inside one transaction per
+    target instead of one transaction per event and target. ``streams`` restricts the
+    worker to a subset of the stream partitions; by default it consumes all of them.
+
+    With ``coalesce`` the worker keeps collecting new entries for up to
+    ``coalesce_window_ms`` (or ``coalesce_max`` entries) after each read and collapses
+    successive updates of the same record before replicating them.
+
+    Entries are acknowledged only once every target applied them. Every
+    ``claim_interval`` seconds entries idle for ``claim_idle_ms`` in any consumer's
+    pending list are claimed with XAUTOCLAIM and retried; after ``max_attempts``
+    deliveries an entry is moved to the dead-letter stream instead.
+
+    Entries of one primary commit are held until the whole group has been read, for at
+    most ``group_timeout`` seconds, and then applied in one transaction per target.
+
+    Every ``drain_interval`` seconds a background thread replays the backlogs of
+    parked targets whose circuit breaker allows a new attempt.
+
+    Priority lanes are read with weighted fairness and applied most critical first.
+    """
 
     redis_client = sync_engine.redis_client
     group_name = os.getenv("SYNC_STREAM_GROUP", "campuswap-sync-group")
-    consumer_name = os.getenv("SYNC_CONSUMER_NAME", socket.gethostname())
-    _ensure_consumer_group(group_name)
+    consumer_name = consumer_name or os.getenv("SYNC_CONSUMER_NAME", socket.gethostname())
+    stream_keys = list(streams) if streams is not None else sync_engine.stream_keys
+    for stream_key in stream_keys:
+        _ensure_consumer_group(group_name, stream_key)
+
+    def _process(entries: List[StreamEntry]) -> int:
+        done = _load_progress(entries)
+        outcomes = _apply_batch(entries, done) if batch_apply else _apply_each(entries, done)
+        return _settle(entries, outcomes, done, group_name)
+
+    draining = Event()
+    if drain_interval > 0:
+        Thread(
+            target=_drain_backlogs,
+            args=(draining, drain_interval, batch_size),
+            name="sync-backlog-drain",
+            daemon=True,
+        ).start()
 
     read_id = "0" if replay_pending else ">"
     processed = 0
     batches = 0
+    next_claim = time.monotonic()
+    gate = CommitGroupGate(group_timeout)
+    sizer = AdaptiveBatchSizer(batch_size, min_batch_size, max_batch_size, batch_target_ms / 1000)
+    worker_metrics.set_gauge("batch_size", sizer.current)
 
     while not STOP_EVENT.is_set():
+        worker_metrics.maybe_flush(redis_client, consumer_name)
+        if claim_interval > 0 and time.monotonic() >= next_claim:
+            try:
+                processed += _recover_pending(
+                    group_name,
+                    consumer_name,
+                    stream_keys,
+                    claim_idle_ms,
+                    batch_size,
+                    max_attempts,
+                    _process,
+                )
+            except RedisError as exc:  # pragma: no cover - network failure
+                logger.exception("Pending entry recovery failed", error=str(exc))
+            next_claim = time.monotonic() + claim_interval
+
         try:
-            response = redis_client.xreadgroup(
+            response = _read_lanes(
                 group_name,
                 consumer_name,
-                {sync_engine.stream_key: read_id},
-                count=batch_size,
-                block=block_ms,
+                stream_keys,
+                read_id,
+                sizer.current,
+                min(block_ms, int(group_timeout * 1000)) if gate.holding else block_ms,
             )
         except RedisError as exc:  # pragma: no cover - network failure
             logger.exception("Redis read failed", error=str(exc))
@@ -87,66 +793,156 @@ def consume_events(
 
         if not response:
             read_id = ">"
-            time.sleep(idle_sleep)
+            if gate.holding:
+                for lane_entries in _by_lane(gate.release([])):
+                    processed += _process(lane_entries)
+            sizer.observe(0, 0.0)
             if max_batches is not None:
                 batches += 1
                 if batches >= max_batches:
                     break
             continue
 
-        for stream_key, events in response:
-            for event_id, payload in events:
-                try:
-                    sync_event = SyncEvent.from_stream(payload)
-                    targets: Iterable[str] = tuple(t for t in ALL_TARGETS if t != sync_event.origin)
-                    sync_engine.replicate(sync_event, targets)
-                    processed += 1
-                    logger.info(
-                        "Replicated event",
-                        stream=stream_key,
-                        event_id=event_id,
-                        targets=list(targets),
-                    )
-                except Exception as exc:  # pragma: no cover - defensive catch
-                    logger.exception(
-                        "Failed to process sync event",
-                        event_id=event_id,
-                        error=str(exc),
-                    )
-                finally:
-                    redis_client.xack(stream_key, group_name, event_id)
+        started = time.monotonic()
+        if coalesce and read_id == ">":
+            response = _read_window(
+                group_name, consumer_name, stream_keys, response, coalesce_window_ms, coalesce_max
+            )
+        entries = _decode_entries(response, group_name, deliveries=1 if read_id == ">" else 2)
+        read = len(entries)
+        entries = gate.release(entries)
+        if coalesce:
+            decoded = len(entries)
+            entries = _coalesce_updates(entries)
+            if len(entries) < decoded:
+                logger.debug("Coalesced sync updates", read=decoded, applying=len(entries))
+        for lane_entries in _by_lane(entries):
+            processed += _process(lane_entries)
+        sizer.observe(read, time.monotonic() - started)
 
         read_id = ">"
         batches += 1
         if max_batches is not None and batches >= max_batches:
             break
 
+    draining.set()
+    worker_metrics.flush(redis_client, consumer_name)
+    conflict_recorder.flush()
     return processed
 
 
+def _drain_backlogs(stop: Event, interval: float, batch_size: int) -> None:
+    """Replay the backlogs of parked targets until ``stop`` is set."""
+
+    while not stop.wait(interval) and not STOP_EVENT.is_set():
+        try:
+            sync_engine.drain_backlogs(batch_size)
+        except Exception as exc:  # pragma: no cover - keep draining on the next tick
+            logger.exception("Draining parked sync backlogs failed", error=str(exc))
+
+
 def run_worker(
     batch_size: int = 100,
     block_ms: int = 5000,
     replay_pending: bool = True,
     idle_sleep: float = 1.0,
+    batch_apply: bool = False,
+    processes: int = 1,
+    process_index: int | None = None,
+    coalesce: bool = False,
+    coalesce_window_ms: int = 50,
+    coalesce_max: int = 1000,
+    claim_interval: float = 30.0,
+    claim_idle_ms: int = 60_000,
+    max_attempts: int = 5,
+    group_timeout: float = 5.0,
+    drain_interval: float = 5.0,
+    min_batch_size: int = 10,
+    max_batch_size: int = 1000,
+    batch_target_ms: int = 500,
 ) -> None:
-    """Run the sync worker until interrupted."""
+    """Run the sync worker until interrupted.
+
+    With ``processes`` > 1 the stream partitions are divided between that many worker
+    processes; every partition is owned by exactly one of them, so per-record ordering
+    holds while unrelated records replicate on all cores. ``process_index`` runs only
+    one of those slices in the current process, e.g. one per container.
+    """
+
+    _check_processes(processes, process_index)
+    sync_engine.validate_lanes()
+    options: Dict[str, Any] = {
+        "batch_size": batch_size,
+        "block_ms": block_ms,
+        "replay_pending": replay_pending,
+        "idle_sleep": idle_sleep,
+        "batch_apply": batch_apply,
+        "coalesce": coalesce,
+        "coalesce_window_ms": coalesce_window_ms,
+        "coalesce_max": coalesce_max,
+        "claim_interval": claim_interval,
+        "claim_idle_ms": claim_idle_ms,
+        "max_attempts": max_attempts,
+        "group_timeout": group_timeout,
+        "drain_interval": drain_interval,
+        "min_batch_size": min_batch_size,
+        "max_batch_size": max_batch_size,
+        "batch_target_ms": batch_target_ms,
+    }
+    if processes > sync_engine.shard_count:
+        logger.warning(
+            "More worker processes than stream shards, extra processes stay idle",
+            processes=processes,
+            shards=sync_engine.shard_count,
+        )
+
+    if processes == 1 or process_index is not None:
+        _run_process(process_index or 0, processes, options)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    children = [
+        context.Process(
+            target=_run_process,
+            args=(index, processes, options),
+            name=f"sync-worker-{index}",
+        )
+        for index in range(processes)
+    ]
+
+    def _stop_children(signum: int, _frame: object) -> None:  # pragma: no cover - signal
+        logger.warning("Sync worker supervisor received shutdown signal", signal=signum)
+        for child in children:
+            child.terminate()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):  # pragma: no cover - runtime hook
+        signal.signal(sig, _stop_children)
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+
+
+def _run_process(process_index: int, processes: int, options: Dict[str, Any]) -> None:
+    """Consume the stream partitions owned by one worker process."""
 
     for sig in (signal.SIGINT, signal.SIGTERM):  # pragma: no cover - runtime hook
         signal.signal(sig, _handle_shutdown)
 
+    streams = _streams_for_process(process_index, processes)
+    consumer_name = os.getenv("SYNC_CONSUMER_NAME", socket.gethostname())
+    if processes > 1:
+        consumer_name = f"{consumer_name}-{process_index}"
+
     logger.info(
         "Starting sync worker",
-        batch_size=batch_size,
-        block_ms=block_ms,
-        replay_pending=replay_pending,
-    )
-    processed = consume_events(
-        batch_size=batch_size,
-        block_ms=block_ms,
-        replay_pending=replay_pending,
-        idle_sleep=idle_sleep,
+        process_index=process_index,
+        streams=streams,
+        **options,
     )
+    if not streams:
+        return
+    processed = consume_events(streams=streams, consumer_name=consumer_name, **options)
     logger.info("Sync worker stopped", processed_events=processed)
 
 
@@ -154,26 +950,132 @@ def _build_parser() -> argparse.ArgumentParser:
     """Create CLI parser for launching the worker."""
 
     parser = argparse.ArgumentParser(description="CampuSwap Sync Worker")
-    parser.add_argument("--batch-size", type=int, default=100, help="Max events per Redis read")
+    parser.add_argument(
+        "--batch-size", type=int, default=100, help="Initial events per Redis read"
+    )
+    parser.add_argument(
+        "--min-batch-size", type=int, default=10, help="Lower bound of the adaptive read size"
+    )
+    parser.add_argument(
+        "--max-batch-size", type=int, default=1000, help="Upper bound of the adaptive read size"
+    )
+    parser.add_argument(
+        "--batch-target-ms",
+        type=int,
+        default=500,
+        help="Apply time per batch the read size adapts towards",
+    )
     parser.add_argument("--block-ms", type=int, default=5000, help="Blocking read timeout")
     parser.add_argument(
         "--no-replay", action="store_true", help="Skip replaying pending entries on startup"
     )
     parser.add_argument(
-        "--idle-sleep", type=float, default=1.0, help="Seconds to sleep when stream is idle"
+        "--idle-sleep", type=float, default=1.0, help="Seconds to back off after a Redis error"
+    )
+    parser.add_argument(
+        "--batch-apply",
+        action="store_true",
+        help="Apply each read batch in one transaction per target",
+    )
+    parser.add_argument(
+        "--coalesce",
+        action="store_true",
+        help="Collapse successive updates of the same record before replicating",
+    )
+    parser.add_argument(
+        "--coalesce-window-ms",
+        type=int,
+        default=50,
+        help="How long to keep collecting entries for coalescing after a read",
+    )
+    parser.add_argument(
+        "--coalesce-max", type=int, default=1000, help="Max entries collected per coalescing window"
+    )
+    parser.add_argument(
+        "--claim-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between XAUTOCLAIM sweeps for stuck pending entries (0 disables)",
+    )
+    parser.add_argument(
+        "--claim-idle-ms",
+        type=int,
+        default=60_000,
+        help="Idle time after which a pending entry may be claimed from its consumer",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=5,
+        help="Deliveries before an entry is moved to the dead-letter stream",
+    )
+    parser.add_argument(
+        "--group-timeout",
+        type=float,
+        default=5.0,
+        help="Seconds to wait for the rest of a commit group before applying it partially",
+    )
+    parser.add_argument(
+        "--drain-interval",
+        type=float,
+        default=5.0,
+        help="Seconds between backlog drains of parked targets (0 disables)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Worker processes to split the stream partitions (SYNC_STREAM_SHARDS) across",
+    )
+    parser.add_argument(
+        "--process-index",
+        type=int,
+        default=None,
+        help="Run only this slice of --processes, e.g. one per container",
     )
     return parser
 
 
+def _check_processes(processes: int, process_index: int | None) -> None:
+    """Reject a process count below one or a slice index outside ``[0, processes)``."""
+
+    if processes < 1:
+        raise ValueError(f"processes must be at least 1, got {processes}")
+    if process_index is not None and not 0 <= process_index < processes:
+        raise ValueError(
+            f"process index {process_index} is outside 0..{processes - 1} "
+            f"for {processes} processes"
+        )
+
+
 def main() -> None:  # pragma: no cover - CLI
     """Console entry point for the sync worker."""
 
-    args = _build_parser().parse_args()
+    parser = _build_parser()
+    args = parser.parse_args()
+    try:
+        _check_processes(args.processes, args.process_index)
+    except ValueError as exc:
+        parser.error(str(exc))
     run_worker(
         batch_size=args.batch_size,
         block_ms=args.block_ms,
         replay_pending=not args.no_replay,
         idle_sleep=args.idle_sleep,
+        batch_apply=args.batch_apply,
+        processes=args.processes,
+        process_index=args.process_index,
+        coalesce=args.coalesce,
+        coalesce_window_ms=args.coalesce_window_ms,
+        coalesce_max=args.coalesce_max,
+        claim_interval=args.claim_interval,
+        claim_idle_ms=args.claim_idle_ms,
+        max_attempts=args.max_attempts,
+        group_timeout=args.group_timeout,
+        drain_interval=args.drain_interval,
+        min_batch_size=args.min_batch_size,
+        max_batch_size=args.max_batch_size,
+        batch_target_ms=args.batch_target_ms,
     )
 
 
@@ -1,5 +1,6 @@
 """Sync service router definitions."""
 from datetime import datetime
+from typing import Any
 
 from fastapi import APIRouter
 from sqlalchemy import func, select
@@ -12,8 +13,8 @@ router = APIRouter(prefix="/sync-service", tags=["sync-service"])
 
 
 @router.get("/metrics")
-def get_metrics() -> dict[str, int]:
-    """Return live sync metrics from the database."""
+def get_metrics() -> dict[str, Any]:
+    """Return live sync metrics from the database and the replication pipeline."""
 
     with db_manager.session_scope("mysql") as session:
         pending_jobs = session.scalar(
@@ -30,6 +31,7 @@ def get_metrics() -> dict[str, int]:
         "pending_jobs": pending_jobs or 0,
         "conflicts": conflict_count or 0,
         "last_run": last_run.isoformat() if isinstance(last_run, datetime) else None,
+        "replication": sync_engine.replication_metrics(),
     }
 
 
@@ -1,5 +1,5 @@
 """Trade service router definitions with 4-database sync and transaction management."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -41,14 +41,16 @@ def create_offer(payload: OfferPayload) -> dict[str, str | float]:
 
 
 @router.post("/transactions", status_code=201)
-def create_transaction(payload: TransactionPayload) -> dict[str, any]:
+def create_transaction(payload: TransactionPayload, response: Response) -> dict[str, any]:
     """
-    Create a transaction with automatic sync to all 4 databases.
+    Create a transaction and replicate it with quorum consistency.
     
     Uses ACID transaction to:
     1. Create transaction record
     2. Update item status to 'sold'
-    3. Sync to all databases (MySQL/MariaDB/PostgreSQL/SQLite)
+    3. Wait for SYNC_WRITE_QUORUM replicas; the sync worker completes the rest
+    
+    Responds 202 when the primary committed but the quorum was not reached.
     
     Features:
     - Deadlock detection and automatic retry
@@ -70,6 +72,7 @@ def create_transaction(payload: TransactionPayload) -> dict[str, any]:
             table='transactions',
             data=transaction_data,
             sync_to_all=True,
+            consistency="quorum",
         )
         
         # 2. 更新商品状态为已售(四库同步)
@@ -79,6 +82,7 @@ def create_transaction(payload: TransactionPayload) -> dict[str, any]:
             record_id=payload.item_id,
             data={'status': 'sold'},
             sync_to_all=True,
+            consistency="quorum",
         )
         
         if update_result == 0:
@@ -87,6 +91,11 @@ def create_transaction(payload: TransactionPayload) -> dict[str, any]:
                 detail=f"Item {payload.item_id} not found"
             )
         
+        sync = db_operation_service.sync_summary(session)
+        if not sync["satisfied"]:
+            # 主库已提交，未达到 quorum 的数据库由 sync worker 补齐
+            response.status_code = 202
+        
         return {
             "transaction_id": transaction_id,
             "item_id": payload.item_id,
@@ -95,8 +104,10 @@ def create_transaction(payload: TransactionPayload) -> dict[str, any]:
             "amount": payload.amount,
             "status": "pending",
             "item_status": "sold",
-            "synced_to": ["mysql", "mariadb", "postgres", "sqlite"],
-            "message": "Transaction created and item marked as sold across all databases",
+            "consistency": "quorum",
+            "synced_to": sync["synced_to"],
+            "pending_targets": sync["pending_targets"],
+            "message": "Transaction created and item marked as sold",
         }
 
 
@@ -104,11 +115,13 @@ def create_transaction(payload: TransactionPayload) -> dict[str, any]:
 def update_transaction_status(
     transaction_id: int,
     status: str,
+    response: Response,
 ) -> dict[str, any]:
     """
-    Update transaction status with automatic sync to all 4 databases.
+    Update transaction status and replicate it with quorum consistency.
     
-    Valid statuses: pending, completed, cancelled
+    Valid statuses: pending, completed, cancelled.
+    Responds 202 when the primary committed but the quorum was not reached.
     """
     valid_statuses = ['pending', 'completed', 'cancelled']
     if status not in valid_statuses:
@@ -124,6 +137,7 @@ def update_transaction_status(
             record_id=transaction_id,
             data={'status': status},
             sync_to_all=True,
+            consistency="quorum",
         )
         
         if rowcount == 0:
@@ -132,9 +146,15 @@ def update_transaction_status(
                 detail=f"Transaction {transaction_id} not found"
             )
         
+        sync = db_operation_service.sync_summary(session)
+        if not sync["satisfied"]:
+            response.status_code = 202
+        
         return {
             "transaction_id": transaction_id,
             "status": status,
-            "synced_to": ["mysql", "mariadb", "postgres", "sqlite"],
-            "message": f"Transaction status updated to '{status}' across all databases",
+            "consistency": "quorum",
+            "synced_to": sync["synced_to"],
+            "pending_targets": sync["pending_targets"],
+            "message": f"Transaction status updated to '{status}'",
         }
@@ -0,0 +1,80 @@
+"""Shared fixtures: four SQLite files stand in for the replicated databases."""
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator
+
+import pytest
+
+# Settings are read when ``apps`` is imported, so point every DSN somewhere harmless
+# first. Tests that touch a database swap in fresh engines with ``databases``.
+_DSN_DIR = Path(tempfile.mkdtemp(prefix="campuswap-tests-"))
+for _name in ("mysql", "mariadb", "postgres", "sqlite"):
+    os.environ.setdefault(f"{_name.upper()}_DSN", f"sqlite:///{_DSN_DIR / _name}.db")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/15")
+os.environ.setdefault("DEBUG", "false")
+
+import fakeredis  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from apps.core.database import db_manager  # noqa: E402
+from apps.core.sync_codec import TemplateRegistry  # noqa: E402
+from apps.core.sync_engine import sync_engine  # noqa: E402
+from apps.core.sync_listeners import register_sync_listeners  # noqa: E402
+
+DATABASES = ("mysql", "mariadb", "postgres", "sqlite")
+
+
+@pytest.fixture
+def databases(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Dict[str, Engine]]:
+    """Back every database name with an empty SQLite file for the duration of a test."""
+
+    engines = {name: create_engine(f"sqlite:///{tmp_path / name}.db") for name in DATABASES}
+    for name, engine in engines.items():
+        factory = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+        if name == "mysql":
+            register_sync_listeners(factory)
+        monkeypatch.setitem(db_manager._engines, name, engine)
+        monkeypatch.setitem(db_manager._sessions, name, factory)
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+@pytest.fixture
+def redis_server() -> fakeredis.FakeServer:
+    """One in-memory Redis server, shared by the sync and asyncio clients of a test."""
+
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis_client(
+    redis_server: fakeredis.FakeServer, monkeypatch: pytest.MonkeyPatch
+) -> fakeredis.FakeRedis:
+    """Point the sync engine and its breakers at an empty in-memory Redis."""
+
+    client = fakeredis.FakeRedis(
+        server=redis_server, decode_responses=True, encoding_errors="surrogateescape"
+    )
+    monkeypatch.setattr(sync_engine, "_redis", client)
+    monkeypatch.setattr(sync_engine, "_templates", TemplateRegistry(client))
+    monkeypatch.setattr(sync_engine.breakers, "_redis", client)
+    monkeypatch.setattr(sync_engine.breakers, "_breakers", {})
+    monkeypatch.setattr(sync_engine.breakers, "_parked", set())
+    monkeypatch.setattr(sync_engine.breakers, "_parked_at", float("-inf"))
+    return client
+
+
+def execute_all(engines: Dict[str, Engine], statement: str, params: object = None) -> None:
+    """Run one statement on every database."""
+
+    from sqlalchemy import text
+
+    for engine in engines.values():
+        with engine.begin() as connection:
+            connection.execute(text(statement), params or {})
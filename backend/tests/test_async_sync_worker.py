@@ -0,0 +1,123 @@
+"""asyncio worker: concurrent apply, acknowledgement and replay of failed entries."""
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pytest
+from fakeredis import aioredis as fake_aioredis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from apps.core.sync_engine import SyncEvent, sync_engine
+from apps.services import async_sync_worker
+from apps.services.async_sync_worker import AsyncSyncWorker, _async_dsn
+from apps.services.sync_worker import PROGRESS_KEY
+from tests.conftest import execute_all
+
+CREATE_WIDGETS = "CREATE TABLE widgets (id INTEGER PRIMARY KEY, name TEXT, sync_version INTEGER)"
+TARGETS = ["mariadb", "postgres", "sqlite"]
+
+
+def _event(action: str, record_id: int, name: str, version: int) -> SyncEvent:
+    statements = {
+        "insert": "INSERT INTO widgets (id, name, sync_version) "
+        "VALUES (:id, :name, :sync_version)",
+        "update": "UPDATE widgets SET name = :name, sync_version = :sync_version "
+        "WHERE id = :id AND sync_version = :where_sync_version",
+    }
+    params = {"id": record_id, "name": name, "sync_version": version}
+    if action == "update":
+        params["where_sync_version"] = version - 1
+    return SyncEvent(
+        table="widgets",
+        action=action,
+        payload={"statement": statements[action], "params": params},
+        origin="mysql",
+        occurred_at=datetime.now(timezone.utc),
+        sync_version=version,
+        record_id=str(record_id),
+    )
+
+
+@pytest.fixture
+def worker_env(databases, redis_client, redis_server, monkeypatch: pytest.MonkeyPatch):
+    """Async engines on the test databases and an asyncio client on the shared Redis."""
+
+    monkeypatch.setattr(
+        async_sync_worker,
+        "_create_engines",
+        lambda concurrency: {
+            name: create_async_engine(_async_dsn(str(engine.url)))
+            for name, engine in databases.items()
+        },
+    )
+    monkeypatch.setattr(
+        async_sync_worker.aioredis.Redis,
+        "from_url",
+        staticmethod(
+            lambda url, **kwargs: fake_aioredis.FakeRedis(server=redis_server, **kwargs)
+        ),
+    )
+    execute_all(databases, CREATE_WIDGETS)
+    return redis_client
+
+
+def _run(**kwargs) -> int:
+    async def consume() -> int:
+        worker = AsyncSyncWorker(
+            sync_engine.stream_keys,
+            "w1",
+            concurrency=4,
+            block_ms=10,
+            claim_interval=0,
+            drain_interval=0,
+        )
+        return await worker.run(max_batches=1, **kwargs)
+
+    return asyncio.run(consume())
+
+
+def _pending(redis_client) -> int:
+    group = os.getenv("SYNC_STREAM_GROUP", "campuswap-sync-group")
+    return sum(redis_client.xpending(key, group)["pending"] for key in sync_engine.stream_keys)
+
+
+def _names(engine) -> Dict[int, str]:
+    with engine.connect() as connection:
+        return dict(connection.execute(text("SELECT id, name FROM widgets")).all())
+
+
+def test_events_are_applied_in_record_order_and_acknowledged(databases, worker_env):
+    events: List[SyncEvent] = [_event("insert", i, f"w{i}", 1) for i in (1, 2, 3)]
+    events += [_event("update", 1, "x", 2), _event("update", 1, "y", 3)]
+    sync_engine.publish_events(events)
+
+    assert _run(replay_pending=False) == 5
+
+    for name in TARGETS:
+        assert _names(databases[name]) == {1: "y", 2: "w2", 3: "w3"}
+    assert _names(databases["mysql"]) == {}
+    assert _pending(worker_env) == 0
+
+
+def test_a_failed_target_keeps_the_entry_pending_until_replayed(databases, worker_env):
+    with databases["sqlite"].begin() as connection:
+        connection.execute(text("DROP TABLE widgets"))
+    sync_engine.publish_events([_event("insert", 1, "w1", 1)])
+
+    assert _run(replay_pending=False) == 0
+
+    assert _pending(worker_env) == 1
+    assert worker_env.hlen(PROGRESS_KEY) == 1
+    assert _names(databases["postgres"]) == {1: "w1"}
+
+    with databases["sqlite"].begin() as connection:
+        connection.execute(text(CREATE_WIDGETS))
+    assert _run(replay_pending=True) == 1
+
+    assert _names(databases["sqlite"]) == {1: "w1"}
+    assert _pending(worker_env) == 0
+    assert worker_env.hlen(PROGRESS_KEY) == 0
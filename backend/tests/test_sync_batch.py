@@ -0,0 +1,137 @@
+"""Batched replication: one transaction per target, bisection and executemany runs."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pytest
+from sqlalchemy import event as sa_event
+from sqlalchemy import text
+
+from apps.core.sync_engine import SyncEvent, sync_engine
+from tests.conftest import execute_all
+
+CREATE_WIDGETS = "CREATE TABLE widgets (id INTEGER PRIMARY KEY, name TEXT, sync_version INTEGER)"
+TARGETS = ["mariadb", "postgres", "sqlite"]
+
+
+def _event(action: str, record_id: int, table: str = "widgets", **params) -> SyncEvent:
+    statements = {
+        "insert": f"INSERT INTO {table} (id, name, sync_version) "
+        "VALUES (:id, :name, :sync_version)",
+        "update": f"UPDATE {table} SET name = :name, sync_version = :sync_version "
+        "WHERE id = :id AND sync_version = :where_sync_version",
+    }
+    values = {"id": record_id, "name": f"w{record_id}", "sync_version": 1, **params}
+    return SyncEvent(
+        table=table,
+        action=action,
+        payload={"statement": statements[action], "params": values},
+        origin="mysql",
+        occurred_at=datetime.now(timezone.utc),
+        sync_version=values["sync_version"],
+        record_id=str(record_id),
+    )
+
+
+def _count_statements(engine) -> Dict[str, int]:
+    counts = {"commits": 0, "executemany": 0}
+
+    def on_commit(connection) -> None:
+        counts["commits"] += 1
+
+    def on_execute(connection, cursor, statement, params, context, executemany) -> None:
+        counts["executemany"] += executemany
+
+    sa_event.listen(engine, "commit", on_commit)
+    sa_event.listen(engine, "before_cursor_execute", on_execute)
+    return counts
+
+
+@pytest.fixture
+def widgets(databases, redis_client, monkeypatch: pytest.MonkeyPatch):
+    """Empty widgets tables, with statements and commits counted per database."""
+
+    execute_all(databases, CREATE_WIDGETS)
+    counts: Dict[str, Dict[str, int]] = {}
+    for name, engine in databases.items():
+        counts[name] = _count_statements(engine)
+    conflicts: List[tuple[str, str]] = []
+    monkeypatch.setattr(
+        sync_engine,
+        "_record_conflict",
+        lambda event, target: conflicts.append((event.record_id, target)),
+    )
+    monkeypatch.setattr(sync_engine, "_parallel", False)
+    return {"counts": counts, "conflicts": conflicts}
+
+
+def _names(engine) -> Dict[int, str]:
+    with engine.connect() as connection:
+        return dict(connection.execute(text("SELECT id, name FROM widgets")).all())
+
+
+def test_a_batch_commits_once_per_target(databases, widgets):
+    events = [
+        _event("insert", 1),
+        _event("insert", 2),
+        _event("update", 1, name="x", sync_version=2, where_sync_version=1),
+    ]
+
+    results = sync_engine.replicate_batch(events, TARGETS)
+
+    assert all(result.ok for outcome in results for result in outcome.values())
+    for name in TARGETS:
+        assert widgets["counts"][name]["commits"] == 1
+        assert _names(databases[name]) == {1: "x", 2: "w2"}
+    # The origin is never written to.
+    assert _names(databases["mysql"]) == {}
+
+
+def test_a_bad_event_is_isolated_and_the_rest_still_apply_in_order(databases, widgets):
+    events = [
+        _event("insert", 1),
+        _event("insert", 2, table="missing_table"),
+        _event("update", 1, name="x", sync_version=2, where_sync_version=1),
+    ]
+
+    results = sync_engine.replicate_batch(events, TARGETS)
+
+    assert [all(result.ok for result in outcome.values()) for outcome in results] == [
+        True,
+        False,
+        True,
+    ]
+    for name in TARGETS:
+        assert _names(databases[name]) == {1: "x"}
+
+
+def test_skip_targets_are_left_alone(databases, widgets):
+    sync_engine.replicate_batch([_event("insert", 1)], TARGETS, skip_targets=[{"postgres"}])
+
+    assert _names(databases["postgres"]) == {}
+    assert _names(databases["sqlite"]) == {1: "w1"}
+
+
+def test_consecutive_identical_statements_go_out_as_one_executemany(databases, widgets):
+    events = [_event("insert", record_id) for record_id in range(1, 6)]
+
+    sync_engine.replicate_batch(events, ["postgres"])
+
+    assert widgets["counts"]["postgres"]["executemany"] == 1
+    assert sorted(_names(databases["postgres"])) == [1, 2, 3, 4, 5]
+
+
+def test_a_stale_update_in_a_coalesced_run_is_pinpointed(databases, widgets):
+    sync_engine.replicate_batch([_event("insert", i) for i in (1, 2, 3)], ["postgres"])
+    with databases["postgres"].begin() as connection:
+        connection.execute(text("UPDATE widgets SET sync_version = 5 WHERE id = 2"))
+    updates = [
+        _event("update", i, name=f"u{i}", sync_version=2, where_sync_version=1) for i in (1, 2, 3)
+    ]
+
+    results = sync_engine.replicate_batch(updates, ["postgres"])
+
+    assert [outcome["postgres"].conflict for outcome in results] == [False, True, False]
+    assert widgets["conflicts"] == [("2", "postgres")]
+    assert _names(databases["postgres"]) == {1: "u1", 2: "w2", 3: "u3"}
@@ -0,0 +1,110 @@
+"""Replica bootstrap: ranged copies, checkpoints and the stream handoff."""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pytest
+from sqlalchemy import text
+
+from apps.core.sync_engine import SyncEvent, sync_engine
+from apps.services import sync_bootstrap
+from apps.services.sync_bootstrap import record_handoff, run_bootstrap
+from tests.conftest import execute_all
+
+CREATE_FAVORITES = (
+    "CREATE TABLE favorites (id INTEGER PRIMARY KEY, user_id INTEGER, item_id INTEGER, "
+    "sync_version INTEGER)"
+)
+INSERT_FAVORITE = (
+    "INSERT INTO favorites (id, user_id, item_id, sync_version) "
+    "VALUES (:id, :user_id, :item_id, :sync_version)"
+)
+CHECKPOINT = "campuswap:sync:bootstrap:postgres"
+
+
+@pytest.fixture
+def favorites(databases, redis_client, monkeypatch: pytest.MonkeyPatch):
+    """Favorites on every database and ten rows on the primary."""
+
+    execute_all(databases, CREATE_FAVORITES)
+    _insert(databases["mysql"], [(row_id, row_id, 1) for row_id in range(1, 11)])
+    monkeypatch.setattr(sync_engine, "_parallel", False)
+    sync_bootstrap.STOP_EVENT.clear()
+    return redis_client
+
+
+def _insert(engine, rows: List[tuple[int, int, int]]) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            text(INSERT_FAVORITE),
+            [
+                {"id": row_id, "user_id": 1, "item_id": item_id, "sync_version": version}
+                for row_id, item_id, version in rows
+            ],
+        )
+
+
+def _rows(engine) -> Dict[int, int]:
+    with engine.connect() as connection:
+        return dict(connection.execute(text("SELECT id, item_id FROM favorites")).all())
+
+
+def _insert_event(record_id: int, item_id: int) -> SyncEvent:
+    return SyncEvent(
+        table="favorites",
+        action="insert",
+        payload={
+            "statement": INSERT_FAVORITE,
+            "params": {"id": record_id, "user_id": 1, "item_id": item_id, "sync_version": 1},
+        },
+        origin="mysql",
+        occurred_at=datetime.now(timezone.utc),
+        sync_version=1,
+        record_id=str(record_id),
+    )
+
+
+def test_tables_are_copied_in_ranges_and_marked_done(databases, favorites):
+    # A row the live worker already advanced keeps its newer version.
+    _insert(databases["postgres"], [(4, 99, 2)])
+
+    copied = run_bootstrap("postgres", tables=["favorites"], range_rows=3, chunk_rows=2)
+
+    assert copied == {"favorites": 10}
+    expected = {row_id: row_id for row_id in range(1, 11)}
+    assert _rows(databases["postgres"]) == {**expected, 4: 99}
+    checkpoint = favorites.hgetall(CHECKPOINT)
+    assert checkpoint["done:favorites"] == "1"
+    assert "completed_at" in checkpoint
+    # Other replicas are untouched.
+    assert _rows(databases["sqlite"]) == {}
+
+
+def test_an_interrupted_copy_resumes_after_its_checkpoint(databases, favorites):
+    favorites.hset(CHECKPOINT, "table:favorites", json.dumps(6))
+
+    copied = run_bootstrap("postgres", tables=["favorites"], range_rows=3)
+
+    assert copied == {"favorites": 4}
+    assert sorted(_rows(databases["postgres"])) == [7, 8, 9, 10]
+
+
+def test_only_changes_after_the_handoff_are_replayed(databases, favorites):
+    sync_engine.publish_event(_insert_event(20, 20))
+    record_handoff("postgres")
+    sync_engine.publish_event(_insert_event(21, 21))
+
+    run_bootstrap("postgres", tables=["favorites"])
+
+    rows = _rows(databases["postgres"])
+    assert 21 in rows
+    assert 20 not in rows
+    # A rerun copies nothing again and only catches up on the stream.
+    assert run_bootstrap("postgres", tables=["favorites"]) == {"favorites": 0}
+
+
+def test_the_primary_is_not_a_bootstrap_target(favorites):
+    with pytest.raises(ValueError, match="Unsupported"):
+        run_bootstrap("mysql")
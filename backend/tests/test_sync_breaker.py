@@ -0,0 +1,193 @@
+"""Circuit breakers only trip on connectivity failures."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, DisconnectionError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from apps.core.sync_breaker import PARKED_KEY, backlog_key, is_connection_error
+from apps.core.sync_engine import SyncEvent, sync_engine
+from tests.conftest import execute_all
+
+CREATE_WIDGETS = "CREATE TABLE widgets (id INTEGER PRIMARY KEY, name TEXT, sync_version INTEGER)"
+
+
+def _sqlite_error(databases, statement: str) -> Exception:
+    with pytest.raises(DBAPIError) as info:
+        with databases["sqlite"].connect() as connection:
+            connection.execute(text(statement))
+    return info.value
+
+
+def _driver_error(code: int, message: str) -> OperationalError:
+    """A MySQL driver error as SQLAlchemy wraps it (pymysql/mysqlclient put the code first)."""
+
+    return OperationalError("SELECT 1", {}, Exception(code, message))
+
+
+class _PsycopgError(Exception):
+    __module__ = "psycopg2"
+
+    def __init__(self, message: str, pgcode: str | None) -> None:
+        super().__init__(message)
+        self.pgcode = pgcode
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "SELECT * FROM missing_table",
+        "INSERT INTO widgets (id, colour) VALUES (1, 'red')",
+        "SELECT * FROM",
+    ],
+)
+def test_schema_and_syntax_errors_are_not_connection_errors(databases, statement):
+    execute_all(databases, CREATE_WIDGETS)
+
+    assert not is_connection_error(_sqlite_error(databases, statement))
+
+
+@pytest.mark.parametrize(
+    ("exc", "expected"),
+    [
+        (DisconnectionError("gone"), True),
+        (PoolTimeoutError("QueuePool limit reached"), True),
+        (_driver_error(2003, "Can't connect to MySQL server"), True),
+        (_driver_error(2013, "Lost connection to MySQL server during query"), True),
+        (_driver_error(1146, "Table 'campuswap.t' doesn't exist"), False),
+        (_driver_error(1213, "Deadlock found when trying to get lock"), False),
+        (OperationalError("SELECT 1", {}, _PsycopgError("server closed", None)), True),
+        (OperationalError("SELECT 1", {}, _PsycopgError("admin shutdown", "57P01")), True),
+        (OperationalError("SELECT 1", {}, _PsycopgError("no relation", "42P01")), False),
+        (DBAPIError("SELECT 1", {}, Exception("reset"), connection_invalidated=True), True),
+    ],
+)
+def test_driver_errors_are_classified_by_code(exc, expected):
+    assert is_connection_error(exc) is expected
+
+
+def test_only_connection_failures_open_the_breaker(databases, redis_client):
+    execute_all(databases, CREATE_WIDGETS)
+    breakers = sync_engine.breakers
+    schema_error = _sqlite_error(databases, "SELECT * FROM missing_table")
+
+    for _ in range(5):
+        breakers.record_failure("postgres", schema_error)
+    assert not breakers.parked_targets(refresh=True)
+
+    for _ in range(breakers._failure_threshold):
+        breakers.record_failure("postgres", _driver_error(2013, "Lost connection"))
+    assert redis_client.smembers(PARKED_KEY) == {"postgres"}
+
+
+def _insert(record_id: int, table: str = "widgets") -> SyncEvent:
+    return SyncEvent(
+        table=table,
+        action="insert",
+        payload={
+            "statement": f"INSERT INTO {table} (id, name, sync_version) "
+            "VALUES (:id, :name, :sync_version)",
+            "params": {"id": record_id, "name": f"w{record_id}", "sync_version": 1},
+        },
+        origin="mysql",
+        occurred_at=datetime.now(timezone.utc),
+        sync_version=1,
+        record_id=str(record_id),
+    )
+
+
+def test_a_bad_event_is_bisected_out_without_parking_the_target(databases, redis_client):
+    execute_all(databases, CREATE_WIDGETS)
+    events = [_insert(1), _insert(2, "missing_table"), _insert(3)]
+
+    for _ in range(3):
+        outcome = sync_engine._apply_batch_to("sqlite", events, [0, 1, 2])
+
+    assert [outcome[index].ok for index in range(3)] == [True, False, True]
+    assert not sync_engine.breakers.parked_targets(refresh=True)
+    with databases["sqlite"].connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM widgets")).scalar() == 2
+
+
+@pytest.fixture
+def parked_postgres(databases, redis_client, monkeypatch: pytest.MonkeyPatch):
+    """Postgres parked with a backlog of three inserts, the middle one unappliable."""
+
+    execute_all(databases, CREATE_WIDGETS)
+    monkeypatch.setattr(sync_engine.breakers, "cache_seconds", 0.01)
+    conflicts: list[tuple[str, str]] = []
+    monkeypatch.setattr(
+        sync_engine,
+        "_record_conflict",
+        lambda event, target: conflicts.append((event.record_id, target)),
+    )
+    redis_client.sadd(PARKED_KEY, "postgres")
+    sync_engine.park_events("postgres", [_insert(1), _insert(2, "missing_table"), _insert(3)])
+    return conflicts
+
+
+def test_drain_drops_a_bad_event_and_releases_the_target(
+    databases, redis_client, parked_postgres
+):
+    assert sync_engine.drain_backlog("postgres") == 3
+
+    assert parked_postgres == [("2", "postgres")]
+    assert redis_client.xlen(backlog_key("postgres")) == 0
+    assert not redis_client.sismember(PARKED_KEY, "postgres")
+    with databases["postgres"].connect() as connection:
+        ids = connection.execute(text("SELECT id FROM widgets ORDER BY id")).scalars().all()
+    assert ids == [1, 3]
+
+
+def test_drain_stops_on_a_connection_failure_and_keeps_the_backlog(
+    redis_client, parked_postgres, monkeypatch: pytest.MonkeyPatch
+):
+    def unreachable(*_args, **_kwargs):
+        raise DisconnectionError("connection refused")
+
+    monkeypatch.setattr(sync_engine, "_apply_chunk", unreachable)
+
+    assert sync_engine.drain_backlog("postgres") == 0
+    assert parked_postgres == []
+    assert redis_client.xlen(backlog_key("postgres")) == 3
+    assert redis_client.sismember(PARKED_KEY, "postgres")
+
+
+def test_drain_falls_back_to_single_groups_on_unexpected_errors(
+    databases, redis_client, parked_postgres, monkeypatch: pytest.MonkeyPatch
+):
+    apply_batch = sync_engine._apply_batch_to
+
+    def fail_whole_batches(target, events, indexes, *args, **kwargs):
+        if len(indexes) > 1:
+            raise ValueError("unexpected")
+        return apply_batch(target, events, indexes, *args, **kwargs)
+
+    monkeypatch.setattr(sync_engine, "_apply_batch_to", fail_whole_batches)
+
+    assert sync_engine.drain_backlog("postgres") == 3
+    assert parked_postgres == [("2", "postgres")]
+    assert redis_client.xlen(backlog_key("postgres")) == 0
+
+
+def test_release_waits_for_an_empty_backlog(redis_client, parked_postgres):
+    assert not sync_engine.breakers.release("postgres")
+    assert redis_client.sismember(PARKED_KEY, "postgres")
+
+
+def test_stale_parked_cache_applies_live_after_release(
+    databases, redis_client, monkeypatch: pytest.MonkeyPatch
+):
+    execute_all(databases, CREATE_WIDGETS)
+    # This process still believes postgres is parked, but the drainer released it.
+    monkeypatch.setattr(sync_engine.breakers, "_parked", {"postgres"})
+    monkeypatch.setattr(sync_engine.breakers, "_parked_at", float("inf"))
+
+    result = sync_engine._replicate_to(_insert(1), "postgres")
+
+    assert result.ok and not result.parked
+    assert redis_client.xlen(backlog_key("postgres")) == 0
+    assert not sync_engine.breakers.parked("postgres")
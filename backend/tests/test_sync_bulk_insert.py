@@ -0,0 +1,52 @@
+"""Chunked bulk inserts written to the four databases concurrently."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+
+from apps.services.db_operations import db_operation_service
+from tests.conftest import execute_all
+
+CREATE_WIDGETS = "CREATE TABLE widgets (id INTEGER PRIMARY KEY, name TEXT, sync_version INTEGER)"
+
+
+def _records(count: int) -> list[dict]:
+    return [{"id": i, "name": f"w{i}", "sync_version": 1} for i in range(1, count + 1)]
+
+
+def _count(engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT count(*) FROM widgets")).scalar()
+
+
+def test_records_are_inserted_in_chunks_on_every_database(databases):
+    execute_all(databases, CREATE_WIDGETS)
+
+    results = db_operation_service.bulk_insert_with_sync("widgets", _records(25), chunk_size=10)
+
+    assert set(results) == set(databases)
+    for name, result in results.items():
+        assert result == {"status": "success", "count": 25, "chunks": 3, "failed_chunks": []}
+        assert _count(databases[name]) == 25
+
+
+def test_a_failing_chunk_only_loses_its_own_rows(databases):
+    execute_all(databases, CREATE_WIDGETS)
+    with databases["sqlite"].begin() as connection:
+        connection.execute(text("INSERT INTO widgets VALUES (12, 'taken', 1)"))
+
+    results = db_operation_service.bulk_insert_with_sync("widgets", _records(25), chunk_size=10)
+
+    assert results["mysql"]["status"] == "success"
+    sqlite = results["sqlite"]
+    assert sqlite["status"] == "partial"
+    assert sqlite["count"] == 15
+    failed = [(chunk["chunk"], chunk["offset"], chunk["size"]) for chunk in sqlite["failed_chunks"]]
+    assert failed == [(1, 10, 10)]
+    # The failed chunk rolled back as a whole; the pre-existing row is untouched.
+    assert _count(databases["sqlite"]) == 16
+
+
+def test_records_must_share_their_keys(databases):
+    with pytest.raises(ValueError, match="same keys"):
+        db_operation_service.bulk_insert_with_sync("widgets", [{"id": 1}, {"id": 2, "name": "x"}])
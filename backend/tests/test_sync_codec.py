@@ -0,0 +1,109 @@
+"""Round trips of sync events through both stream wire formats."""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+import pytest
+
+from apps.core import sync_codec
+from apps.core.sync_codec import TemplateRegistry, template_for
+from apps.core.sync_engine import SyncEvent
+from apps.core.sync_payloads import encode_params
+
+STATEMENT = (
+    "UPDATE payments SET amount = :amount, paid_at = :paid_at, due = :due, "
+    "slot = :slot, receipt = :receipt, sync_version = :sync_version "
+    "WHERE id = :id AND sync_version = :where_sync_version"
+)
+PARAMS = {
+    "amount": Decimal("19.90"),
+    "paid_at": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    "due": date(2024, 6, 1),
+    "slot": time(9, 45),
+    "receipt": "收据 №7",
+    "sync_version": 3,
+    "id": 7,
+    "where_sync_version": 2,
+}
+
+
+class _Templates:
+    """Redis hash stand-in for the template registry."""
+
+    def __init__(self) -> None:
+        self.hash: dict[str, str] = {}
+
+    def hsetnx(self, key: str, field: str, value: str) -> None:
+        self.hash.setdefault(field, value)
+
+    def hget(self, key: str, field: str) -> str | None:
+        return self.hash.get(field)
+
+
+def _event() -> SyncEvent:
+    return SyncEvent(
+        table="payments",
+        action="update",
+        payload={"statement": STATEMENT, "params": encode_params(PARAMS), "pk": 7},
+        origin="mysql",
+        occurred_at=datetime(2024, 5, 1, 12, 30, 16, tzinfo=timezone.utc),
+        sync_version=3,
+        record_id="7",
+        group_id="g-1",
+        group_size=2,
+        applied_targets=("postgres",),
+    )
+
+
+def _as_redis_returns(message: dict) -> dict:
+    """Mimic a ``decode_responses=True, encoding_errors="surrogateescape"`` client."""
+
+    return {
+        key: value.decode("utf-8", "surrogateescape") if isinstance(value, bytes) else str(value)
+        for key, value in message.items()
+    }
+
+
+def test_json_round_trip():
+    event = _event()
+
+    decoded = SyncEvent.from_stream(_as_redis_returns(event.as_message()))
+
+    assert decoded == event
+
+
+def test_compact_round_trip_through_a_fresh_worker_registry():
+    event = _event()
+    template = template_for(STATEMENT)
+    backend = _Templates()
+    publisher = TemplateRegistry(backend)
+    publisher.mark_registered(publisher.stage(backend, [template]))
+
+    message = event.as_compact_message(template)
+    decoded = SyncEvent.from_stream(_as_redis_returns(message), TemplateRegistry(backend))
+
+    assert message["v"] == sync_codec.WIRE_VERSION
+    assert decoded == event
+
+
+def test_compact_falls_back_when_a_bind_is_missing():
+    event = _event()
+    del event.payload["params"]["slot"]
+
+    assert event.as_compact_message(template_for(STATEMENT)) is None
+
+
+def test_compact_entries_need_a_registry_and_a_known_template():
+    message = _as_redis_returns(_event().as_compact_message(template_for(STATEMENT)))
+
+    with pytest.raises(ValueError):
+        SyncEvent.from_stream(message)
+    with pytest.raises(KeyError):
+        SyncEvent.from_stream(message, TemplateRegistry(_Templates()))
+
+
+def test_pack_preserves_native_types():
+    values = [Decimal("0.10"), PARAMS["paid_at"], PARAMS["due"], PARAMS["slot"], b"\xff\x00"]
+
+    assert sync_codec.unpack(sync_codec.pack(values)) == values
@@ -0,0 +1,88 @@
+"""Conflict persistence: bulk writes, digests and the dead-letter fallback."""
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+from sqlalchemy import text
+
+from apps.core import sync_conflicts
+from apps.core.sync_conflicts import DEAD_LETTER_STREAM, ConflictRecorder
+
+# conflict_records with a SQLite rowid key, so inserts without an id autoincrement.
+CREATE_CONFLICTS = (
+    "CREATE TABLE conflict_records (id INTEGER PRIMARY KEY, table_name TEXT NOT NULL, "
+    "record_id TEXT NOT NULL, source TEXT NOT NULL, target TEXT NOT NULL, "
+    "status TEXT NOT NULL DEFAULT 'pending', resolved_by INTEGER, resolved_at TEXT, "
+    "resolution_note TEXT, payload TEXT NOT NULL, "
+    "created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+    "updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+    "sync_version INTEGER NOT NULL DEFAULT 1)"
+)
+
+
+@pytest.fixture
+def recorder(databases, redis_client, monkeypatch: pytest.MonkeyPatch):
+    """A recorder writing to the test primary, with digests captured instead of mailed."""
+
+    with databases["mysql"].begin() as connection:
+        connection.execute(text(CREATE_CONFLICTS))
+    sent: List[tuple[str, str]] = []
+    monkeypatch.setattr(
+        sync_conflicts.email_notifier, "send", lambda subject, body: sent.append((subject, body))
+    )
+    # Test recorders are stopped by the fixture, not flushed at interpreter exit.
+    monkeypatch.setattr(sync_conflicts.atexit, "register", lambda function: function)
+    instance = ConflictRecorder(digest_interval=3600)
+    instance._redis_client = redis_client
+    instance.sent = sent
+    yield instance
+    instance._stop.set()
+
+
+def _stored(databases) -> List[tuple]:
+    with databases["mysql"].connect() as connection:
+        return connection.execute(
+            text("SELECT table_name, record_id, target FROM conflict_records ORDER BY id")
+        ).all()
+
+
+def test_conflicts_are_stored_in_bulk_and_mailed_as_one_digest(databases, recorder):
+    for record_id in ("1", "2", "3"):
+        recorder.record("items", record_id, "mysql", "postgres", {"id": record_id})
+    recorder.record("users", "9", "mysql", "sqlite", {"id": "9"})
+
+    recorder.flush(timeout=5)
+
+    assert _stored(databases) == [
+        ("items", "1", "postgres"),
+        ("items", "2", "postgres"),
+        ("items", "3", "postgres"),
+        ("users", "9", "sqlite"),
+    ]
+    assert len(recorder.sent) == 1
+    subject, body = recorder.sent[0]
+    assert "4 in 2" in subject
+    assert "表: items  目标: postgres  来源: mysql  数量: 3" in body
+
+
+def test_a_batch_the_database_rejects_is_dead_lettered_and_replayed(
+    databases, recorder, redis_client, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(sync_conflicts, "WRITE_ATTEMPTS", 2)
+    monkeypatch.setattr(sync_conflicts, "RETRY_BASE_SECONDS", 0.01)
+    with databases["mysql"].begin() as connection:
+        connection.execute(text("ALTER TABLE conflict_records RENAME TO conflict_records_old"))
+
+    recorder.record("items", "1", "mysql", "postgres", {"id": "1"})
+    recorder.flush(timeout=5)
+
+    assert redis_client.xlen(DEAD_LETTER_STREAM) == 1
+    assert recorder.sent == []
+
+    with databases["mysql"].begin() as connection:
+        connection.execute(text("ALTER TABLE conflict_records_old RENAME TO conflict_records"))
+    assert recorder.replay_dead_letters() == 1
+
+    assert redis_client.xlen(DEAD_LETTER_STREAM) == 0
+    assert _stored(databases) == [("items", "1", "postgres")]
@@ -0,0 +1,94 @@
+"""Priority lane routing of sync events."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from apps.core.sync_engine import LANE_WEIGHTS, SyncEvent, sync_engine
+from apps.services.sync_manager import DatabaseSyncManager
+from apps.services.sync_worker import _by_lane, _lane_counts, _lane_streams
+
+BASE_KEY = "campuswap:sync:events"
+
+
+def _event(table: str, record_id: str = "1") -> SyncEvent:
+    return SyncEvent(
+        table=table,
+        action="update",
+        payload={},
+        origin="mysql",
+        occurred_at=datetime.now(timezone.utc),
+        sync_version=2,
+        record_id=record_id,
+    )
+
+
+@pytest.fixture
+def lanes(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(sync_engine, "_priority_lanes", True)
+    monkeypatch.setattr(sync_engine, "_shards", 1)
+    monkeypatch.setattr(sync_engine, "_table_lanes", None)
+    return sync_engine
+
+
+def test_priority_tables_exist_in_schema():
+    assert sync_engine.validate_lanes() == DatabaseSyncManager.SYNC_TABLE_PRIORITIES
+
+
+def test_unknown_table_or_lane_is_rejected(lanes, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(DatabaseSyncManager.SYNC_TABLE_PRIORITIES, "orders", "critical")
+    with pytest.raises(ValueError, match="orders"):
+        lanes.validate_lanes()
+
+    monkeypatch.delitem(DatabaseSyncManager.SYNC_TABLE_PRIORITIES, "orders")
+    monkeypatch.setitem(DatabaseSyncManager.SYNC_TABLE_PRIORITIES, "payments", "urgent")
+    with pytest.raises(ValueError, match="urgent"):
+        lanes.validate_lanes()
+
+
+def test_events_route_to_their_table_lane(lanes):
+    assert lanes.stream_key_for(_event("payments")) == f"{BASE_KEY}:critical"
+    assert lanes.stream_key_for(_event("cart_items")) == f"{BASE_KEY}:bulk"
+    # Unlisted tables stay on the legacy key.
+    assert lanes.stream_key_for(_event("items")) == BASE_KEY
+
+
+def test_lanes_keep_shards_and_disable_cleanly(lanes, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(sync_engine, "_shards", 4)
+    event = _event("transactions", "42")
+    shard = lanes.shard_for(event)
+
+    assert lanes.stream_key_for(event) == f"{BASE_KEY}:critical:{shard}"
+    assert lanes.lane_of(f"{BASE_KEY}:critical:{shard}") == "critical"
+    assert lanes.lane_of(f"{BASE_KEY}:{shard}") == "normal"
+
+    monkeypatch.setattr(sync_engine, "_priority_lanes", False)
+    assert lanes.stream_key_for(event) == f"{BASE_KEY}:{shard}"
+
+
+def test_reads_are_weighted_and_batches_split_critical_first(lanes):
+    keys = [BASE_KEY, f"{BASE_KEY}:bulk", f"{BASE_KEY}:critical"]
+    grouped = _lane_streams(keys)
+
+    assert list(grouped) == list(LANE_WEIGHTS)
+    assert _lane_counts(grouped, 100) == {"critical": 100, "normal": 50, "bulk": 25}
+
+    class Entry:
+        def __init__(self, stream: str) -> None:
+            self.stream = stream
+
+    entries = [Entry(f"{BASE_KEY}:bulk"), Entry(BASE_KEY), Entry(f"{BASE_KEY}:critical")]
+    assert [[entry.stream for entry in batch] for batch in _by_lane(entries)] == [
+        [f"{BASE_KEY}:critical"],
+        [BASE_KEY],
+        [f"{BASE_KEY}:bulk"],
+    ]
+
+
+def test_workers_consume_every_lane_while_publishing_is_off(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(sync_engine, "_priority_lanes", False)
+    monkeypatch.setattr(sync_engine, "_shards", 1)
+
+    assert sync_engine.stream_key_for(_event("payments")) == BASE_KEY
+    assert sync_engine.stream_keys == [f"{BASE_KEY}:critical", BASE_KEY, f"{BASE_KEY}:bulk"]
@@ -0,0 +1,117 @@
+"""Sync events built from ORM flushes on the primary."""
+from __future__ import annotations
+
+from typing import List, Optional
+
+import pytest
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from apps.core.database import db_manager
+from apps.core.sync_engine import SyncEvent, sync_engine
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class Widget(_Base):
+    __tablename__ = "widgets"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(50))
+    description: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+    sync_version: Mapped[int] = mapped_column(Integer, default=1)
+
+
+@pytest.fixture
+def published(databases, monkeypatch: pytest.MonkeyPatch) -> List[List[SyncEvent]]:
+    _Base.metadata.create_all(databases["mysql"])
+    batches: List[List[SyncEvent]] = []
+    monkeypatch.setattr(sync_engine, "publish_events", lambda events: batches.append(events))
+    return batches
+
+
+def _params(event: SyncEvent) -> dict:
+    return event.payload["params"]
+
+
+def _add_widget(record_id: int = 1) -> None:
+    with db_manager.session_scope("mysql") as session:
+        session.add(Widget(id=record_id, name="a"))
+
+
+def test_updates_across_flushes_become_one_guarded_event(published):
+    _add_widget()
+    published.clear()
+
+    with db_manager.session_scope("mysql") as session:
+        widget = session.get(Widget, 1)
+        widget.name = "b"
+        session.flush()
+        widget.description = "d"
+        session.flush()
+        widget.name = "c"
+
+    [events] = published
+    [event] = events
+    assert (event.action, event.sync_version) == ("update", 2)
+    assert _params(event)["set_name"] == "c"
+    assert _params(event)["set_description"] == "d"
+    assert _params(event)["where_sync_version"] == 1
+
+
+def test_version_bumps_once_even_when_the_instance_is_reloaded(published):
+    _add_widget()
+    published.clear()
+
+    with db_manager.session_scope("mysql") as session:
+        session.get(Widget, 1).name = "b"
+        session.flush()
+        session.expunge_all()
+        session.get(Widget, 1).name = "c"
+
+    [[event]] = published
+    assert event.sync_version == 2
+    assert _params(event)["where_sync_version"] == 1
+    with db_manager.session_scope("mysql") as session:
+        assert session.get(Widget, 1).sync_version == 2
+
+
+def test_insert_absorbs_later_updates_and_insert_delete_cancels(published):
+    with db_manager.session_scope("mysql") as session:
+        session.add(Widget(id=1, name="a"))
+        session.flush()
+        session.get(Widget, 1).name = "b"
+        session.add(Widget(id=2, name="gone"))
+        session.flush()
+        session.delete(session.get(Widget, 2))
+
+    [[event]] = published
+    assert (event.action, event.record_id, event.sync_version) == ("insert", "1", 1)
+    assert _params(event)["name"] == "b"
+
+
+def test_update_then_delete_keeps_the_pre_transaction_guard(published):
+    _add_widget()
+    published.clear()
+
+    with db_manager.session_scope("mysql") as session:
+        widget = session.get(Widget, 1)
+        widget.name = "b"
+        session.flush()
+        session.delete(widget)
+
+    [[event]] = published
+    assert event.action == "delete"
+    assert _params(event)["where_sync_version"] == 1
+
+
+def test_each_transaction_bumps_the_version_again(published):
+    _add_widget()
+    for name in ("b", "c"):
+        with db_manager.session_scope("mysql") as session:
+            session.get(Widget, 1).name = name
+
+    assert [batch[0].sync_version for batch in published] == [1, 2, 3]
+    assert [_params(batch[0]).get("where_sync_version") for batch in published] == [None, 1, 2]
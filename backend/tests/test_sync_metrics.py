@@ -0,0 +1,90 @@
+"""Replication metrics: worker snapshots, histogram merging and stream lag."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from apps.core.sync_metrics import Histogram, WorkerMetrics, read_sync_metrics, stream_lag
+
+STREAM = "campuswap:sync:events"
+GROUP = "sync-workers"
+
+
+def _ago(seconds: float) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=seconds)
+
+
+def test_histogram_quantiles_use_bucket_upper_bounds():
+    histogram = Histogram()
+    for value in [0.003] * 90 + [0.3] * 9 + [100.0]:
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 0.005
+    assert histogram.quantile(0.95) == 0.5
+    # The overflow bucket reports the largest finite bound.
+    assert histogram.quantile(1.0) == 60.0
+    assert Histogram().quantile(0.5) is None
+
+
+def test_merged_histograms_add_their_counts():
+    first, second = Histogram(), Histogram()
+    first.observe(0.02)
+    second.observe(0.02)
+    second.observe(2.0)
+
+    first.merge(second.as_dict())
+
+    assert first.count == 3
+    assert first.total == pytest.approx(2.04)
+    assert first.quantile(0.5) == 0.025
+
+
+def test_worker_snapshots_are_aggregated_per_target(redis_client):
+    first, second = WorkerMetrics(), WorkerMetrics()
+    first.record_apply(_ago(0.2), ["postgres", "sqlite"])
+    # Naive timestamps are read as UTC.
+    second.record_apply(_ago(3).replace(tzinfo=None), ["postgres"])
+    second.set_gauge("batch_size", 64)
+    first.flush(redis_client, "w1")
+    second.flush(redis_client, "w2")
+
+    metrics = read_sync_metrics(redis_client, [STREAM], GROUP)
+
+    assert metrics["available"]
+    assert {name: worker["events"] for name, worker in metrics["workers"].items()} == {
+        "w1": 1,
+        "w2": 1,
+    }
+    assert metrics["workers"]["w2"]["batch_size"] == 64
+    latency = metrics["apply_latency_seconds"]
+    assert latency["postgres"]["count"] == 2
+    assert latency["postgres"]["p50"] == 0.25
+    assert latency["postgres"]["p99"] == 5.0
+    assert latency["sqlite"]["count"] == 1
+
+
+def test_stream_lag_counts_unread_and_pending_entries(redis_client):
+    redis_client.xgroup_create(STREAM, GROUP, id="0", mkstream=True)
+    for index in range(5):
+        redis_client.xadd(STREAM, {"n": str(index)})
+    redis_client.xreadgroup(GROUP, "w1", {STREAM: ">"}, count=2)
+
+    streams = stream_lag(redis_client, [STREAM, "campuswap:sync:missing"], GROUP)
+
+    assert streams[STREAM]["length"] == 5
+    assert streams[STREAM]["lag"] == 3
+    assert streams[STREAM]["pending"] == 2
+    assert streams[STREAM]["oldest_pending_age_seconds"] is not None
+    assert streams["campuswap:sync:missing"] == {"length": 0, "lag": 0, "pending": 0}
+
+
+def test_a_stream_without_the_group_is_all_lag(redis_client):
+    for index in range(3):
+        redis_client.xadd(STREAM, {"n": str(index)})
+
+    assert stream_lag(redis_client, [STREAM], GROUP)[STREAM] == {
+        "length": 3,
+        "lag": 3,
+        "pending": 0,
+    }
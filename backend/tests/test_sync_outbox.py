@@ -0,0 +1,140 @@
+"""Outbox relay: rows reach the stream in order, in whole groups, exactly once."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pytest
+from redis.exceptions import RedisError
+from sqlalchemy import event, insert, select, text
+from sqlalchemy.exc import OperationalError
+
+from apps.core.models import SyncOutbox
+from apps.core.sync_engine import SyncEvent, sync_engine
+from apps.services import outbox_relay
+from apps.services.outbox_relay import relay_once
+
+OUTBOX = SyncOutbox.__table__
+
+
+@pytest.fixture
+def outbox(databases, redis_client):
+    """An empty outbox on the primary, with the events the relay publishes."""
+
+    OUTBOX.create(databases["mysql"])
+    return databases["mysql"]
+
+
+def _add(engine, row_id: int, group_id: Optional[str] = None) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            insert(OUTBOX).values(
+                id=row_id,
+                table_name="widgets",
+                action="insert",
+                record_id=str(row_id),
+                origin="mysql",
+                sync_version=1,
+                payload={
+                    "statement": "INSERT INTO widgets (id) VALUES (:id)",
+                    "params": {"id": row_id},
+                },
+                occurred_at=datetime.now(timezone.utc),
+                group_id=group_id,
+            )
+        )
+
+
+def _remaining(engine) -> List[int]:
+    with engine.connect() as connection:
+        return list(connection.execute(select(OUTBOX.c.id).order_by(OUTBOX.c.id)).scalars())
+
+
+def _published(redis_client) -> List[SyncEvent]:
+    entries = redis_client.xrange(sync_engine.stream_key, "-", "+")
+    return [sync_engine.decode_event(fields) for _, fields in entries]
+
+
+def test_rows_are_published_in_id_order_and_deleted(outbox, redis_client):
+    for row_id in (3, 1, 2):
+        _add(outbox, row_id)
+
+    assert relay_once(batch_size=10) == 3
+
+    assert [event.record_id for event in _published(redis_client)] == ["1", "2", "3"]
+    assert _remaining(outbox) == []
+    assert relay_once(batch_size=10) == 0
+
+
+def test_a_commit_group_cut_by_the_batch_size_is_published_whole(outbox, redis_client):
+    _add(outbox, 1)
+    _add(outbox, 2, group_id="g1")
+    _add(outbox, 3)
+    _add(outbox, 4, group_id="g1")
+
+    assert relay_once(batch_size=2) == 3
+
+    published = _published(redis_client)
+    assert [event.record_id for event in published] == ["1", "2", "4"]
+    assert [event.group_size for event in published if event.group_id] == [2, 2]
+    assert _remaining(outbox) == [3]
+
+
+def test_rows_stay_in_the_outbox_when_publishing_fails(outbox, monkeypatch: pytest.MonkeyPatch):
+    _add(outbox, 1)
+
+    def fail(events):
+        raise RedisError("connection reset")
+
+    monkeypatch.setattr(sync_engine, "publish_events", fail)
+    with pytest.raises(RedisError):
+        relay_once(batch_size=10)
+
+    assert _remaining(outbox) == [1]
+
+
+def test_sqlite_primary_takes_no_advisory_lock(outbox, redis_client):
+    statements: List[str] = []
+    event.listen(
+        outbox,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    _add(outbox, 1)
+
+    assert relay_once(batch_size=10) == 1
+
+    assert not [statement for statement in statements if "LOCK" in statement.upper()]
+
+
+@pytest.mark.parametrize("error", [RedisError("reset"), OperationalError("SELECT 1", {}, None)])
+def test_relay_loop_keeps_going_after_a_failed_batch(error, monkeypatch: pytest.MonkeyPatch):
+    calls: List[int] = []
+
+    def relay(batch_size: int) -> int:
+        calls.append(batch_size)
+        if len(calls) == 1:
+            raise error
+        return 1
+
+    monkeypatch.setattr(outbox_relay, "relay_once", relay)
+
+    assert outbox_relay.relay_outbox(batch_size=1, poll_interval=0, max_batches=2) == 2
+    assert len(calls) == 3
+
+
+def test_a_failed_batch_drops_its_connection(
+    outbox, redis_client, monkeypatch: pytest.MonkeyPatch
+):
+    _add(outbox, 1)
+    invalidated: List[object] = []
+    event.listen(outbox, "invalidate", lambda *args: invalidated.append(args))
+    monkeypatch.setattr(
+        outbox_relay, "_relay_batch", lambda connection, size: connection.execute(text("BAD"))
+    )
+
+    with pytest.raises(OperationalError):
+        outbox_relay.relay_once(batch_size=10)
+
+    assert invalidated
+    assert _remaining(outbox) == [1]
@@ -0,0 +1,128 @@
+"""Quorum writes: when the event is published for the sync worker."""
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timezone
+from typing import List
+
+import pytest
+
+from apps.core.sync_engine import ReplicationResult, SyncEvent, late_applied_key, sync_engine
+from apps.services import db_operations
+from apps.services.db_operations import db_operation_service
+from apps.services.sync_worker import StreamEntry, _load_progress
+
+SLOW_TARGET = "sqlite"
+
+
+def _event() -> SyncEvent:
+    return SyncEvent(
+        table="widgets",
+        action="update",
+        payload={"statement": "UPDATE widgets SET name = :name WHERE id = :id", "params": {}},
+        origin="mysql",
+        occurred_at=datetime.now(timezone.utc),
+        sync_version=2,
+        record_id="1",
+    )
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.info: dict = {}
+
+
+@pytest.fixture
+def replication(redis_client, monkeypatch: pytest.MonkeyPatch):
+    """Fast targets succeed at once; the slow target waits for ``release``."""
+
+    state = {
+        "release": threading.Event(),
+        "settled": threading.Event(),
+        "slow_error": None,
+        "published": [],
+    }
+
+    def replicate_to(event: SyncEvent, target: str) -> ReplicationResult:
+        if target == SLOW_TARGET:
+            assert state["release"].wait(5)
+            return ReplicationResult(target=target, error=state["slow_error"])
+        return ReplicationResult(target=target, rowcount=1)
+
+    def publish_event(event: SyncEvent) -> str:
+        state["published"].append(event)
+        return f"{len(state['published'])}-0"
+
+    settle = db_operations._QuorumHandoff.settle
+
+    def settled(handoff, results) -> None:
+        settle(handoff, results)
+        state["settled"].set()
+
+    monkeypatch.setattr(sync_engine, "_parallel", True)
+    monkeypatch.setattr(sync_engine, "_replicate_to", replicate_to)
+    monkeypatch.setattr(sync_engine, "publish_event", publish_event)
+    monkeypatch.setattr(db_operations._QuorumHandoff, "settle", settled)
+    yield state
+    state["release"].set()
+
+
+def _applied(published: List[SyncEvent]) -> List[set]:
+    return [set(event.applied_targets) for event in published]
+
+
+def test_quorum_publishes_without_waiting_for_the_straggler(replication, redis_client):
+    session = _Session()
+
+    db_operation_service._replicate_committed(session, _event(), "quorum")
+
+    receipt = db_operation_service.sync_receipts(session)[0]
+    assert receipt.satisfied
+    assert set(receipt.applied_targets) == {"mysql", "mariadb", "postgres"}
+    assert receipt.pending_targets == [SLOW_TARGET]
+    assert _applied(replication["published"]) == [{"mariadb", "postgres"}]
+    assert not replication["settled"].is_set()
+
+    # The straggler succeeds later; the worker then has nothing left to apply.
+    replication["release"].set()
+    assert replication["settled"].wait(5)
+    event = replication["published"][0]
+    stream_key = sync_engine.stream_key_for(event)
+    assert redis_client.get(late_applied_key(stream_key, "1-0")) == f'["{SLOW_TARGET}"]'
+    entry = StreamEntry(stream_key, "1-0", event)
+    assert _load_progress([entry]) == [{"mariadb", "postgres", SLOW_TARGET}]
+    assert len(replication["published"]) == 1
+
+
+def test_failed_straggler_is_left_to_the_worker(replication, redis_client):
+    replication["slow_error"] = "connection refused"
+
+    db_operation_service._replicate_committed(_Session(), _event(), "quorum")
+    assert _applied(replication["published"]) == [{"mariadb", "postgres"}]
+
+    replication["release"].set()
+    assert replication["settled"].wait(5)
+    assert len(replication["published"]) == 1
+    assert not redis_client.keys(late_applied_key("*", "*"))
+
+
+def test_all_reports_a_shortfall_instead_of_raising(replication):
+    replication["slow_error"] = "connection refused"
+    replication["release"].set()
+    session = _Session()
+
+    db_operation_service._replicate_committed(session, _event(), "all")
+
+    summary = db_operation_service.sync_summary(session)
+    assert not summary["satisfied"]
+    assert summary["synced_to"] == ["mysql", "mariadb", "postgres"]
+    assert summary["pending_targets"] == [SLOW_TARGET]
+    assert _applied(replication["published"]) == [{"mariadb", "postgres"}]
+
+
+def test_nothing_is_published_once_every_target_applied(replication):
+    replication["release"].set()
+
+    db_operation_service._replicate_committed(_Session(), _event(), "all")
+
+    assert replication["published"] == []
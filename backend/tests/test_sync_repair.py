@@ -0,0 +1,91 @@
+"""Bulk repair: chunked upserts from the primary and range-bounded deletes."""
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from apps.services.sync_manager import DatabaseSyncManager
+from tests.conftest import execute_all
+
+CREATE_FAVORITES = (
+    "CREATE TABLE favorites (id INTEGER PRIMARY KEY, user_id INTEGER, item_id INTEGER, "
+    "sync_version INTEGER)"
+)
+INSERT_FAVORITE = "INSERT INTO favorites VALUES (:id, 1, :item_id, 1)"
+
+
+def _insert(engine, ids: List[int], item_id: int = 0) -> None:
+    with engine.begin() as connection:
+        connection.execute(
+            text(INSERT_FAVORITE), [{"id": row_id, "item_id": item_id or row_id} for row_id in ids]
+        )
+
+
+def _rows(engine) -> Dict[int, int]:
+    with engine.connect() as connection:
+        return dict(connection.execute(text("SELECT id, item_id FROM favorites")).all())
+
+
+def _repair(**kwargs) -> dict:
+    return asyncio.run(DatabaseSyncManager().sync_repair_bulk("favorites", **kwargs))
+
+
+def test_range_repair_upserts_and_deletes_only_inside_the_range(databases):
+    execute_all(databases, CREATE_FAVORITES)
+    _insert(databases["mysql"], [1, 2, 3, 5, 6, 8, 9, 20])
+    target = databases["postgres"]
+    # Stale values, rows the primary no longer has (between and after its chunks),
+    # a missing row, and rows outside the repaired range.
+    _insert(target, [1, 2, 3, 5, 6, 8, 20], item_id=99)
+    _insert(target, [4, 7, 10, 0, 25])
+
+    result = _repair(start=1, end=11, targets=["postgres"], chunk_size=3)
+
+    assert result["success"]
+    assert result["chunks"] == 3
+    assert result["upserted"] == {"postgres": 7}
+    assert result["deleted"] == {"postgres": 3}
+    rows = _rows(target)
+    assert {row_id: rows[row_id] for row_id in rows if 1 <= row_id < 11} == {
+        row_id: row_id for row_id in (1, 2, 3, 5, 6, 8, 9)
+    }
+    assert {row_id: rows[row_id] for row_id in (0, 20, 25)} == {0: 0, 20: 99, 25: 25}
+
+
+def test_open_ended_range_removes_the_targets_tail(databases):
+    execute_all(databases, CREATE_FAVORITES)
+    _insert(databases["mysql"], [1, 2, 3, 4])
+    _insert(databases["sqlite"], [1, 2, 3, 4, 5, 6])
+
+    result = _repair(start=3, targets=["sqlite"], chunk_size=2)
+
+    assert result["deleted"] == {"sqlite": 2}
+    assert sorted(_rows(databases["sqlite"])) == [1, 2, 3, 4]
+
+
+def test_id_repair_deletes_only_requested_ids_missing_on_the_primary(databases):
+    execute_all(databases, CREATE_FAVORITES)
+    _insert(databases["mysql"], [1, 2])
+    _insert(databases["mariadb"], [2, 3, 4], item_id=99)
+
+    result = _repair(record_ids=[1, 2, 3], targets=["mariadb"], chunk_size=2)
+
+    assert result["upserted"] == {"mariadb": 2}
+    assert result["deleted"] == {"mariadb": 1}
+    assert _rows(databases["mariadb"]) == {1: 1, 2: 2, 4: 99}
+
+
+def test_a_failing_target_is_skipped_for_later_chunks(databases):
+    execute_all(databases, CREATE_FAVORITES)
+    _insert(databases["mysql"], [1, 2, 3, 4])
+    with databases["sqlite"].begin() as connection:
+        connection.execute(text("DROP TABLE favorites"))
+
+    result = _repair(start=1, end=5, targets=["postgres", "sqlite"], chunk_size=2)
+
+    assert not result["success"]
+    assert result["repaired_dbs"] == ["postgres"]
+    assert set(result["errors"]) == {"sqlite"}
+    assert sorted(_rows(databases["postgres"])) == [1, 2, 3, 4]
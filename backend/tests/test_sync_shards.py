@@ -0,0 +1,61 @@
+"""Stream partitioning: one partition per record, each owned by one worker process."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from apps.core.sync_engine import SyncEvent, sync_engine
+from apps.services.sync_worker import _check_processes, _streams_for_process
+
+
+def _event(record_id: int, version: int) -> SyncEvent:
+    return SyncEvent(
+        table="items",
+        action="update",
+        payload={"statement": "UPDATE items SET title = :title WHERE id = :id", "params": {}},
+        origin="mysql",
+        occurred_at=datetime.now(timezone.utc),
+        sync_version=version,
+        record_id=str(record_id),
+    )
+
+
+@pytest.fixture
+def shards(redis_client, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(sync_engine, "_shards", 4)
+    monkeypatch.setattr(sync_engine, "_priority_lanes", False)
+    return redis_client
+
+
+def test_events_of_one_record_share_a_partition_in_publish_order(shards):
+    events = [_event(record_id, version) for version in (1, 2, 3) for record_id in range(20)]
+
+    sync_engine.publish_events(events)
+
+    used = set()
+    for record_id in range(20):
+        key = sync_engine.stream_key_for(_event(record_id, 1))
+        used.add(key)
+        published = [sync_engine.decode_event(fields) for _, fields in shards.xrange(key)]
+        versions = [
+            event.sync_version for event in published if event.record_id == str(record_id)
+        ]
+        assert versions == [1, 2, 3]
+    # Twenty records spread over more than one of the four partitions.
+    assert len(used) > 1
+
+
+@pytest.mark.parametrize("processes", [1, 3, 4, 6])
+def test_every_partition_is_owned_by_exactly_one_process(shards, processes):
+    owned = [_streams_for_process(index, processes) for index in range(processes)]
+
+    flat = [key for keys in owned for key in keys]
+    assert sorted(flat) == sorted(sync_engine.stream_keys)
+    assert len(flat) == len(set(flat))
+
+
+@pytest.mark.parametrize(("processes", "index"), [(0, None), (2, 2), (2, -1)])
+def test_invalid_process_slices_are_rejected(processes, index):
+    with pytest.raises(ValueError):
+        _check_processes(processes, index)
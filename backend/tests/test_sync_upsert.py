@@ -0,0 +1,74 @@
+"""Version guards of replicated upserts."""
+from __future__ import annotations
+
+from sqlalchemy import text
+
+from apps.core.database import db_manager
+from apps.core.sync_upsert import build_upsert, upsert_rows, upsert_statement
+from tests.conftest import execute_all
+
+CREATE_WIDGETS = "CREATE TABLE widgets (id INTEGER PRIMARY KEY, name TEXT, sync_version INTEGER)"
+
+
+def _row(engine, record_id: int = 1):
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT name, sync_version FROM widgets WHERE id = :id"), {"id": record_id}
+        ).one()
+
+
+def test_guarded_upsert_only_applies_newer_versions(databases):
+    execute_all(databases, CREATE_WIDGETS)
+    with db_manager.session_scope("sqlite") as session:
+        upsert_rows(session, "widgets", [{"id": 1, "name": "v3", "sync_version": 3}])
+    with db_manager.session_scope("sqlite") as session:
+        upsert_rows(session, "widgets", [{"id": 1, "name": "stale", "sync_version": 2}])
+        upsert_rows(session, "widgets", [{"id": 1, "name": "replay", "sync_version": 3}])
+
+    assert tuple(_row(databases["sqlite"])) == ("v3", 3)
+
+    with db_manager.session_scope("sqlite") as session:
+        upsert_rows(session, "widgets", [{"id": 1, "name": "v4", "sync_version": 4}])
+
+    assert tuple(_row(databases["sqlite"])) == ("v4", 4)
+
+
+def test_unguarded_upsert_overwrites_newer_rows(databases):
+    execute_all(databases, CREATE_WIDGETS)
+    execute_all(databases, "INSERT INTO widgets VALUES (1, 'v5', 5)")
+    with db_manager.session_scope("sqlite") as session:
+        upsert_rows(
+            session, "widgets", [{"id": 1, "name": "repair", "sync_version": 2}], guarded=False
+        )
+
+    assert tuple(_row(databases["sqlite"])) == ("repair", 2)
+
+
+def test_mysql_guard_compares_before_bumping_the_version():
+    statement = build_upsert("widgets", ("id", "name", "sync_version"), "mysql")
+
+    assert statement.endswith(
+        "ON DUPLICATE KEY UPDATE "
+        "name = IF(VALUES(sync_version) > sync_version, VALUES(name), name), "
+        "sync_version = GREATEST(sync_version, VALUES(sync_version))"
+    )
+
+
+def test_postgres_guard_is_a_conflict_where_clause():
+    statement = build_upsert("widgets", ("id", "name", "sync_version"), "postgresql")
+
+    assert statement.endswith(
+        "ON CONFLICT (id) DO UPDATE SET name = excluded.name, "
+        "sync_version = excluded.sync_version "
+        "WHERE widgets.sync_version < excluded.sync_version"
+    )
+
+
+def test_only_plain_inserts_are_rewritten():
+    insert = "INSERT INTO widgets (id, name, sync_version) VALUES (:id, :name, :sync_version)"
+    update = "UPDATE widgets SET name = :name WHERE id = :id"
+    computed = "INSERT INTO widgets (id, name) VALUES (:id, upper(:name))"
+
+    assert "ON CONFLICT" in upsert_statement(insert, "sqlite")
+    assert upsert_statement(update, "sqlite") == update
+    assert upsert_statement(computed, "sqlite") == computed
@@ -0,0 +1,149 @@
+"""Range-hash verification across the four databases."""
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import text
+from sqlalchemy.dialects import mysql as mysql_dialect
+from sqlalchemy.dialects import postgresql as postgresql_dialect
+
+from apps.core.models import Base
+from apps.services.sync_verifier import (
+    RangeHashVerifier,
+    _digest_columns,
+    _row_sql,
+    _row_text_digest,
+    row_digest,
+)
+from tests.conftest import execute_all
+
+CREATE_WIDGETS = (
+    "CREATE TABLE widgets (id INTEGER PRIMARY KEY, name TEXT, description TEXT, "
+    "sync_version INTEGER NOT NULL DEFAULT 1)"
+)
+
+
+def _seed(databases, rows: int = 2000) -> None:
+    execute_all(databases, CREATE_WIDGETS)
+    execute_all(
+        databases,
+        "INSERT INTO widgets (id, name, description, sync_version) VALUES (:id, :name, 'x', 1)",
+        [{"id": i, "name": f"w{i}"} for i in range(1, rows + 1)],
+    )
+
+
+def test_consistent_table_reports_no_divergence(databases):
+    _seed(databases)
+
+    report = RangeHashVerifier(leaf_rows=64).verify_table("widgets")
+
+    assert report.consistent
+    assert report.row_counts == {name: 2000 for name in databases}
+    assert report.leaf_ranges == 0
+
+
+def test_finds_missing_rows_and_same_version_content_divergence(databases):
+    _seed(databases)
+    with databases["postgres"].begin() as connection:
+        connection.execute(text("DELETE FROM widgets WHERE id = 700"))
+    with databases["sqlite"].begin() as connection:
+        # Same sync_version, different content: invisible to (id, version) aggregates.
+        connection.execute(text("UPDATE widgets SET description = 'B' WHERE id = 1500"))
+
+    report = RangeHashVerifier(leaf_rows=64).verify_table("widgets")
+
+    assert sorted(report.divergent) == [700, 1500]
+    assert report.divergent[700]["postgres"] is None
+    assert report.divergent[1500] == {name: 1 for name in databases}
+
+
+def test_version_only_audit_misses_same_version_divergence(databases):
+    _seed(databases)
+    with databases["postgres"].begin() as connection:
+        connection.execute(text("DELETE FROM widgets WHERE id = 700"))
+    with databases["sqlite"].begin() as connection:
+        connection.execute(text("UPDATE widgets SET description = 'B' WHERE id = 1500"))
+
+    report = RangeHashVerifier(leaf_rows=64).verify_table("widgets", content=False)
+
+    assert sorted(report.divergent) == [700]
+
+
+def test_row_digest_ignores_timestamps_and_driver_representation():
+    base = {"id": 1, "price": Decimal("10.50"), "created_at": datetime(2024, 1, 1)}
+    same = {
+        "id": 1,
+        "price": 10.5,
+        "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+    }
+
+    assert row_digest(base) == row_digest(same)
+    assert row_digest(base) != row_digest({**base, "price": Decimal("10.51")})
+
+
+OFFERS = Base.metadata.tables["offers"]
+
+
+def _offer(offer_id: int, **values) -> dict:
+    return {
+        "id": offer_id,
+        "item_id": offer_id,
+        "buyer_id": 7,
+        "amount": Decimal("10.50"),
+        "status": "pending",
+        "expires_at": None,
+        "created_at": datetime(2024, 1, 1),
+        "updated_at": datetime(2024, 1, 1),
+        "sync_version": 1,
+        **values,
+    }
+
+
+def test_mapped_tables_hash_canonical_row_text():
+    columns = _digest_columns(OFFERS)
+    expires = datetime(2024, 1, 1, 12, tzinfo=timezone(timedelta(hours=8)))
+    row = _offer(1, amount=10.5, expires_at=expires)
+    expected = hashlib.md5(b"v10.50|v7|v2024-01-01 04:00:00|v1|v1|vpending|v1").hexdigest()
+
+    assert [column.name for column in columns][:3] == ["amount", "buyer_id", "expires_at"]
+    assert _row_text_digest(columns, row) == int(expected[:15], 16)
+    assert _row_text_digest(columns, _offer(1, amount=Decimal("10.5"))) != _row_text_digest(
+        columns, _offer(1, amount=Decimal("10.51"))
+    )
+    # JSON has no canonical text across dialects, so such tables stream everywhere.
+    assert _digest_columns(Base.metadata.tables["sync_outbox"]) is None
+
+
+def test_row_digest_sql_matches_the_canonical_text_per_dialect():
+    columns = _digest_columns(OFFERS)
+
+    mysql = _row_sql(columns, mysql_dialect.dialect())
+    postgres = _row_sql(columns, postgresql_dialect.dialect())
+
+    assert "DATE_FORMAT(expires_at, '%Y-%m-%d %H:%i:%s')" in mysql
+    assert "CONV(LEFT(MD5(CONCAT_WS('|', " in mysql
+    assert "to_char(expires_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')" in postgres
+    assert "AS BIT(60)) AS BIGINT)" in postgres
+    for sql in (mysql, postgres):
+        assert sql.index("amount") < sql.index("buyer_id") < sql.index("status")
+        assert "created_at" not in sql
+
+
+def test_content_audit_of_a_mapped_table_finds_value_drift(databases):
+    for engine in databases.values():
+        OFFERS.create(engine)
+        with engine.begin() as connection:
+            connection.execute(OFFERS.insert(), [_offer(i) for i in range(1, 501)])
+    with databases["mariadb"].begin() as connection:
+        connection.execute(OFFERS.update().where(OFFERS.c.id == 42).values(amount=10.51))
+    with databases["sqlite"].begin() as connection:
+        connection.execute(
+            OFFERS.update().where(OFFERS.c.id == 300).values(expires_at=datetime(2024, 2, 1))
+        )
+
+    report = RangeHashVerifier(leaf_rows=32).verify_table("offers")
+
+    assert sorted(report.divergent) == [42, 300]
+    assert report.leaf_ranges == 2
@@ -0,0 +1,155 @@
+"""Worker batching: coalesced updates, retries and acknowledgements."""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from apps.core.sync_engine import ReplicationResult, SyncEvent
+from apps.services.sync_worker import (
+    PROGRESS_KEY,
+    AdaptiveBatchSizer,
+    StreamEntry,
+    _apply_each,
+    _coalesce_updates,
+    _load_progress,
+    _progress_field,
+    _settle,
+)
+from tests.conftest import execute_all
+
+CREATE_WIDGETS = "CREATE TABLE widgets (id INTEGER PRIMARY KEY, name TEXT, sync_version INTEGER)"
+UPDATE_WIDGET = (
+    "UPDATE widgets SET name = :name, sync_version = :sync_version "
+    "WHERE id = :id AND sync_version = :where_sync_version"
+)
+STREAM = "campuswap:sync:events"
+GROUP = "sync-workers"
+
+
+def _update(record_id: int, name: str, version: int) -> SyncEvent:
+    return SyncEvent(
+        table="widgets",
+        action="update",
+        payload={
+            "statement": UPDATE_WIDGET,
+            "params": {
+                "id": record_id,
+                "name": name,
+                "sync_version": version,
+                "where_sync_version": version - 1,
+            },
+        },
+        origin="mysql",
+        occurred_at=datetime.now(timezone.utc),
+        sync_version=version,
+        record_id=str(record_id),
+    )
+
+
+def _pending(redis_client, events: list[SyncEvent], deliveries: int = 1) -> list[StreamEntry]:
+    """Add ``events`` to the stream and read them so they sit in the group's PEL."""
+
+    redis_client.xgroup_create(STREAM, GROUP, id="0", mkstream=True)
+    entry_ids = [redis_client.xadd(STREAM, {"n": str(index)}) for index in range(len(events))]
+    redis_client.xreadgroup(GROUP, "worker-1", {STREAM: ">"})
+    return [
+        StreamEntry(STREAM, entry_id, event, deliveries=deliveries)
+        for entry_id, event in zip(entry_ids, events)
+    ]
+
+
+def _widget(engine) -> tuple[str, int]:
+    with engine.connect() as connection:
+        return tuple(connection.execute(text("SELECT name, sync_version FROM widgets")).one())
+
+
+def test_replayed_merged_update_skips_targets_that_already_applied_it(
+    databases, redis_client
+):
+    execute_all(databases, CREATE_WIDGETS)
+    execute_all(databases, "INSERT INTO widgets VALUES (1, 'a', 1)")
+    # The first delivery of the merged update reached postgres only.
+    with databases["postgres"].begin() as connection:
+        connection.execute(text("UPDATE widgets SET name = 'c', sync_version = 3"))
+    entries = _pending(redis_client, [_update(1, "b", 2), _update(1, "c", 3)], deliveries=2)
+    for entry in entries:
+        redis_client.hset(PROGRESS_KEY, _progress_field(STREAM, entry.entry_id), '["postgres"]')
+
+    merged = _coalesce_updates(entries)
+    assert len(merged) == 1
+    assert merged[0].deliveries == 2
+
+    done = _load_progress(merged)
+    assert done == [{"postgres"}]
+
+    outcomes = _apply_each(merged, done)
+    assert "postgres" not in outcomes[0]
+    assert all(result.ok and not result.conflict for result in outcomes[0].values())
+    assert _settle(merged, outcomes, done, GROUP) == 1
+
+    for name in ("mariadb", "postgres", "sqlite"):
+        assert _widget(databases[name]) == ("c", 3)
+    assert redis_client.xpending(STREAM, GROUP)["pending"] == 0
+    assert not redis_client.exists(PROGRESS_KEY)
+
+
+def test_failed_merged_update_records_progress_for_every_folded_entry(
+    databases, redis_client
+):
+    execute_all(databases, CREATE_WIDGETS)
+    execute_all(databases, "INSERT INTO widgets VALUES (1, 'a', 1)")
+    with databases["sqlite"].begin() as connection:
+        connection.execute(text("DROP TABLE widgets"))
+    merged = _coalesce_updates(_pending(redis_client, [_update(1, "b", 2), _update(1, "c", 3)]))
+    done = _load_progress(merged)
+
+    assert _settle(merged, _apply_each(merged, done), done, GROUP) == 0
+
+    progress = redis_client.hgetall(PROGRESS_KEY)
+    assert set(progress) == {_progress_field(STREAM, entry_id) for entry_id in merged[0].entry_ids}
+    assert all(json.loads(value) == ["mariadb", "postgres"] for value in progress.values())
+    assert redis_client.xpending(STREAM, GROUP)["pending"] == 2
+
+
+def test_entries_after_a_failed_update_of_their_record_stay_pending(redis_client):
+    entries = _pending(
+        redis_client, [_update(1, "b", 2), _update(2, "x", 2), _update(1, "c", 3)]
+    )
+    ok = {target: ReplicationResult(target=target, rowcount=1) for target in ("mariadb", "sqlite")}
+    failed = {**ok, "postgres": ReplicationResult(target="postgres", error="lock wait timeout")}
+    outcomes = [failed, {**ok, "postgres": ReplicationResult(target="postgres")}, dict(ok)]
+
+    assert _settle(entries, outcomes, [set(), set(), {"postgres"}], GROUP) == 1
+
+    pending = redis_client.xpending_range(STREAM, GROUP, min="-", max="+", count=10)
+    assert [item["message_id"] for item in pending] == [entries[0].entry_id, entries[2].entry_id]
+    progress = redis_client.hgetall(PROGRESS_KEY)
+    assert json.loads(progress[_progress_field(STREAM, entries[0].entry_id)]) == [
+        "mariadb",
+        "sqlite",
+    ]
+    assert json.loads(progress[_progress_field(STREAM, entries[2].entry_id)]) == [
+        "mariadb",
+        "postgres",
+        "sqlite",
+    ]
+
+
+def test_batch_size_grows_on_full_fast_reads_and_shrinks_when_slow_or_idle():
+    sizer = AdaptiveBatchSizer(initial=100, minimum=10, maximum=1000, target_seconds=0.5)
+
+    assert sizer.observe(read=100, elapsed=0.1) == 200
+    assert sizer.observe(read=200, elapsed=0.1) == 400
+    # A batch twice as slow as the target halves the count.
+    assert sizer.observe(read=400, elapsed=1.0) == 200
+    # Partly filled reads keep it; nearly empty reads let it decay.
+    assert sizer.observe(read=120, elapsed=0.1) == 200
+    assert sizer.observe(read=0, elapsed=0.0) == 150
+    for _ in range(20):
+        sizer.observe(read=0, elapsed=0.0)
+    assert sizer.current == 10
+    for _ in range(20):
+        sizer.observe(read=sizer.current, elapsed=0.01)
+    assert sizer.current == 1000
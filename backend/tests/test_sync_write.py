@@ -0,0 +1,113 @@
+"""Direct four-database writes: server-side deadlines and their cleanup."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import List
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from apps.services.sync_manager import DatabaseSyncManager
+from tests.conftest import execute_all
+
+CREATE_WIDGETS = "CREATE TABLE widgets (id INTEGER PRIMARY KEY, name TEXT, sync_version INTEGER)"
+
+
+class _MySQLSession:
+    """Just enough of a MySQL session for ``_write_deadline``."""
+
+    class _Bind:
+        class dialect:  # noqa: N801 - mimics the attribute
+            name = "mysql"
+
+    class _Connection:
+        def __init__(self) -> None:
+            self.invalidated = False
+
+        def invalidate(self) -> None:
+            self.invalidated = True
+
+    class _Result:
+        def one(self) -> tuple:
+            return (50,)
+
+    def __init__(self, fail_restore: bool) -> None:
+        self.fail_restore = fail_restore
+        self.statements: List[str] = []
+        self._connection = self._Connection()
+
+    def get_bind(self) -> "_MySQLSession._Bind":
+        return self._Bind()
+
+    def connection(self) -> "_MySQLSession._Connection":
+        return self._connection
+
+    def execute(self, statement) -> "_MySQLSession._Result":
+        self.statements.append(str(statement))
+        if self.fail_restore and str(statement) == "SET SESSION innodb_lock_wait_timeout = 50":
+            raise OperationalError(str(statement), {}, Exception(2013, "Lost connection"))
+        return self._Result()
+
+    def rollback(self) -> None:
+        self.statements.append("ROLLBACK")
+
+
+def test_deadline_restores_the_previous_session_value():
+    session = _MySQLSession(fail_restore=False)
+
+    with DatabaseSyncManager(write_timeout=3)._write_deadline(session):
+        pass
+
+    assert session.statements[1:] == [
+        "SET SESSION innodb_lock_wait_timeout = 3",
+        "SET SESSION innodb_lock_wait_timeout = 50",
+    ]
+    assert not session.connection().invalidated
+
+
+def test_failed_restore_drops_the_connection_without_masking_the_write_error():
+    session = _MySQLSession(fail_restore=True)
+
+    with pytest.raises(ValueError, match="duplicate"):
+        with DatabaseSyncManager(write_timeout=3)._write_deadline(session):
+            raise ValueError("duplicate key")
+
+    assert "ROLLBACK" in session.statements
+    assert session.connection().invalidated
+
+
+def test_write_commits_on_the_pinned_connection(databases):
+    execute_all(databases, CREATE_WIDGETS)
+
+    result = DatabaseSyncManager(write_timeout=1)._write_blocking(
+        "sqlite", "widgets", "insert", {"id": 1, "name": "a", "sync_version": 1}, None, None
+    )
+
+    assert result["success"]
+    with databases["sqlite"].connect() as connection:
+        assert connection.execute(text("SELECT name FROM widgets")).scalar() == "a"
+
+
+def test_a_locked_database_fails_at_the_server_deadline(databases):
+    execute_all(databases, CREATE_WIDGETS)
+    manager = DatabaseSyncManager(write_timeout=0.2)
+    blocker = databases["sqlite"].raw_connection()
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.monotonic()
+        result = asyncio.run(
+            manager._write_to_database(
+                "sqlite", "widgets", "insert", {"id": 1, "name": "a", "sync_version": 1}, None
+            )
+        )
+        elapsed = time.monotonic() - started
+    finally:
+        blocker.rollback()
+        blocker.close()
+
+    assert not result["success"]
+    assert "locked" in result["error"]
+    # The database gave up at the deadline, well before the client-side grace period.
+    assert elapsed < manager.WRITE_TIMEOUT_GRACE